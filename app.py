@@ -2,232 +2,64 @@ import streamlit as st
 import csv
 import requests
 import os
-import random
+import uuid
+import hashlib
+import functools
+import sqlite3
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Set, Optional, Union, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import html_components as html
+from catalog import CatalogIndex, SORT_OPTIONS, catalog_version
+from query_parser import QueryParser, INTENT_COMPARE, INTENT_FIND, run_query
+import local_answers
+import llm
+from llm import get_persona_product_prompt, get_cart_based_suggestion_prompt
+import precompute
+import behavior
+from behavior import BehaviorTracker
+from cart import Cart, DEFAULT_CART
+from event_log import EventLogger
+from session_memory import SessionMemoryMonitor
+from fragment_cache import FragmentCache
+from search_cache import IncrementalSearch, QueryCache
+import facets
+from facets import FacetIndex
+import post_order
+from post_order import PostOrderQueue
+import session_store
+from session_store import SessionBackend, SessionSync
+from order_ids import OrderIdGenerator
+from order_store import OrderStore
+import inventory
+from inventory import Inventory, OutOfStock
+from mention_linker import MentionAutomaton, Mention, highlight, mentioned_products
+
+# Answer every AI request from catalog templates (e.g. for load tests)
+NO_LLM = os.environ.get("QOOZEE_NO_LLM", "").lower() in ("1", "true", "yes")
 
 # --- Data Models and Types ---
 ProductType = Dict[str, str]
-CartType = List[int]
-BehaviorType = Dict[str, Union[Set[str], List[str]]]
+CartType = Cart
 
 # --- Load CSS ---
+# Served by Streamlit at app/static/ when server.enableStaticServing is on (.streamlit/config.toml)
+STYLESHEET = os.path.join("static", "styles.css")
+
+@st.cache_data
+def stylesheet_tag(path: str, mtime_ns: int, static_serving: bool) -> str:
+    """Link to the stylesheet, versioned by a hash of its content; inlined when static serving is off."""
+    with open(path, "rb") as f:
+        css = f.read()
+    if not static_serving:
+        return f"<style>{css.decode('utf-8')}</style>"
+    digest = hashlib.sha256(css).hexdigest()[:12]
+    return html.load_css(f"app/static/{os.path.basename(path)}?v={digest}")
+
 def load_css():
-    """Load custom CSS from a file or use inline CSS."""
-    try:
-        with open('static/styles.css', 'r') as f:
-            st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-    except FileNotFoundError:
-        # If file not found, use inline CSS
-        st.markdown("""
-        <style>
-        /* Main theme colors */
-        :root {
-            --qoozee-pink: #FF9EAA;
-            --qoozee-light-pink: #FFD1D9;
-            --qoozee-purple: #9D65C9;
-            --qoozee-yellow: #FFD166;
-            --qoozee-teal: #2EC4B6;
-        }
-        
-        /* Product card */
-        .product-card {
-            background-color: black;
-            border-radius: 16px;
-            padding: 20px;
-            box-shadow: 0 4px 10px rgba(0,0,0,0.05);
-            transition: all 0.3s ease;
-            border: 1px solid #F0F0F0;
-            margin-bottom: 20px;
-            color: white;
-        }
-        
-        /* Cart item */
-        .cart-item {
-            background-color: #222222;
-            border-radius: 16px;
-            padding: 15px;
-            margin-bottom: 15px;
-            border-left: 5px solid var(--qoozee-pink);
-            color: white;
-        }
-        
-        /* Price tag */
-        .price-tag {
-            background-color: #333333;
-            color: white;
-            padding: 5px 10px;
-            border-radius: 20px;
-            font-weight: bold;
-            display: inline-block;
-        }
-        
-        /* Star rating */
-        .star-rating {
-            color: var(--qoozee-yellow);
-            font-weight: bold;
-        }
-        
-        /* Category badge */
-        .category-badge {
-            background-color: #444444;
-            padding: 5px 10px;
-            border-radius: 20px;
-            font-size: 0.8rem;
-            margin-right: 5px;
-            color: white;
-        }
-        
-        /* Total price */
-        .total-price {
-            background: linear-gradient(90deg, var(--qoozee-pink), var(--qoozee-purple));
-            color: white;
-            padding: 10px 20px;
-            border-radius: 50px;
-            font-weight: bold;
-            text-align: center;
-            margin: 20px 0;
-        }
-        
-        /* Header styling */
-        h1, h2, h3, h4, h5 {
-            color: white;
-        }
-        
-        .app-subtitle {
-            text-align: center;
-            color: #888;
-            margin-top: -15px;
-            margin-bottom: 30px;
-        }
-        
-        /* User profile */
-        .user-profile {
-            background-color: #222222;
-            border-radius: 16px;
-            padding: 15px;
-            display: flex;
-            align-items: center;
-            margin-bottom: 20px;
-            color: white;
-        }
-        
-        .avatar {
-            background-color: var(--qoozee-pink);
-            width: 40px;
-            height: 40px;
-            border-radius: 50%;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            margin-right: 10px;
-            color: white;
-            font-weight: bold;
-        }
-        
-        /* Button styling */
-        .stButton > button {
-            border-radius: 12px;
-            font-weight: 600;
-            transition: all 0.3s ease;
-        }
-        
-        .stButton > button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        }
-        
-        /* AI response */
-        .ai-response {
-            background-color: #222222;
-            padding: 15px;
-            border-radius: 20px 20px 5px 20px;
-            max-width: 80%;
-            align-self: flex-end;
-            margin: 10px 0 10px auto;
-            color: white;
-        }
-        
-        /* User query */
-        .user-query {
-            background-color: #333333;
-            padding: 15px;
-            border-radius: 20px 20px 20px 5px;
-            max-width: 80%;
-            align-self: flex-start;
-            margin: 10px 0;
-            color: white;
-        }
-        
-        /* Footer */
-        .footer {
-            text-align: center;
-            margin-top: 50px;
-            color: #888;
-            padding: 20px 0;
-            border-top: 1px solid #333333;
-        }
-        
-        /* Dark theme overrides */
-        body {
-            background-color: #121212;
-            color: white;
-        }
-        
-        /* Section headers */
-        .section-header {
-            background-color: #222222;
-            border-radius: 16px;
-            padding: 20px;
-            margin-bottom: 20px;
-            color: white;
-        }
-        
-        /* Order details */
-        .order-details {
-            background-color: #222222;
-            border-radius: 16px;
-            padding: 20px;
-            margin: 20px 0;
-            color: white;
-        }
-        
-        /* Order success */
-        .order-success {
-            background-color: #1E2E1E;
-            border-radius: 16px;
-            padding: 30px;
-            text-align: center;
-            margin: 20px 0;
-            border: 2px solid #2A4A2A;
-            color: white;
-        }
-        
-        /* Streamlit element overrides */
-        .css-1l4y4fc, .css-1wmy9lf, .css-k3w14i {
-            background-color: #222222;
-            color: white;
-        }
-        
-        .st-dk, .st-d0, .st-d1, .st-d3 {
-            border-color: #333333;
-        }
-        
-        [data-baseweb="tab"] {
-            color: white !important;
-        }
-        
-        [data-baseweb="tab-list"] {
-            background-color: #222222 !important;
-        }
-        
-        [aria-selected="true"] {
-            background-color: #333333 !important;
-            color: var(--qoozee-pink) !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+    """Add the app stylesheet: a ~100 byte link per rerun instead of the whole CSS."""
+    st.markdown(stylesheet_tag(STYLESHEET, os.stat(STYLESHEET).st_mtime_ns,
+                               st.get_option("server.enableStaticServing")),
+                unsafe_allow_html=True)
 
 # --- Load product data from CSV ---
 @st.cache_data(ttl=60)  # Cache expires after 60 seconds
@@ -259,30 +91,159 @@ def load_products(filename: str) -> List[ProductType]:
         print(f"Error loading products: {str(e)}")
         return []
 
+@st.cache_resource(max_entries=2)
+def load_catalog(filename: str, version: str) -> CatalogIndex:
+    """Build the shared catalog index once per catalog version."""
+    return CatalogIndex(load_products(filename), version)
+
+@st.cache_resource(max_entries=2)
+def load_query_parser(version: str, categories: Tuple[str, ...]) -> QueryParser:
+    """Compile the query grammar once per catalog version."""
+    return QueryParser(list(categories))
+
+@st.cache_resource(max_entries=2)
+def load_mention_automaton(version: str, _catalog: CatalogIndex) -> MentionAutomaton:
+    """Build the product-name matcher once per catalog version."""
+    return MentionAutomaton(zip(_catalog.names, _catalog.ids))
+
+@st.cache_resource(max_entries=2)
+def load_cart_suggestions(version: str, modified: float) -> Dict[str, Dict[str, str]]:
+    """Load batch-precomputed cart suggestions; reloaded whenever the file changes."""
+    return precompute.load_suggestions(precompute.SUGGESTIONS_FILE, version)
+
+def precomputed_cart_suggestion(cart: CartType, catalog: CatalogIndex) -> Optional[str]:
+    """Return the precomputed suggestion for this exact cart, if the batch job made one.
+
+    Template entries are skipped while the model is in use, so they never
+    stand in for a live model answer.
+    """
+    try:
+        modified = os.path.getmtime(precompute.SUGGESTIONS_FILE)
+    except OSError:
+        return None
+    suggestion = load_cart_suggestions(catalog.version, modified).get(precompute.cart_signature(cart))
+    if not suggestion or (suggestion.get("source") != "llm" and llm_enabled()):
+        return None
+    return suggestion["text"]
+
+@st.cache_resource
+def get_event_logger() -> EventLogger:
+    """Process-wide behavior event log, flushed in the background."""
+    return EventLogger()
+
+def track(kind: str, product_id: int, other_id: Optional[int] = None, category: Optional[str] = None) -> None:
+    """Record a behavior event in the session tracker and the analytics log."""
+    if st.session_state.behavior.record(kind, product_id, other_id, category):
+        get_event_logger().log(kind, st.session_state.session_id, product_id, other_id)
+
+@st.cache_resource
+def get_memory_monitor() -> SessionMemoryMonitor:
+    """Process-wide per-session memory accounting."""
+    return SessionMemoryMonitor()
+
+@st.cache_resource
+def get_order_store() -> OrderStore:
+    """Process-wide durable order store."""
+    return OrderStore()
+
+@st.cache_resource
+def get_order_id_generator() -> OrderIdGenerator:
+    """Order id source for this process; claims a worker id on first use."""
+    return OrderIdGenerator()
+
+@st.cache_resource
+def get_post_order_queue() -> PostOrderQueue:
+    """Process-wide worker pool for the work that follows a committed order."""
+    return post_order.default_queue(get_event_logger(), use_llm=not NO_LLM)
+
+@st.cache_resource
+def get_inventory() -> Inventory:
+    """Shared stock counts and bag reservations."""
+    return Inventory()
+
+@st.cache_resource(max_entries=2)
+def seed_inventory(version: str, _catalog: CatalogIndex) -> None:
+    """Create stock rows for new products; a ``stock`` CSV column overrides the default."""
+    get_inventory().seed((pid, int(_catalog.get(pid).get('stock') or inventory.DEFAULT_STOCK))
+                         for pid in _catalog.ids)
+
+@st.cache_resource
+def get_fragment_cache() -> FragmentCache:
+    """Pre-rendered card HTML shared by every session."""
+    return FragmentCache()
+
+@st.cache_resource
+def get_query_cache() -> QueryCache:
+    """Ranked Shop search results shared by every session."""
+    return QueryCache()
+
+@st.cache_resource(max_entries=2)
+def load_facets(version: str, _catalog: CatalogIndex) -> FacetIndex:
+    """Category, price and rating bitmaps for the Shop filters, built once per catalog version."""
+    return FacetIndex(_catalog)
+
+def product_fragment(kind: str, product: ProductType, version: str, render: Callable[[], str], *extra: Any) -> str:
+    """Cached HTML for one product under catalog ``version``."""
+    return get_fragment_cache().get(kind, product['product_id'], version, render, *extra)
+
+# --- Session Persistence ---
+# Session-state keys kept in the external store; everything else is per-process.
+# The ?sid= in a URL is enough to load these, so nothing here may reveal an
+# order's name, address or payment; the confirmation stays with the browser tab
+# that placed the order
+PERSISTED_KEYS = ("cart", "behavior", "orders_hidden_through")
+
+session_store.register_type("cart", Cart)
+session_store.register_type("behavior", BehaviorTracker)
+
+@st.cache_resource
+def get_session_backend() -> SessionBackend:
+    """Shared session store, chosen by QOOZEE_SESSION_STORE (see session_store.py)."""
+    return session_store.backend_from_url(os.environ.get("QOOZEE_SESSION_STORE", session_store.DEFAULT_URL))
+
+def init_session_id() -> str:
+    """Resume the session named by ?sid= in the URL, or start one and put it there."""
+    sid = st.query_params.get("sid", "")
+    if not session_store.SESSION_ID_RE.match(sid):
+        sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+    return sid
+
+def persist_session_state() -> None:
+    """Write back persisted keys that changed during this run."""
+    sync = st.session_state.get("session_sync")
+    if sync is not None:
+        sync.flush(st.session_state, PERSISTED_KEYS)
+
 # --- Cart Operations ---
-def get_cart_products(cart_ids: CartType, products: List[ProductType]) -> Tuple[List[ProductType], float]:
-    """Get products in cart and calculate total price."""
-    # Create a lookup dictionary for faster access
-    product_lookup = {int(product['product_id']): product for product in products}
-    
-    cart_products = []
-    total = 0.0
+def get_cart_products(cart: CartType, catalog: CatalogIndex) -> Tuple[List[Tuple[ProductType, int]], float]:
+    """Get (product, quantity) lines in cart order and the running cart total."""
+    cart_lines = []
+    for pid, quantity in cart.items():
+        product = catalog.get(pid)
+        if product is not None:
+            cart_lines.append((product, quantity))
     
-    for pid in cart_ids:
-        if pid in product_lookup:
-            product = product_lookup[pid]
-            cart_products.append(product)
-            total += float(product['price'])
-    
-    return cart_products, total
+    return cart_lines, cart.subtotal
+
+def drop_missing_products(cart: CartType, catalog: CatalogIndex) -> None:
+    """Remove bag lines whose product is no longer in the catalog.
 
-def show_cart(cart_ids: CartType, products: List[ProductType]) -> None:
+    The bag is restored from the session store across catalog reloads, and the
+    bag view, its total and checkout all need a product for every line.
+    """
+    for pid in [pid for pid in cart if catalog.get(pid) is None]:
+        cart.remove(pid)
+        get_inventory().release(st.session_state.session_id, pid)
+        st.toast(f"Product {pid} is no longer available and was removed from your bag", icon="⚠️")
+
+def show_cart(cart: CartType, catalog: CatalogIndex) -> None:
     """Display cart items and total."""
-    cart_products, total = get_cart_products(cart_ids, products)
+    cart_lines, total = get_cart_products(cart, catalog)
     
     st.markdown("<h2>🛒 Your Shopping Bag</h2>", unsafe_allow_html=True)
     
-    if not cart_products:
+    if not cart_lines:
         st.markdown("""
         <div style="text-align: center; padding: 30px 0; background-color: #222222; border-radius: 16px;">
             <img src="https://cdn-icons-png.flaticon.com/512/2038/2038854.png" width="100">
@@ -293,126 +254,157 @@ def show_cart(cart_ids: CartType, products: List[ProductType]) -> None:
         return
     
     # Display number of items
-    st.markdown(f"<p style='color: #888;'>{len(cart_products)} items in your bag</p>", unsafe_allow_html=True)
+    st.markdown(f"<p style='color: #888;'>{cart.units} items in your bag</p>", unsafe_allow_html=True)
     
-    # Cart items
-    for item in cart_products:
-        st.markdown(f"""
-        <div class="cart-item">
-            <div style="display: flex; justify-content: space-between; align-items: center;">
-                <div>
-                    <h4>{item['product_name']}</h4>
-                    <div style="display: flex; gap: 10px; margin-top: 5px;">
-                        <span class="price-tag">₹{item['price']}</span>
-                        <span class="star-rating">⭐ {item['rating']}</span>
-                        <span class="category-badge">{item['category']}</span>
-                    </div>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    # Cart items, priced as they were when added (the price the total and the order use)
+    for item, quantity in cart_lines:
+        product_id = int(item['product_id'])
+        price = cart.unit_price(product_id)
+        st.markdown(product_fragment("cart_item", item, catalog.version,
+                                     lambda: html.cart_item(item, quantity, price), quantity, price),
+                    unsafe_allow_html=True)
         
-        # Remove button
-        if st.button("✖️ Remove", key=f"remove_{item['product_id']}", type="secondary"):
-            st.session_state.cart.remove(int(item['product_id']))
-            st.session_state.behavior["removed_products"].append(item['product_name'])
-            st.toast(f"Removed: {item['product_name']}", icon="🗑️")
-            st.rerun()
+        # Quantity and remove buttons
+        col1, col2, col3 = st.columns([1, 1, 4])
+        with col1:
+            st.button("➖", key=f"decrease_{product_id}", disabled=quantity <= 1,
+                      on_click=decrease_quantity, args=(product_id,))
+        with col2:
+            st.button("➕", key=f"increase_{product_id}", on_click=increase_quantity, args=(item,))
+        with col3:
+            st.button("✖️ Remove", key=f"remove_{product_id}", type="secondary",
+                      on_click=remove_from_cart, args=(item,))
     
     # Total price
-    st.markdown(f"""
-    <div class="total-price">
-        <div style="display: flex; justify-content: space-between; align-items: center;">
-            <span>Bag Total:</span>
-            <span>₹{total:.2f}</span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(html.total_price(total), unsafe_allow_html=True)
     
     # Checkout buttons
     col1, col2 = st.columns([1, 1])
     with col1:
-        st.button("🛍️ Continue Shopping", key="continue_shopping")
+        if st.button("🛍️ Continue Shopping", key="continue_shopping", on_click=open_section, args=(SHOP_TAB,)):
+            st.rerun(scope="app")  # The tabs live outside this fragment
     with col2:
-        st.button("💳 Checkout Now", key="proceed_checkout", type="primary")
+        if st.button("💳 Checkout Now", key="proceed_checkout", type="primary",
+                     on_click=open_section, args=(CHECKOUT_TAB,)):
+            st.rerun(scope="app")
 
-# --- Product Display ---
-def display_product_card(product: ProductType) -> None:
-    """Display a product card with add to cart button."""
+def add_to_cart(product: ProductType) -> None:
+    """Add a product to the cart (usable as a button callback)."""
     product_id = int(product['product_id'])
-    
-    # Display the product card
-    st.markdown(f"""
-    <div class="product-card">
-        <h4>✨ {product['product_name']}</h4>
-        <div style="display: flex; justify-content: space-between; align-items: center; margin: 10px 0;">
-            <span class="price-tag">₹{product['price']}</span>
-            <span class="star-rating">⭐ {product['rating']}</span>
-        </div>
-        <span class="category-badge">{product['category']}</span>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Add action buttons
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        st.button("👀 Quick View", key=f"view_{product_id}")
-    
-    with col2:
-        # Check if already in cart
-        in_cart = product_id in st.session_state.cart
-        button_text = "🛒 Added" if in_cart else "🛒 Add"
-        button_type = "secondary" if in_cart else "primary"
-        
-        if st.button(button_text, key=f"add_{product_id}", disabled=in_cart, type=button_type):
-            st.session_state.cart.append(product_id)
-            st.session_state.behavior["added_products"].append(product['product_name'])
-            st.toast(f"Added to cart: {product['product_name']}", icon="✅")
-            st.rerun()
+    if product_id in st.session_state.cart:
+        return
+    if not get_inventory().reserve(st.session_state.session_id, product_id, 1):
+        st.toast(f"Out of stock: {product['product_name']}", icon="⚠️")
+        return
+    st.session_state.cart.add(product_id, product['price'])
+    track(behavior.ADD, product_id)
+    st.toast(f"Added to cart: {product['product_name']}", icon="✅")
 
-# --- Product Search and Filtering ---
-def search_products(products: List[ProductType], category: Optional[str] = None, 
-                    max_price: Optional[float] = None, search_term: Optional[str] = None) -> List[ProductType]:
-    """Search and filter products based on criteria."""
-    filtered_products = []
-    
+def increase_quantity(product: ProductType) -> None:
+    """Add one more unit if stock allows (button callback)."""
+    product_id = int(product['product_id'])
+    quantity = st.session_state.cart.quantity(product_id)
+    held = get_inventory().reserve(st.session_state.session_id, product_id, quantity + 1)
+    if held <= quantity:
+        st.toast(f"Only {held} left: {product['product_name']}", icon="⚠️")
+        return
+    st.session_state.cart.add(product_id, product['price'])
+    track(behavior.ADD, product_id)
+
+def decrease_quantity(product_id: int) -> None:
+    """Take one unit out of the bag (button callback)."""
+    quantity = st.session_state.cart.quantity(product_id) - 1
+    if quantity < 1:
+        return
+    st.session_state.cart.set_quantity(product_id, quantity)
+    get_inventory().reserve(st.session_state.session_id, product_id, quantity)
+    track(behavior.REMOVE, product_id)
+
+def remove_from_cart(product: ProductType) -> None:
+    """Remove a whole line from the bag (button callback)."""
+    product_id = int(product['product_id'])
+    if not st.session_state.cart.remove(product_id):
+        return
+    get_inventory().release(st.session_state.session_id, product_id)
+    track(behavior.REMOVE, product_id)
+    st.toast(f"Removed: {product['product_name']}", icon="🗑️")
+
+def default_cart(catalog: CatalogIndex) -> Cart:
+    """The bag a new session starts with: the default items that are in stock.
+
+    Nothing is reserved for them, so page loads that never shop (bots, health
+    checks, refreshes) cannot hold stock; a unit is reserved when the quantity
+    is changed and taken at checkout, which re-checks stock.
+    """
+    available = get_inventory().availability(DEFAULT_CART, st.session_state.session_id)
+    return Cart((pid, catalog.get(pid)['price'], 1) for pid in DEFAULT_CART
+                if catalog.get(pid) and available[pid])
+
+# --- Product Display ---
+# Product cards per page in the Shop tab
+SHOP_PAGE_SIZE = 20
+
+# Shop filter pills, one per facet
+FACET_LABELS = {facets.CATEGORY: "Category", facets.PRICE: "Price", facets.RATING: "Rating"}
+
+def facet_pills(facet: str, index: FacetIndex, counts: Dict[str, int]) -> None:
+    """Multi-select pills for one facet, labelled with live match counts; empty values are hidden."""
+    key = "facet_" + facet
+    picked = st.session_state.get(key) or []
+    options = [value for value in index.values[facet] if counts[value] or value in picked]
+    st.markdown(f"<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>{FACET_LABELS[facet]}</p>",
+                unsafe_allow_html=True)
+    st.pills(FACET_LABELS[facet], options, selection_mode="multi", key=key, label_visibility="collapsed",
+             format_func=lambda value: f"{value} ({counts[value]:,})", persist_state="page")
+
+def render_product_grid(products: List[ProductType], catalog: CatalogIndex, key: str) -> None:
+    """Render a page of cards as one HTML block plus a single add-to-bag action keyed by product id."""
+    cart = st.session_state.cart
+    # Stock left after other sessions' reservations, for the whole page in one query
+    available = get_inventory().availability((int(p['product_id']) for p in products), st.session_state.session_id)
+    cells = []
     for product in products:
-        # Apply category filter if provided
-        if category and category.lower() != "all" and product['category'].lower() != category.lower():
-            continue
-            
-        # Apply price filter if provided
-        if max_price and float(product['price']) > max_price:
-            continue
-            
-        # Apply search term filter if provided
-        if search_term and search_term.lower() not in product['product_name'].lower():
-            continue
-            
-        filtered_products.append(product)
-        
-    return filtered_products
+        product_id = int(product['product_id'])
+        fragment = product_fragment("product_card", product, catalog.version, lambda: html.product_card(product))
+        if product_id in cart:
+            badge = '<span class="in-bag-badge">🛒 In bag</span>'
+        elif not available[product_id]:
+            badge = '<span class="in-bag-badge sold-out">Out of stock</span>'
+        else:
+            badge = ""
+        cells.append(f'<div class="grid-cell">{badge}{fragment}</div>')
+    st.markdown(f'<div class="product-grid">{"".join(cells)}</div>', unsafe_allow_html=True)
+    
+    # One widget for the whole page instead of two buttons per card
+    addable = [int(p['product_id']) for p in products
+               if int(p['product_id']) not in cart and available[int(p['product_id'])]]
+    if addable:
+        st.pills("🛒 Add to bag", addable, key=key, format_func=lambda pid: catalog.get(pid)['product_name'],
+                 on_change=handle_grid_action, args=(key, catalog))
+
+def handle_grid_action(key: str, catalog: CatalogIndex) -> None:
+    """Add the product picked in a grid's action widget, then reset the widget (callback)."""
+    product_id = st.session_state.get(key)
+    if product_id is not None:
+        add_to_cart(catalog.get(product_id))
+        st.session_state[key] = None
 
 # --- Product Comparison --- 
-def find_product_by_name(name: str, products: List[ProductType]) -> Optional[ProductType]:
-    """Find a product by its name (partial match)."""
-    for product in products:
-        if name.lower() in product['product_name'].lower():
-            return product
-    return None
+def find_product_by_name(name: str, catalog: CatalogIndex) -> Optional[ProductType]:
+    """Find a product by its name (exact, all words, then partial match)."""
+    return catalog.find_by_name(name)
 
-def compare_products(name1: str, name2: str, products: List[ProductType]) -> None:
+def compare_products(name1: str, name2: str, catalog: CatalogIndex) -> None:
     """Compare two products and give recommendation."""
-    product1 = find_product_by_name(name1, products)
-    product2 = find_product_by_name(name2, products)
+    product1 = find_product_by_name(name1, catalog)
+    product2 = find_product_by_name(name2, catalog)
 
     if not product1 or not product2:
         st.error("❌ One or both products not found.")
         return
 
     # Track comparison in behavior
-    st.session_state.behavior["compared_products"].append([product1['product_name'], product2['product_name']])
+    track(behavior.COMPARE, int(product1['product_id']), int(product2['product_id']))
 
     # Show both products in styled cards
     st.markdown("<h3>✨ Product Comparison</h3>", unsafe_allow_html=True)
@@ -420,40 +412,20 @@ def compare_products(name1: str, name2: str, products: List[ProductType]) -> Non
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown(f"""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; height: 100%; box-shadow: 0 4px 10px rgba(0,0,0,0.05); border: 2px solid #FFD1D9;">
-            <h4 style="color: #FF9EAA;">{product1['product_name']}</h4>
-            <div style="display: flex; justify-content: space-between; margin: 10px 0;">
-                <span class="price-tag">₹{product1['price']}</span>
-                <span class="star-rating">⭐ {product1['rating']}</span>
-            </div>
-            <p style="color: #aaa; font-size: 14px; margin-bottom: 15px;">Category: {product1['category']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(product_fragment("compare_card", product1, catalog.version,
+                                     lambda: html.compare_card(product1, "left"), "left"),
+                    unsafe_allow_html=True)
         
-        if st.button("🛒 Add to Bag", key=f"compare_add_{product1['product_id']}"):
-            st.session_state.cart.append(int(product1['product_id']))
-            st.session_state.behavior["added_products"].append(product1['product_name'])
-            st.toast(f"Added to cart: {product1['product_name']}", icon="✅")
-            st.rerun()
+        # A callback, so the click still lands after this block is gone on the next run
+        st.button("🛒 Add to Bag", key=f"compare_add_{product1['product_id']}", on_click=add_to_cart, args=(product1,))
 
     with col2:
-        st.markdown(f"""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; height: 100%; box-shadow: 0 4px 10px rgba(0,0,0,0.05); border: 2px solid #D1F0FF;">
-            <h4 style="color: #2EC4B6;">{product2['product_name']}</h4>
-            <div style="display: flex; justify-content: space-between; margin: 10px 0;">
-                <span class="price-tag">₹{product2['price']}</span>
-                <span class="star-rating">⭐ {product2['rating']}</span>
-            </div>
-            <p style="color: #aaa; font-size: 14px; margin-bottom: 15px;">Category: {product2['category']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(product_fragment("compare_card", product2, catalog.version,
+                                     lambda: html.compare_card(product2, "right"), "right"),
+                    unsafe_allow_html=True)
         
-        if st.button("🛒 Add to Bag", key=f"compare_add_{product2['product_id']}"):
-            st.session_state.cart.append(int(product2['product_id']))
-            st.session_state.behavior["added_products"].append(product2['product_name'])
-            st.toast(f"Added to cart: {product2['product_name']}", icon="✅")
-            st.rerun()
+        # A callback, so the click still lands after this block is gone on the next run
+        st.button("🛒 Add to Bag", key=f"compare_add_{product2['product_id']}", on_click=add_to_cart, args=(product2,))
 
     # Calculate recommendation
     rating1 = float(product1['rating'])
@@ -499,111 +471,65 @@ def compare_products(name1: str, name2: str, products: List[ProductType]) -> Non
     """, unsafe_allow_html=True)
 
 # --- Natural Language Processing ---
-def parse_and_compare_input(user_input: str, products: List[ProductType]) -> None:
-    """Parse natural language comparison query and compare products."""
-    # Clean up user input
-    user_input = user_input.lower()
-    for word in ["should i buy", "compare", "?", "the"]:
-        user_input = user_input.replace(word, "")
-    user_input = user_input.strip()
-
-    # Extract product names
-    if " or " in user_input:
-        parts = user_input.split(" or ")
-    elif " vs " in user_input:
-        parts = user_input.split(" vs ")
-    else:
-        st.warning("❌ Please mention exactly two products using 'or' or 'vs'")
+def parse_and_compare_input(user_input: str, catalog: CatalogIndex) -> None:
+    """Parse a natural language shopping query and answer it from the catalog."""
+    parser = load_query_parser(catalog.version, tuple(catalog.category_names))
+    query = parser.parse(user_input)
+
+    if query.intent == INTENT_COMPARE:
+        compare_products(query.names[0], query.names[1], catalog)
         return
 
-    if len(parts) != 2:
-        st.warning("❌ Couldn't extract two product names.")
+    if query.intent != INTENT_FIND:
+        st.warning("❌ Please mention exactly two products using 'or' or 'vs'")
         return
 
-    name1 = parts[0].strip()
-    name2 = parts[1].strip()
+    matches = run_query(query, catalog, limit=6)
+    if not matches:
+        st.warning("❌ Couldn't find products matching your question. Try 'Should I buy X or Y?'")
+        return
 
-    compare_products(name1, name2, products)
+    st.markdown(f"<h3>✨ Top {len(matches)} matches</h3>", unsafe_allow_html=True)
+    render_product_grid(matches, catalog, key="nl_grid_action")
 
 # --- LLM Integration ---
-def ask_ai(prompt: str) -> str:
-    """Send a prompt to AI and get a response."""
-    try:
-        # Try to call Ollama LLaMA
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llama3.2",
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=10  # Shorter timeout to fail faster
-        )
-        response.raise_for_status()
-        return response.json().get("response", "No response from AI.")
-    except:
-        # Fall back to pre-defined responses
-        responses = [
-            "Based on your requirements, I'd recommend the Wireless Earbuds. They have excellent sound quality, long battery life, and are perfect for your needs.",
-            "The Minimalist Wall Clock would be a perfect addition to your home decor. Its clean design and reliable mechanism make it a great value purchase.",
-            "I'd suggest the Memory Foam Pillow. It provides excellent support for a good night's sleep and has consistently high ratings from customers.",
-            "For your budget, the Smart LED Bulb offers the best value. It's energy-efficient, long-lasting, and can be controlled from your smartphone.",
-            "The Stainless Steel Water Bottle is my recommendation. It's durable, keeps drinks at the right temperature for hours, and is environmentally friendly."
-        ]
-        return random.choice(responses)
-
-# --- Prompt Generators ---
-def get_persona_product_prompt(products: List[ProductType], persona: Optional[str] = None, 
-                              category: Optional[str] = None, max_price: Optional[float] = None) -> str:
-    """Generate a personalized prompt for product recommendations."""
-    filtered_products = search_products(products, category, max_price)[:10]  # Limit to 10 products
-    
-    if not filtered_products:
-        return "There are no products matching your criteria."
-    
-    prompt = "You are a smart shopping assistant helping someone find a product.\n"
-    if persona:
-        prompt += f"The customer is: {persona}\n"
-    
-    prompt += "Here is a list of available products:\n\n"
-    for product in filtered_products:
-        prompt += f"- {product['product_name']} | ₹{product['price']} | ⭐ {product['rating']} | {product['category']}\n"
-    
-    prompt += "\nBased on the customer's needs and preferences, recommend the best product. "
-    prompt += "Explain why it's a good fit for them specifically."
-    
-    return prompt
+def llm_enabled() -> bool:
+    """Whether AI requests should go to the model rather than local templates."""
+    return not (NO_LLM or st.session_state.get("no_llm", False))
 
-def get_cart_based_suggestion_prompt(cart: CartType, products: List[ProductType]) -> str:
-    """Generate a prompt for recommendations based on cart contents."""
-    # Get cart products
-    cart_products, _ = get_cart_products(cart, products)
-    
-    if not cart_products:
-        return "The cart is empty. Please add some products first."
+def ask_ai(prompt: str, fallback: Optional[Callable[[], str]] = None) -> str:
+    """Send a prompt to AI and get a response, answering locally if it is unavailable."""
+    if fallback is not None and not llm_enabled():
+        return fallback()
     
-    # Get products not in cart
-    cart_ids = set(cart)
-    other_products = [p for p in products if int(p['product_id']) not in cart_ids][:5]  # Limit to 5 products
-    
-    # Format cart list
-    cart_desc = "\n".join(f"- {p['product_name']} | ₹{p['price']} | {p['category']}" 
-                        for p in cart_products)
-
-    # Format remaining product list
-    other_desc = "\n".join(f"- {p['product_name']} | ₹{p['price']} | {p['category']}" 
-                         for p in other_products)
-
-    prompt = f"""
-Based on these items in the customer's cart:
-{cart_desc}
+    try:
+        return llm.generate(prompt)
+    except (requests.RequestException, ValueError):
+        # Fall back to an answer built from the catalog itself
+        if fallback is not None:
+            return fallback()
+        return "Sorry, I couldn't reach the AI right now. Please try again in a moment."
 
-Suggest 1-2 of these products that would complement the cart items well:
-{other_desc}
+def link_products(response: str, catalog: CatalogIndex) -> Tuple[str, List[Mention]]:
+    """Highlight catalog products named in an AI response; return HTML and mentions."""
+    mentions = load_mention_automaton(catalog.version, catalog).find(response)
+    return highlight(response, mentions), mentions
 
-Explain why each suggestion pairs well with the existing cart items.
-"""
-    return prompt
+def show_mention_actions(mentions: List[Mention], catalog: CatalogIndex, key_prefix: str) -> None:
+    """Render add-to-bag buttons for products mentioned in an AI response."""
+    product_ids = mentioned_products(mentions, limit=3)
+    if not product_ids:
+        return
+    
+    cols = st.columns(len(product_ids))
+    for col, product_id in zip(cols, product_ids):
+        product = catalog.get(product_id)
+        in_cart = product_id in st.session_state.cart
+        with col:
+            # Callback so the click lands even though this block is gone on the next rerun
+            st.button(f"🛒 {'Added' if in_cart else 'Add'}: {product['product_name']}",
+                      key=f"{key_prefix}mention_add_{product_id}", disabled=in_cart,
+                      on_click=add_to_cart, args=(product,))
 
 # --- UI Components ---
 def sidebar_menu() -> None:
@@ -630,26 +556,18 @@ def sidebar_menu() -> None:
     """, unsafe_allow_html=True)
     
     # Cart summary with cute icon
-    cart_size = len(st.session_state.cart)
-    st.sidebar.markdown(f"""
-    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
-        <span style="font-weight: bold; font-size: 16px;">🛍️ Your Bag</span>
-        <span style="background-color: #FF9EAA; color: white; padding: 2px 8px; border-radius: 20px; font-size: 12px;">{cart_size}</span>
-    </div>
-    """, unsafe_allow_html=True)
+    cart_size = st.session_state.cart.units
+    st.sidebar.markdown(html.stat_counter("🛍️ Your Bag", cart_size, "pink"), unsafe_allow_html=True)
     
     # Order history with cute styling
-    orders_count = len(st.session_state.orders)
-    st.sidebar.markdown(f"""
-    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
-        <span style="font-weight: bold; font-size: 16px;">🎁 Your Orders</span>
-        <span style="background-color: #9D65C9; color: white; padding: 2px 8px; border-radius: 20px; font-size: 12px;">{orders_count}</span>
-    </div>
-    """, unsafe_allow_html=True)
+    order_store = get_order_store()
+    hidden_through = st.session_state.orders_hidden_through
+    orders_count = order_store.count(session_id=st.session_state.session_id, after=hidden_through)
+    st.sidebar.markdown(html.stat_counter("🎁 Your Orders", orders_count, "purple"), unsafe_allow_html=True)
     
     # Show latest order if exists
     if orders_count > 0:
-        latest_order = st.session_state.orders[-1]
+        latest_order = order_store.latest(session_id=st.session_state.session_id, after=hidden_through)
         st.sidebar.markdown(f"""
         <div style="background-color: #333333; border-radius: 12px; padding: 12px; margin-bottom: 20px; border-left: 3px solid #9D65C9;">
             <p style="font-size: 12px; color: #888; margin: 0;">Latest Order</p>
@@ -668,339 +586,356 @@ def sidebar_menu() -> None:
     col1, col2 = st.sidebar.columns(2)
     
     with col1:
-        viewed_count = len(st.session_state.behavior['viewed_products'])
-        st.markdown(f"""
-        <div style="text-align: center;">
-            <p style="color: #888; font-size: 12px; margin: 0;">Viewed</p>
-            <p style="font-weight: bold; font-size: 20px; color: #2EC4B6; margin: 0;">{viewed_count}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        viewed_count = st.session_state.behavior.distinct(behavior.VIEW)
+        st.markdown(html.activity_stat("Viewed", viewed_count, "teal"), unsafe_allow_html=True)
     
     with col2:
-        added_count = len(st.session_state.behavior['added_products'])
-        st.markdown(f"""
-        <div style="text-align: center;">
-            <p style="color: #888; font-size: 12px; margin: 0;">Added</p>
-            <p style="font-weight: bold; font-size: 20px; color: #FF9EAA; margin: 0;">{added_count}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        added_count = st.session_state.behavior.total(behavior.ADD)
+        st.markdown(html.activity_stat("Added", added_count, "pink"), unsafe_allow_html=True)
         
     col1, col2 = st.sidebar.columns(2)
     
     with col1:
-        removed_count = len(st.session_state.behavior['removed_products'])
-        st.markdown(f"""
-        <div style="text-align: center;">
-            <p style="color: #888; font-size: 12px; margin: 0;">Removed</p>
-            <p style="font-weight: bold; font-size: 20px; color: #9D65C9; margin: 0;">{removed_count}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        removed_count = st.session_state.behavior.total(behavior.REMOVE)
+        st.markdown(html.activity_stat("Removed", removed_count, "purple"), unsafe_allow_html=True)
     
     with col2:
-        # Show purchased count if exists
-        purchased_count = 0
-        if "purchased_products" in st.session_state.behavior:
-            purchased_count = len(st.session_state.behavior["purchased_products"])
+        # Show purchased count
+        purchased_count = st.session_state.behavior.total(behavior.PURCHASE)
         
-        st.markdown(f"""
-        <div style="text-align: center;">
-            <p style="color: #888; font-size: 12px; margin: 0;">Purchased</p>
-            <p style="font-weight: bold; font-size: 20px; color: #FFD166; margin: 0;">{purchased_count}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(html.activity_stat("Purchased", purchased_count, "yellow"), unsafe_allow_html=True)
+    
+    # Serve AI answers from catalog templates only. Rendered on every run, unlike
+    # the Developer Tools expander, so the setting is never dropped
+    st.sidebar.checkbox("No-LLM mode (local answers only)", key="no_llm", disabled=NO_LLM,
+                        help="Also enabled for every session by QOOZEE_NO_LLM=1")
 
-def main() -> None:
-    """Main application function."""
-    st.set_page_config(
-        page_title="Qoozee AI Shopping Assistant",
-        page_icon="🛍️",
-        layout="wide"
-    )
+# --- Page Sections ---
+SHOP_TAB = "🔍 Browse Products"
+CHECKOUT_TAB = "💳 Checkout"
+
+def open_section(label: str) -> None:
+    """Switch the main tabs to ``label`` (callback)."""
+    st.session_state.active_section = label
+
+def section_fragment(section: Callable[[CatalogIndex], None]) -> Callable[[CatalogIndex], None]:
+    """``st.fragment`` that saves persisted keys when the section ends.
+
+    A fragment rerun skips the end of the script, where a full run saves them,
+    so a cart change made inside a section would otherwise not be stored.
+    """
+    @functools.wraps(section)
+    def run(catalog: CatalogIndex) -> None:
+        try:
+            section(catalog)
+        finally:
+            persist_session_state()
+    return st.fragment(run)
+
+# Bag, Shop, Compare and AI sections are fragments: their own widgets rerun only the section
+@section_fragment
+def cart_section(catalog: CatalogIndex) -> None:
+    """Bag tab."""
+    show_cart(st.session_state.cart, catalog)
+
+@section_fragment
+def shop_section(catalog: CatalogIndex) -> None:
+    """Browse tab: filters, sort and the paged product grid."""
+    st.markdown("<h2>🔍 Discover Products</h2>", unsafe_allow_html=True)
     
-    # Load CSS
-    load_css()
+    # Bag badge; refreshed with the grid when a product is added from it
+    st.markdown(f"<span class='category-badge'>🛒 {st.session_state.cart.units} items in your bag</span>",
+                unsafe_allow_html=True)
     
-    # Display the styled header
+    # Create styled filter section
     st.markdown("""
-    <div style="text-align: center; padding: 10px 0 20px 0;">
-        <h1 style="color: #FF9EAA; font-size: 2.2rem;">✨ Qoozee AI Shopping Assistant ✨</h1>
-        <p style="color: #888; margin-top: -10px;">your AI shopping bestie</p>
+    <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin-bottom: 20px;">
+        <h4 style="margin-top: 0;">✨ Filter Options</h4>
     </div>
     """, unsafe_allow_html=True)
     
-    # Initialize session state
-    if "cart" not in st.session_state:
-        st.session_state.cart = [101, 105]  # Default cart items
+    st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>Search</p>", unsafe_allow_html=True)
+    # Results follow the search box 300ms after typing stops. The tab is only
+    # rendered while open, so search, filters and sort keep their values when hidden
+    st.text_input("", placeholder="Type what you're looking for...", key="shop_search",
+                  label_visibility="collapsed", live="300ms", persist_state="page")
+    term = (st.session_state.get("shop_search") or "").lower()
     
-    if "behavior" not in st.session_state:
-        st.session_state.behavior = {
-            "viewed_categories": set(),
-            "viewed_products": [],
-            "added_products": [],
-            "removed_products": [],
-            "compared_products": []
-        }
-    
-    # Initialize orders list
-    if "orders" not in st.session_state:
-        st.session_state.orders = []
-        
-    # Initialize checkout state
-    if "checkout_complete" not in st.session_state:
-        st.session_state.checkout_complete = False
+    # Facet filters are bitmap intersections; the term's matches become one more bitmap.
+    # A term with no bitmap yet is looked up in the session's IncrementalSearch, which
+    # only filters the rows of an earlier term it extends ("blend" -> "blender").
+    index = load_facets(catalog.version, catalog)
+    if "shop_results" not in st.session_state:
+        st.session_state.shop_results = IncrementalSearch()
+    search = st.session_state.shop_results
+    base = index.cached_mask(term, lambda: search.search(catalog, term)) if term else None
+    typed = term
+    if term and not base:
+        # Nothing contains the term as typed: retry with misspelt words corrected ("blnder" -> "blender")
+        corrected = catalog.correct(term)
+        if corrected and corrected != term.strip():
+            term = corrected
+            base = index.cached_mask(term, lambda: search.search(catalog, term))
+    selection = facets.selection_from({facet: st.session_state.get("facet_" + facet) for facet in facets.FACETS})
+    counts = index.counts(selection, base)
     
-    # Load products
-    products = load_products("products.csv")
-    if not products:
-        st.error("Unable to load products. Using sample data.")
+    facet_pills(facets.CATEGORY, index, counts[facets.CATEGORY])
+    col1, col2 = st.columns(2)
+    with col1:
+        facet_pills(facets.PRICE, index, counts[facets.PRICE])
+    with col2:
+        facet_pills(facets.RATING, index, counts[facets.RATING])
     
-    # Setup sidebar
-    sidebar_menu()
+    # Sort order for the product grid
+    sort = st.selectbox("Sort by", list(SORT_OPTIONS), format_func=SORT_OPTIONS.get, key="shop_sort",
+                        persist_state="page")
     
-    # Main content as tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🛒 Your Cart", 
-        "🔍 Browse Products", 
-        "🅾️ Compare Products", 
-        "💡 AI Recommendations",
-        "💳 Checkout"
-    ])
-    
-    # Tab 1: Cart
-    with tab1:
-        show_cart(st.session_state.cart, products)
-    
-    # Tab 2: Browse Products
-    with tab2:
-        st.markdown("<h2>🔍 Discover Products</h2>", unsafe_allow_html=True)
-        
-        # Create styled filter section
-        st.markdown("""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin-bottom: 20px;">
-            <h4 style="margin-top: 0;">✨ Filter Options</h4>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Create filter options
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>Category</p>", unsafe_allow_html=True)
-            
-            # Get unique categories from products
-            categories = ["All"] + sorted(list(set(p["category"] for p in products if "category" in p)))
-            category = st.selectbox("", categories, label_visibility="collapsed")
-            
-        with col2:
-            st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>Price Range</p>", unsafe_allow_html=True)
-            
-            # Find max price in products for slider
-            max_price_in_data = 5000
-            if products:
-                try:
-                    max_price_in_data = max(float(p["price"]) for p in products if "price" in p)
-                except:
-                    pass
-                
-            max_price = st.slider("", 0, int(max_price_in_data), int(max_price_in_data), label_visibility="collapsed")
-            
-        with col3:
-            st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>Search</p>", unsafe_allow_html=True)
-            search_term = st.text_input("", placeholder="Type what you're looking for...", label_visibility="collapsed")
-        
-        # Search button
-        search_button = st.button("🔎 Find Products", key="search_button", type="primary")
-        
-        # Get default products to display
-        if not search_button:
-            default_filtered = search_products(products, None, max_price_in_data, None)
-            display_count = min(20, len(default_filtered))
-            
-            # Display initial products
-            if default_filtered:
-                st.markdown(f"""
-                <div style="background-color: #333333; border-radius: 30px; padding: 8px 16px; display: inline-block; margin: 20px 0;">
-                    <span style="color: white; font-weight: bold;">Showing {display_count} of {len(default_filtered)} products</span>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Create a grid layout for products
-                cols = st.columns(2)
-                for i, product in enumerate(default_filtered[:display_count]):
-                    # Track product views
-                    st.session_state.behavior["viewed_categories"].add(product.get('category', 'Unknown'))
-                    st.session_state.behavior["viewed_products"].append(product.get('product_name', 'Unknown'))
-                    
-                    # Display product in alternating columns
-                    with cols[i % 2]:
-                        display_product_card(product)
-        
-        # Search logic
-        if search_button:
-            cat = None if category == "All" else category
-            filtered = search_products(products, cat, max_price, search_term)
-            
-            if filtered:
-                # Results count
-                st.markdown(f"""
-                <div style="background-color: #333333; border-radius: 30px; padding: 8px 16px; display: inline-block; margin: 20px 0;">
-                    <span style="color: white; font-weight: bold;">Found {len(filtered)} products</span>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Create a grid layout for products
-                cols = st.columns(2)
-                for i, product in enumerate(filtered):
-                    # Track product views
-                    st.session_state.behavior["viewed_categories"].add(product.get('category', 'Unknown'))
-                    st.session_state.behavior["viewed_products"].append(product.get('product_name', 'Unknown'))
-                    
-                    # Display product in alternating columns
-                    with cols[i % 2]:
-                        display_product_card(product)
-            else:
-                # No results found
-                st.markdown("""
-                <div style="text-align: center; padding: 40px 0; background-color: #222222; border-radius: 16px;">
-                    <img src="https://cdn-icons-png.flaticon.com/512/6134/6134065.png" width="100">
-                    <h3>No results found</h3>
-                    <p>Try different search terms or filters 💫</p>
-                </div>
-                """, unsafe_allow_html=True)
+    if term != typed:
+        st.caption(f"No products match “{typed.strip()}”, showing results for “{term}”.")
     
-    # Tab 3: Compare Products
-    with tab3:
-        st.markdown("<h2>✨ Compare Products</h2>", unsafe_allow_html=True)
-        
-        # Styled direct comparison section
-        st.markdown("""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin-bottom: 20px;">
-            <h4 style="margin-top: 0; color: #FF9EAA;">👯‍♀️ Direct Comparison</h4>
-            <p style="color: #888; font-size: 14px;">Compare any two products and get a smart recommendation!</p>
+    query = (term, selection) if term or selection else None
+    
+    # Cursor paging: only the visible page is rendered
+    page_key = (query, sort)
+    if st.session_state.get("shop_page_key") != page_key:
+        st.session_state.shop_page_key = page_key
+        st.session_state.shop_cursors = [None]
+    cursors = st.session_state.shop_cursors
+    
+    if query:
+        # Ranked once per process for each (term, facets, sort)
+        ranked = get_query_cache().get(catalog, query, sort,
+                                       lambda: catalog.rank(index.rows_of(index.filter(selection, base)), sort))
+        match_count = len(ranked)
+        page_rows, next_cursor = catalog.page_ranked(ranked, sort, cursors[-1], SHOP_PAGE_SIZE)
+    else:
+        # No search: page through the whole catalog without materialising it
+        match_count = len(catalog)
+        page_rows, next_cursor = catalog.page(None, sort, cursors[-1], SHOP_PAGE_SIZE)
+    
+    if page_rows:
+        first = (len(cursors) - 1) * SHOP_PAGE_SIZE + 1
+        label = "Found" if query else "Showing"
+        st.markdown(f"""
+        <div style="background-color: #333333; border-radius: 30px; padding: 8px 16px; display: inline-block; margin: 20px 0;">
+            <span style="color: white; font-weight: bold;">{label} {first}–{first + len(page_rows) - 1} of {match_count} products</span>
         </div>
         """, unsafe_allow_html=True)
         
+        # Whole page in one block with one action widget
+        page_products = catalog.rows_to_products(page_rows)
+        for product in page_products:
+            # Track product views
+            track(behavior.VIEW, int(product['product_id']), category=product.get('category', 'Unknown'))
+        render_product_grid(page_products, catalog, key="shop_grid_action")
+        
+        # Page navigation
         col1, col2 = st.columns(2)
         with col1:
-            st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>First Product</p>", unsafe_allow_html=True)
-            name1 = st.text_input("", placeholder="e.g., Pink Hoodie", key="compare_name1", label_visibility="collapsed")
+            st.button("⬅️ Previous", key="shop_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
         with col2:
-            st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>Second Product</p>", unsafe_allow_html=True)
-            name2 = st.text_input("", placeholder="e.g., Blender", key="compare_name2", label_visibility="collapsed")
-        
-        # VS icon in the middle
+            st.button("Next ➡️", key="shop_next", disabled=next_cursor is None,
+                      on_click=cursors.append, args=(next_cursor,))
+    else:
+        # No results found
         st.markdown("""
-        <div style="text-align: center; margin: 10px 0;">
-            <div style="display: inline-block; background-color: #FF9EAA; color: white; width: 40px; height: 40px; border-radius: 50%; line-height: 40px;">
-                VS
-            </div>
+        <div style="text-align: center; padding: 40px 0; background-color: #222222; border-radius: 16px;">
+            <img src="https://cdn-icons-png.flaticon.com/512/6134/6134065.png" width="100">
+            <h3>No results found</h3>
+            <p>Try different search terms or filters 💫</p>
         </div>
         """, unsafe_allow_html=True)
-        
-        # Compare button with better styling
-        if st.button("✨ Compare Now", key="compare_button", type="primary"):
-            if name1 and name2:
-                compare_products(name1, name2, products)
-            else:
-                # Cute error message
-                st.markdown("""
-                <div style="background-color: #333333; border-radius: 16px; padding: 20px; text-align: center; margin: 20px 0;">
-                    <img src="https://cdn-icons-png.flaticon.com/512/7486/7486754.png" width="60">
-                    <h4 style="color: #FF9EAA;">Oops! Please enter both product names</h4>
-                    <p style="color: #aaa;">We need to know what you want to compare! 💕</p>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        # Natural language comparison section
-        st.markdown("""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 30px 0 20px 0;">
-            <h4 style="margin-top: 0; color: #2EC4B6;">💬 Ask in Your Own Words</h4>
-            <p style="color: #888; font-size: 14px;">Just type naturally like you'd ask a friend!</p>
+
+@section_fragment
+def compare_section(catalog: CatalogIndex) -> None:
+    """Compare tab: direct and natural-language comparisons."""
+    st.markdown("<h2>✨ Compare Products</h2>", unsafe_allow_html=True)
+    
+    # Styled direct comparison section
+    st.markdown("""
+    <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin-bottom: 20px;">
+        <h4 style="margin-top: 0; color: #FF9EAA;">👯‍♀️ Direct Comparison</h4>
+        <p style="color: #888; font-size: 14px;">Compare any two products and get a smart recommendation!</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>First Product</p>", unsafe_allow_html=True)
+        name1 = st.text_input("", placeholder="e.g., Pink Hoodie", key="compare_name1", label_visibility="collapsed")
+    with col2:
+        st.markdown("<p style='color: #888; font-size: 14px; margin-bottom: 5px;'>Second Product</p>", unsafe_allow_html=True)
+        name2 = st.text_input("", placeholder="e.g., Blender", key="compare_name2", label_visibility="collapsed")
+    
+    # VS icon in the middle
+    st.markdown("""
+    <div style="text-align: center; margin: 10px 0;">
+        <div style="display: inline-block; background-color: #FF9EAA; color: white; width: 40px; height: 40px; border-radius: 50%; line-height: 40px;">
+            VS
         </div>
-        """, unsafe_allow_html=True)
-        
-        # Chat-like input
-        user_query = st.text_input("", 
-                                 placeholder="Example: Should I buy the hoodie or the blender?", 
-                                 key="nl_query",
-                                 label_visibility="collapsed")
-        
-        if st.button("🧠 Ask AI", key="ask_ai_button", type="primary"):
-            if user_query:
-                parse_and_compare_input(user_query, products)
-            else:
-                # Cute prompt
-                st.markdown("""
-                <div style="text-align: center; padding: 20px 0;">
-                    <img src="https://cdn-icons-png.flaticon.com/512/4712/4712109.png" width="80">
-                    <p style="color: #888;">Ask me anything like "Should I buy X or Y?" 💭</p>
-                </div>
-                """, unsafe_allow_html=True)
+    </div>
+    """, unsafe_allow_html=True)
     
-    # Tab 4: AI Recommendations
-    with tab4:
-        st.markdown("<h2>🧠 Smart Recommendations</h2>", unsafe_allow_html=True)
-        
-        # Create styled recommendation section
-        st.markdown("""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; position: relative; overflow: hidden; margin-bottom: 30px;">
-            <div style="position: absolute; right: 20px; top: 20px; background-color: #FF9EAA; width: 60px; height: 60px; border-radius: 50%; display: flex; justify-content: center; align-items: center;">
-                <span style="font-size: 30px;">🎁</span>
+    # Compare button with better styling
+    if st.button("✨ Compare Now", key="compare_button", type="primary"):
+        if name1 and name2:
+            compare_products(name1, name2, catalog)
+        else:
+            # Cute error message
+            st.markdown("""
+            <div style="background-color: #333333; border-radius: 16px; padding: 20px; text-align: center; margin: 20px 0;">
+                <img src="https://cdn-icons-png.flaticon.com/512/7486/7486754.png" width="60">
+                <h4 style="color: #FF9EAA;">Oops! Please enter both product names</h4>
+                <p style="color: #aaa;">We need to know what you want to compare! 💕</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # Natural language comparison section
+    st.markdown("""
+    <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 30px 0 20px 0;">
+        <h4 style="margin-top: 0; color: #2EC4B6;">💬 Ask in Your Own Words</h4>
+        <p style="color: #888; font-size: 14px;">Just type naturally like you'd ask a friend!</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Chat-like input
+    user_query = st.text_input("", 
+                             placeholder="Example: Should I buy the hoodie or the blender?", 
+                             key="nl_query",
+                             label_visibility="collapsed")
+    
+    if st.button("🧠 Ask AI", key="ask_ai_button", type="primary"):
+        if user_query:
+            parse_and_compare_input(user_query, catalog)
+        else:
+            # Cute prompt
+            st.markdown("""
+            <div style="text-align: center; padding: 20px 0;">
+                <img src="https://cdn-icons-png.flaticon.com/512/4712/4712109.png" width="80">
+                <p style="color: #888;">Ask me anything like "Should I buy X or Y?" 💭</p>
             </div>
-            <h4 style="color: #FF9EAA; margin-top: 0; width: 80%;">Personalized Product Picks</h4>
-            <p style="color: #888; font-size: 14px; width: 80%;">Get recommendations based on who you're shopping for!</p>
+            """, unsafe_allow_html=True)
+
+@section_fragment
+def recommendations_section(catalog: CatalogIndex) -> None:
+    """AI tab: persona picks and cart-based suggestions."""
+    st.markdown("<h2>🧠 Smart Recommendations</h2>", unsafe_allow_html=True)
+    
+    # Create styled recommendation section
+    st.markdown("""
+    <div style="background-color: #222222; border-radius: 16px; padding: 20px; position: relative; overflow: hidden; margin-bottom: 30px;">
+        <div style="position: absolute; right: 20px; top: 20px; background-color: #FF9EAA; width: 60px; height: 60px; border-radius: 50%; display: flex; justify-content: center; align-items: center;">
+            <span style="font-size: 30px;">🎁</span>
         </div>
-        """, unsafe_allow_html=True)
-        
-        # Product recommendations with improved styling
-        st.markdown("<h4 style='margin-top: 0;'>👩‍👧‍👦 Who are you shopping for?</h4>", unsafe_allow_html=True)
-        
-        # Text input for persona
-        persona = st.text_input("", 
-                               placeholder="Tell us about who you're shopping for...", 
-                               key="persona_input", 
-                               label_visibility="collapsed")
-        
-        # Category selection with styling
-        st.markdown("<h4>🛍️ Choose a category</h4>", unsafe_allow_html=True)
+        <h4 style="color: #FF9EAA; margin-top: 0; width: 80%;">Personalized Product Picks</h4>
+        <p style="color: #888; font-size: 14px; width: 80%;">Get recommendations based on who you're shopping for!</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Product recommendations with improved styling
+    st.markdown("<h4 style='margin-top: 0;'>👩‍👧‍👦 Who are you shopping for?</h4>", unsafe_allow_html=True)
+    
+    # Text input for persona
+    persona = st.text_input("", 
+                           placeholder="Tell us about who you're shopping for...", 
+                           key="persona_input", 
+                           label_visibility="collapsed")
+    
+    # Category selection with styling
+    st.markdown("<h4>🛍️ Choose a category</h4>", unsafe_allow_html=True)
+    
+    # Category selection
+    categories = ["All"] + catalog.category_names
+    rec_category = st.selectbox("Choose category:", categories, key="rec_category")
         
-        # Category selection
-        categories = ["All"] + sorted(list(set(p["category"] for p in products if "category" in p)))
-        rec_category = st.selectbox("Choose category:", categories, key="rec_category")
-            
-        # Show selected category with nice styling
-        st.markdown(f"""
-        <div style="background-color: #333333; border-radius: 30px; padding: 5px 15px; display: inline-block; margin: 10px 0;">
-            <span style="color: white; font-weight: bold;">Category: {rec_category}</span>
+    # Show selected category with nice styling
+    st.markdown(f"""
+    <div style="background-color: #333333; border-radius: 30px; padding: 5px 15px; display: inline-block; margin: 10px 0;">
+        <span style="color: white; font-weight: bold;">Category: {rec_category}</span>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Budget slider with stylish display
+    st.markdown("<h4>💰 What's your budget?</h4>", unsafe_allow_html=True)
+    
+    # Budget bound from the catalog index
+    max_price_in_data = catalog.max_price or 5000
+    rec_budget = st.slider("", 0, int(max_price_in_data), 1000, step=500, label_visibility="collapsed")
+    
+    # Fancy price display
+    st.markdown(f"""
+    <div style="text-align: center; margin: 10px 0;">
+        <div style="background: linear-gradient(90deg, #FF9EAA, #9D65C9); color: white; border-radius: 30px; padding: 8px 20px; display: inline-block;">
+            <span style="font-weight: bold;">Budget: ₹{rec_budget}</span>
         </div>
-        """, unsafe_allow_html=True)
-        
-        # Budget slider with stylish display
-        st.markdown("<h4>💰 What's your budget?</h4>", unsafe_allow_html=True)
-        
-        # Find max price for budget slider
-        max_price_in_data = 5000
-        if products:
-            try:
-                max_price_in_data = max(float(p["price"]) for p in products if "price" in p)
-            except:
-                pass
-                
-        rec_budget = st.slider("", 0, int(max_price_in_data), 1000, step=500, label_visibility="collapsed")
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Get recommendations button
+    if st.button("✨ Get Smart Picks", key="recommend_button", type="primary"):
+        with st.spinner(""):
+            # Display a stylish loading animation
+            st.markdown("""
+            <div style="text-align: center; padding: 10px 0;">
+                <div style="display: flex; justify-content: center; gap: 8px;">
+                    <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out;"></span>
+                    <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.2s;"></span>
+                    <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.4s;"></span>
+                </div>
+                <p style="color: #888; font-size: 14px;">Thinking...</p>
+            </div>
+            <style>
+            @keyframes bounce {
+                0%, 100% { transform: translateY(0); }
+                50% { transform: translateY(-10px); }
+            }
+            </style>
+            """, unsafe_allow_html=True)
+            
+            cat = None if rec_category == "All" else rec_category
+            prompt = get_persona_product_prompt(catalog, persona, cat, rec_budget)
+            ai_response = ask_ai(prompt, fallback=lambda: local_answers.recommend_for_persona(
+                catalog, persona, cat, rec_budget))
+            linked, mentions = link_products(ai_response, catalog)
+            
+            # Display recommendation in a fancy card
+            st.markdown(f"""
+            <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 20px 0; box-shadow: 0 4px 15px rgba(0,0,0,0.1); border: 2px solid #FFD1D9;">
+                <div style="display: flex; align-items: center; margin-bottom: 15px;">
+                    <div style="background-color: #FFD1D9; width: 40px; height: 40px; border-radius: 50%; display: flex; justify-content: center; align-items: center; margin-right: 15px;">
+                        <span style="font-size: 20px;">🧠</span>
+                    </div>
+                    <h4 style="margin: 0; color: #FF9EAA;">AI Recommendation</h4>
+                </div>
+                <p style="white-space: pre-line; color: white;">{linked}</p>
+            </div>
+            """, unsafe_allow_html=True)
+            show_mention_actions(mentions, catalog, key_prefix="persona_")
+    
+    # Cart-based recommendations section
+    st.markdown("""
+    <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 30px 0 20px 0;">
+        <h4 style="margin-top: 0; color: #2EC4B6;">🛒 Based on Your Cart</h4>
+        <p style="color: #888; font-size: 14px;">Let AI suggest products that go well with your current bag items!</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Show current cart items in a horizontal scroll
+    cart_lines, _ = get_cart_products(st.session_state.cart, catalog)
+    if cart_lines:
+        st.markdown("<p style='color: #888; font-size: 14px;'>Currently in your bag:</p>", unsafe_allow_html=True)
         
-        # Fancy price display
-        st.markdown(f"""
-        <div style="text-align: center; margin: 10px 0;">
-            <div style="background: linear-gradient(90deg, #FF9EAA, #9D65C9); color: white; border-radius: 30px; padding: 8px 20px; display: inline-block;">
-                <span style="font-weight: bold;">Budget: ₹{rec_budget}</span>
+        for item, _ in cart_lines[:5]:  # Show up to 5 items
+            st.markdown(f"""
+            <div style="background-color: #333333; border-radius: 10px; padding: 10px; margin-bottom: 10px;">
+                <p style="margin: 0; font-weight: bold; font-size: 14px; color: white;">{item['product_name']}</p>
+                <p style="margin: 5px 0; color: #FF9EAA; font-weight: bold;">₹{item['price']}</p>
             </div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
         
-        # Get recommendations button
-        if st.button("✨ Get Smart Picks", key="recommend_button", type="primary"):
+        if st.button("✨ Suggest Matching Items", key="cart_suggestions_button", type="primary"):
             with st.spinner(""):
-                # Display a stylish loading animation
+                # Show a cute loading animation
                 st.markdown("""
                 <div style="text-align: center; padding: 10px 0;">
                     <div style="display: flex; justify-content: center; gap: 8px;">
@@ -1008,456 +943,550 @@ def main() -> None:
                         <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.2s;"></span>
                         <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.4s;"></span>
                     </div>
-                    <p style="color: #888; font-size: 14px;">Thinking...</p>
+                    <p style="color: #888; font-size: 14px;">Finding perfect matches...</p>
                 </div>
-                <style>
-                @keyframes bounce {
-                    0%, 100% { transform: translateY(0); }
-                    50% { transform: translateY(-10px); }
-                }
-                </style>
                 """, unsafe_allow_html=True)
                 
-                cat = None if rec_category == "All" else rec_category
-                prompt = get_persona_product_prompt(products, persona, cat, rec_budget)
-                ai_response = ask_ai(prompt)
+                # Serve the batch-precomputed answer for common carts first
+                response = precomputed_cart_suggestion(st.session_state.cart, catalog)
+                if response is None:
+                    prompt = get_cart_based_suggestion_prompt(st.session_state.cart, catalog)
+                    response = ask_ai(prompt, fallback=lambda: local_answers.suggest_for_cart(
+                        catalog, st.session_state.cart))
+                linked, mentions = link_products(response, catalog)
                 
                 # Display recommendation in a fancy card
                 st.markdown(f"""
-                <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 20px 0; box-shadow: 0 4px 15px rgba(0,0,0,0.1); border: 2px solid #FFD1D9;">
+                <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 20px 0; box-shadow: 0 4px 15px rgba(0,0,0,0.1); border: 2px solid #2EC4B6;">
                     <div style="display: flex; align-items: center; margin-bottom: 15px;">
-                        <div style="background-color: #FFD1D9; width: 40px; height: 40px; border-radius: 50%; display: flex; justify-content: center; align-items: center; margin-right: 15px;">
-                            <span style="font-size: 20px;">🧠</span>
+                        <div style="background-color: #D1F0FF; width: 40px; height: 40px; border-radius: 50%; display: flex; justify-content: center; align-items: center; margin-right: 15px;">
+                            <span style="font-size: 20px;">💫</span>
                         </div>
-                        <h4 style="margin: 0; color: #FF9EAA;">AI Recommendation</h4>
+                        <h4 style="margin: 0; color: #2EC4B6;">Perfect Pairings</h4>
                     </div>
-                    <p style="white-space: pre-line; color: white;">{ai_response}</p>
+                    <p style="white-space: pre-line; color: white;">{linked}</p>
                 </div>
                 """, unsafe_allow_html=True)
-        
-        # Cart-based recommendations section
+                show_mention_actions(mentions, catalog, key_prefix="pairing_")
+    else:
+        # Cute empty state
         st.markdown("""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 30px 0 20px 0;">
-            <h4 style="margin-top: 0; color: #2EC4B6;">🛒 Based on Your Cart</h4>
-            <p style="color: #888; font-size: 14px;">Let AI suggest products that go well with your current bag items!</p>
+        <div style="text-align: center; padding: 30px 0; background-color: #222222; border-radius: 16px;">
+            <img src="https://cdn-icons-png.flaticon.com/512/2038/2038854.png" width="100">
+            <h3>Your bag is empty!</h3>
+            <p style="color: #aaa;">Add some cute stuff first ✨</p>
         </div>
         """, unsafe_allow_html=True)
-        
-        # Show current cart items in a horizontal scroll
-        cart_products, _ = get_cart_products(st.session_state.cart, products)
-        if cart_products:
-            st.markdown("<p style='color: #888; font-size: 14px;'>Currently in your bag:</p>", unsafe_allow_html=True)
-            
-            for item in cart_products[:5]:  # Show up to 5 items
+    
+    # Ask anything section
+    st.markdown("""
+    <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 30px 0 20px 0;">
+        <h4 style="margin-top: 0;">🔮 Ask Me Anything</h4>
+        <p style="color: #888; font-size: 14px;">Get shopping advice or product recommendations!</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Chat-like UI for AI assistant
+    llama_query = st.text_input("", 
+                              placeholder="Ask me anything about shopping or products...", 
+                              key="llama_query",
+                              label_visibility="collapsed")
+    
+    if st.button("💬 Ask Now", key="ask_llama_button", type="primary"):
+        if llama_query:
+            with st.spinner(""):
+                # Show thinking animation
+                st.markdown("""
+                <div style="text-align: center; padding: 10px 0;">
+                    <div style="display: flex; justify-content: center; gap: 8px;">
+                        <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out;"></span>
+                        <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.2s;"></span>
+                        <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.4s;"></span>
+                    </div>
+                    <p style="color: #888; font-size: 14px;">Thinking...</p>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                parser = load_query_parser(catalog.version, tuple(catalog.category_names))
+                ai_response = ask_ai(llama_query, fallback=lambda: local_answers.answer_question(
+                    catalog, parser, llama_query))
+                linked, mentions = link_products(ai_response, catalog)
+                
+                # Display in chat format
+                st.markdown(f"""
+                <div class="user-query">
+                    <p style="margin: 0;">{llama_query}</p>
+                </div>
+                """, unsafe_allow_html=True)
+                
                 st.markdown(f"""
-                <div style="background-color: #333333; border-radius: 10px; padding: 10px; margin-bottom: 10px;">
-                    <p style="margin: 0; font-weight: bold; font-size: 14px; color: white;">{item['product_name']}</p>
-                    <p style="margin: 5px 0; color: #FF9EAA; font-weight: bold;">₹{item['price']}</p>
+                <div class="ai-response">
+                    <p style="margin: 0; white-space: pre-line;">{linked}</p>
                 </div>
                 """, unsafe_allow_html=True)
+                show_mention_actions(mentions, catalog, key_prefix="chat_")
+        else:
+            # Prompt suggestions
+            st.markdown("""
+            <div style="text-align: center; padding: 20px 0;">
+                <img src="https://cdn-icons-png.flaticon.com/512/4712/4712109.png" width="60">
+                <p style="color: #888;">Try asking me these:</p>
+            </div>
+            <div style="display: flex; flex-wrap: wrap; gap: 10px; justify-content: center; margin-bottom: 20px;">
+                <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">What's trending now?</div>
+                <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">Best gift under ₹500?</div>
+                <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">How to style a hoodie?</div>
+                <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">Is pink in fashion?</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+
+def checkout_section(catalog: CatalogIndex) -> None:
+    """Checkout tab: the order form, or the confirmation of the last order."""
+    st.markdown("<h2>💳 Checkout</h2>", unsafe_allow_html=True)
+    
+    # Check if checkout is complete and show confirmation
+    if st.session_state.checkout_complete:
+        # The order this tab placed, not the session's latest: other tabs share the sid
+        latest_order = get_order_store().get(st.session_state.get("placed_order_id"))
+        if latest_order:
             
-            if st.button("✨ Suggest Matching Items", key="cart_suggestions_button", type="primary"):
-                with st.spinner(""):
-                    # Show a cute loading animation
-                    st.markdown("""
-                    <div style="text-align: center; padding: 10px 0;">
-                        <div style="display: flex; justify-content: center; gap: 8px;">
-                            <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out;"></span>
-                            <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.2s;"></span>
-                            <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.4s;"></span>
-                        </div>
-                        <p style="color: #888; font-size: 14px;">Finding perfect matches...</p>
+            # Order confirmation
+            st.markdown(f"""
+            <div style="background-color: #1E2E1E; border-radius: 16px; padding: 30px; text-align: center; margin: 20px 0; border: 2px solid #2A4A2A;">
+                <img src="https://cdn-icons-png.flaticon.com/512/5610/5610944.png" width="100">
+                <h2 style="color: #4CAF50; margin: 20px 0;">Order Placed Successfully! 🎉</h2>
+                <p style="color: #aaa;">Thank you for shopping with Qoozee!</p>
+                <p><strong>Order ID:</strong> QZ-{latest_order['order_id']}</p>
+                <p><strong>Date:</strong> {latest_order['date']}</p>
+                <p><strong>Total Amount:</strong> ₹{latest_order['total']:.2f}</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Order details
+            st.markdown(f"""
+            <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 20px 0;">
+                <h3 style="text-align: center;">Order Details</h3>
+                
+                <div style="display: flex; justify-content: space-between; margin: 20px 0;">
+                    <div>
+                        <p style="color: #888; margin: 0; font-size: 14px;">Shipping Details</p>
+                        <p style="font-weight: bold; margin: 5px 0;">{latest_order['name']}</p>
+                        <p style="color: #aaa;">{latest_order['address']}</p>
+                        <p style="color: #aaa;">Payment: {latest_order['payment_method']}</p>
                     </div>
-                    """, unsafe_allow_html=True)
-                    
-                    prompt = get_cart_based_suggestion_prompt(st.session_state.cart, products)
-                    response = ask_ai(prompt)
-                    
-                    # Display recommendation in a fancy card
-                    st.markdown(f"""
-                    <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 20px 0; box-shadow: 0 4px 15px rgba(0,0,0,0.1); border: 2px solid #2EC4B6;">
-                        <div style="display: flex; align-items: center; margin-bottom: 15px;">
-                            <div style="background-color: #D1F0FF; width: 40px; height: 40px; border-radius: 50%; display: flex; justify-content: center; align-items: center; margin-right: 15px;">
-                                <span style="font-size: 20px;">💫</span>
-                            </div>
-                            <h4 style="margin: 0; color: #2EC4B6;">Perfect Pairings</h4>
-                        </div>
-                        <p style="white-space: pre-line; color: white;">{response}</p>
+                    <div>
+                        <p style="color: #888; margin: 0; font-size: 14px;">Delivery Date</p>
+                        <p style="font-weight: bold; margin: 5px 0; color: #4CAF50;">{latest_order['delivery_date']}</p>
                     </div>
-                    """, unsafe_allow_html=True)
+                </div>
+                
+                <h4>Ordered Items</h4>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Display ordered items
+            for line in latest_order['items']:
+                # Keyed by the whole line snapshot; only the category comes from the catalog
+                product = catalog.get(line.product_id)
+                category = product['category'] if product else ''
+                st.markdown(get_fragment_cache().get("order_item", line, catalog.version,
+                                                     lambda: html.order_item(line, category)),
+                            unsafe_allow_html=True)
+            
+            # Order total
+            st.markdown(f"""
+            <div style="margin: 20px 0; text-align: right;">
+                <p style="color: #888; font-size: 14px; margin: 5px 0;">Subtotal</p>
+                <p style="font-weight: bold; font-size: 24px; color: #FF9EAA; margin: 5px 0;">₹{latest_order['total']:.2f}</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Continue shopping button
+            if st.button("🛍️ Continue Shopping", type="primary"):
+                st.session_state.checkout_complete = False
+                st.session_state.pop("placed_order_id", None)
+                st.rerun()
+            
         else:
-            # Cute empty state
+            st.error("Order information not found!")
+            
+    else:
+        # Regular checkout flow
+        cart_lines, total = get_cart_products(st.session_state.cart, catalog)
+        
+        if not cart_lines:
+            # Empty cart message
             st.markdown("""
             <div style="text-align: center; padding: 30px 0; background-color: #222222; border-radius: 16px;">
                 <img src="https://cdn-icons-png.flaticon.com/512/2038/2038854.png" width="100">
-                <h3>Your bag is empty!</h3>
-                <p style="color: #aaa;">Add some cute stuff first ✨</p>
+                <h3>Your bag is empty</h3>
+                <p style="color: #aaa;">Add some cute stuff before checkout! 💕</p>
             </div>
             """, unsafe_allow_html=True)
-        
-        # Ask anything section
-        st.markdown("""
-        <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 30px 0 20px 0;">
-            <h4 style="margin-top: 0;">🔮 Ask Me Anything</h4>
-            <p style="color: #888; font-size: 14px;">Get shopping advice or product recommendations!</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Chat-like UI for AI assistant
-        llama_query = st.text_input("", 
-                                  placeholder="Ask me anything about shopping or products...", 
-                                  key="llama_query",
-                                  label_visibility="collapsed")
-        
-        if st.button("💬 Ask Now", key="ask_llama_button", type="primary"):
-            if llama_query:
-                with st.spinner(""):
-                    # Show thinking animation
+            
+            # Browse products button
+            st.button("🛍️ Browse Products", type="primary", on_click=open_section, args=(SHOP_TAB,))
+        else:
+            # Create two columns for checkout layout
+            col1, col2 = st.columns([3, 2])
+            
+            with col1:
+                # Customer Information Form with styled sections
+                st.markdown("<h3>📝 Shipping Information</h3>", unsafe_allow_html=True)
+                
+                # Create a form with better styling
+                with st.form(key="checkout_form"):
+                    # Personal details section
                     st.markdown("""
-                    <div style="text-align: center; padding: 10px 0;">
-                        <div style="display: flex; justify-content: center; gap: 8px;">
-                            <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out;"></span>
-                            <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.2s;"></span>
-                            <span style="width: 10px; height: 10px; background-color: #FF9EAA; border-radius: 50%; animation: bounce 1.5s infinite ease-in-out; animation-delay: 0.4s;"></span>
-                        </div>
-                        <p style="color: #888; font-size: 14px;">Thinking...</p>
+                    <div style="background-color: #222222; border-radius: 12px; padding: 15px; margin-bottom: 20px;">
+                        <h4 style="margin-top: 0; color: #FF9EAA;">👤 Personal Details</h4>
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    ai_response = ask_ai(llama_query)
+                    name = st.text_input("Full Name*", placeholder="Enter your full name")
                     
-                    # Display in chat format
-                    st.markdown(f"""
-                    <div class="user-query">
-                        <p style="margin: 0;">{llama_query}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        email = st.text_input("Email Address*", placeholder="Enter your email")
+                    with col2:
+                        phone = st.text_input("Phone Number*", placeholder="Enter your phone number")
                     
-                    st.markdown(f"""
-                    <div class="ai-response">
-                        <p style="margin: 0; white-space: pre-line;">{ai_response}</p>
+                    # Address section
+                    st.markdown("""
+                    <div style="background-color: #222222; border-radius: 12px; padding: 15px; margin: 20px 0;">
+                        <h4 style="margin-top: 0; color: #2EC4B6;">📍 Delivery Address</h4>
                     </div>
                     """, unsafe_allow_html=True)
-            else:
-                # Prompt suggestions
-                st.markdown("""
-                <div style="text-align: center; padding: 20px 0;">
-                    <img src="https://cdn-icons-png.flaticon.com/512/4712/4712109.png" width="60">
-                    <p style="color: #888;">Try asking me these:</p>
-                </div>
-                <div style="display: flex; flex-wrap: wrap; gap: 10px; justify-content: center; margin-bottom: 20px;">
-                    <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">What's trending now?</div>
-                    <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">Best gift under ₹500?</div>
-                    <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">How to style a hoodie?</div>
-                    <div style="background-color: #333333; padding: 8px 15px; border-radius: 20px; font-size: 14px; color: white;">Is pink in fashion?</div>
-                </div>
-                """, unsafe_allow_html=True)
-    
-    # Tab 5: Checkout
-    with tab5:
-        st.markdown("<h2>💳 Checkout</h2>", unsafe_allow_html=True)
-        
-        # Check if checkout is complete and show confirmation
-        if st.session_state.checkout_complete:
-            # Get the latest order for display
-            if st.session_state.orders:
-                latest_order = st.session_state.orders[-1]
-                
-                # Order confirmation
-                st.markdown(f"""
-                <div style="background-color: #1E2E1E; border-radius: 16px; padding: 30px; text-align: center; margin: 20px 0; border: 2px solid #2A4A2A;">
-                    <img src="https://cdn-icons-png.flaticon.com/512/5610/5610944.png" width="100">
-                    <h2 style="color: #4CAF50; margin: 20px 0;">Order Placed Successfully! 🎉</h2>
-                    <p style="color: #aaa;">Thank you for shopping with Qoozee!</p>
-                    <p><strong>Order ID:</strong> QZ-{latest_order['order_id']}</p>
-                    <p><strong>Date:</strong> {latest_order['date']}</p>
-                    <p><strong>Total Amount:</strong> ₹{latest_order['total']:.2f}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Order details
-                st.markdown(f"""
-                <div style="background-color: #222222; border-radius: 16px; padding: 20px; margin: 20px 0;">
-                    <h3 style="text-align: center;">Order Details</h3>
                     
-                    <div style="display: flex; justify-content: space-between; margin: 20px 0;">
-                        <div>
-                            <p style="color: #888; margin: 0; font-size: 14px;">Shipping Details</p>
-                            <p style="font-weight: bold; margin: 5px 0;">{latest_order['name']}</p>
-                            <p style="color: #aaa;">{latest_order['address']}</p>
-                            <p style="color: #aaa;">Payment: {latest_order['payment_method']}</p>
-                        </div>
-                        <div>
-                            <p style="color: #888; margin: 0; font-size: 14px;">Delivery Date</p>
-                            <p style="font-weight: bold; margin: 5px 0; color: #4CAF50;">{latest_order['delivery_date']}</p>
-                        </div>
-                    </div>
+                    address = st.text_area("Delivery Address*", placeholder="Enter your complete delivery address")
                     
-                    <h4>Ordered Items</h4>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Display ordered items
-                for item in latest_order['items']:
-                    st.markdown(f"""
-                    <div style="background-color: #333333; border-radius: 12px; padding: 15px; margin: 10px 0; display: flex; justify-content: space-between; align-items: center;">
-                        <div>
-                            <p style="margin: 0; font-weight: bold; color: white;">{item['product_name']}</p>
-                            <p style="margin: 5px 0; color: #aaa; font-size: 14px;">{item['category']}</p>
-                        </div>
-                        <div>
-                            <p style="margin: 0; font-weight: bold; color: #FF9EAA;">₹{item['price']}</p>
-                        </div>
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        city = st.text_input("City*", placeholder="Enter your city")
+                    with col2:
+                        pincode = st.text_input("Pincode*", placeholder="Enter your pincode")
+                    
+                    # Payment method section
+                    st.markdown("""
+                    <div style="background-color: #222222; border-radius: 12px; padding: 15px; margin: 20px 0;">
+                        <h4 style="margin-top: 0; color: #FFD166;">💳 Payment Method</h4>
                     </div>
                     """, unsafe_allow_html=True)
-                
-                # Order total
-                st.markdown(f"""
-                <div style="margin: 20px 0; text-align: right;">
-                    <p style="color: #888; font-size: 14px; margin: 5px 0;">Subtotal</p>
-                    <p style="font-weight: bold; font-size: 24px; color: #FF9EAA; margin: 5px 0;">₹{latest_order['total']:.2f}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Continue shopping button
-                if st.button("🛍️ Continue Shopping", type="primary"):
-                    st.session_state.checkout_complete = False
-                    st.rerun()
-                
-            else:
-                st.error("Order information not found!")
-                
-        else:
-            # Regular checkout flow
-            cart_products, total = get_cart_products(st.session_state.cart, products)
+                    
+                    # Payment method options
+                    payment_method = st.selectbox(
+                        "Choose Payment Method*",
+                        ["Cash on Delivery", "Credit/Debit Card", "UPI", "Net Banking"]
+                    )
+                    
+                    # Terms and conditions
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    terms = st.checkbox("I agree to the Terms and Conditions")
+                    
+                    # Submit button
+                    submit_button = st.form_submit_button("Place Order")
+                    
+                    if submit_button:
+                        # Form validation
+                        if not (name and email and phone and address and city and pincode):
+                            st.error("Please fill in all required fields!")
+                        elif not terms:
+                            st.error("Please agree to the Terms and Conditions!")
+                        else:
+                            # Process order
+                            import random
+                            import datetime
+                            from datetime import timedelta
+                            
+                            # Unique across worker processes, increasing over time
+                            order_id = get_order_id_generator().next_id()
+                            
+                            # Get current date
+                            now = datetime.datetime.now()
+                            today = now.strftime("%Y-%m-%d %H:%M:%S")
+                            
+                            # Calculate estimated delivery (3-5 days from now)
+                            delivery_days = random.randint(3, 5)
+                            delivery_date = (now + timedelta(days=delivery_days)).strftime("%A, %d %B %Y")
+                            
+                            # Create order object
+                            order = {
+                                "order_id": order_id,
+                                "session_id": st.session_state.session_id,
+                                "date": today,
+                                "name": name,
+                                "email": email,
+                                "phone": phone,
+                                "address": f"{address}, {city} - {pincode}",
+                                "payment_method": payment_method,
+                                "items": st.session_state.cart.order_lines(
+                                    lambda pid: catalog.get(pid)["product_name"]),
+                                "total": total,
+                                "delivery_date": delivery_date
+                            }
+                            
+                            # Take the stock first; nothing is stored if any line is sold out
+                            stock_lines = list(st.session_state.cart.items())
+                            try:
+                                get_inventory().commit(st.session_state.session_id, stock_lines)
+                            except OutOfStock as e:
+                                st.error(f"Sorry, only {e.available} left of {catalog.get(e.product_id)['product_name']}. "
+                                         "Please update your bag.")
+                                st.stop()
+                            
+                            # Persist order (committed before we continue). place() waits for the
+                            # writer's answer, so the stock goes back only if the order was not stored
+                            try:
+                                get_order_store().place(order)
+                            except sqlite3.Error:
+                                get_inventory().cancel(stock_lines)
+                                raise
+                            
+                            # Clear cart and count the purchases in this session
+                            st.session_state.cart.clear()
+                            for line in order["items"]:
+                                st.session_state.behavior.purchase(line.product_id)
+                            
+                            # Analytics, confirmation and suggestion refresh run in the background
+                            get_post_order_queue().submit(order, catalog)
+                            
+                            # Set checkout complete flag
+                            st.session_state.placed_order_id = order_id
+                            st.session_state.checkout_complete = True
+                            
+                            # Refresh page to show confirmation
+                            st.rerun()
             
-            if not cart_products:
-                # Empty cart message
+            # Right column - Order summary
+            with col2:
                 st.markdown("""
-                <div style="text-align: center; padding: 30px 0; background-color: #222222; border-radius: 16px;">
-                    <img src="https://cdn-icons-png.flaticon.com/512/2038/2038854.png" width="100">
-                    <h3>Your bag is empty</h3>
-                    <p style="color: #aaa;">Add some cute stuff before checkout! 💕</p>
-                </div>
+                <div style="background-color: #222222; border-radius: 16px; padding: 20px; height: 100%;">
+                    <h3 style="margin-top: 0;">🧾 Order Summary</h3>
                 """, unsafe_allow_html=True)
                 
-                # Browse products button
-                if st.button("🛍️ Browse Products", type="primary"):
-                    # Switch to products tab
-                    st.rerun()
-            else:
-                # Create two columns for checkout layout
-                col1, col2 = st.columns([3, 2])
+                # Show cart items in summary
+                for item, quantity in cart_lines:
+                    price = st.session_state.cart.unit_price(int(item['product_id']))
+                    st.markdown(product_fragment("order_summary_item", item, catalog.version,
+                                                 lambda: html.order_summary_item(item, quantity, price), quantity, price),
+                                unsafe_allow_html=True)
                 
-                with col1:
-                    # Customer Information Form with styled sections
-                    st.markdown("<h3>📝 Shipping Information</h3>", unsafe_allow_html=True)
-                    
-                    # Create a form with better styling
-                    with st.form(key="checkout_form"):
-                        # Personal details section
-                        st.markdown("""
-                        <div style="background-color: #222222; border-radius: 12px; padding: 15px; margin-bottom: 20px;">
-                            <h4 style="margin-top: 0; color: #FF9EAA;">👤 Personal Details</h4>
+                # Calculate additional values for better UX
+                subtotal = total
+                shipping = 0 if total > 500 else 50
+                gst = round(subtotal * 0.18, 2)
+                final_total = subtotal + shipping + gst
+                
+                # Display price breakdown
+                st.markdown(f"""
+                    <div style="margin: 20px 0;">
+                        <div style="display: flex; justify-content: space-between; margin: 10px 0;">
+                            <p style="margin: 0; color: #888;">Subtotal</p>
+                            <p style="margin: 0; font-weight: bold; color: white;">₹{subtotal:.2f}</p>
                         </div>
-                        """, unsafe_allow_html=True)
-                        
-                        name = st.text_input("Full Name*", placeholder="Enter your full name")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            email = st.text_input("Email Address*", placeholder="Enter your email")
-                        with col2:
-                            phone = st.text_input("Phone Number*", placeholder="Enter your phone number")
-                        
-                        # Address section
-                        st.markdown("""
-                        <div style="background-color: #222222; border-radius: 12px; padding: 15px; margin: 20px 0;">
-                            <h4 style="margin-top: 0; color: #2EC4B6;">📍 Delivery Address</h4>
+                        <div style="display: flex; justify-content: space-between; margin: 10px 0;">
+                            <p style="margin: 0; color: #888;">Shipping</p>
+                            <p style="margin: 0; font-weight: bold; color: white;">{f"₹{shipping:.2f}" if shipping > 0 else "<span style='color: #4CAF50;'>FREE</span>"}</p>
                         </div>
-                        """, unsafe_allow_html=True)
-                        
-                        address = st.text_area("Delivery Address*", placeholder="Enter your complete delivery address")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            city = st.text_input("City*", placeholder="Enter your city")
-                        with col2:
-                            pincode = st.text_input("Pincode*", placeholder="Enter your pincode")
-                        
-                        # Payment method section
-                        st.markdown("""
-                        <div style="background-color: #222222; border-radius: 12px; padding: 15px; margin: 20px 0;">
-                            <h4 style="margin-top: 0; color: #FFD166;">💳 Payment Method</h4>
+                        <div style="display: flex; justify-content: space-between; margin: 10px 0;">
+                            <p style="margin: 0; color: #888;">GST (18%)</p>
+                            <p style="margin: 0; font-weight: bold; color: white;">₹{gst:.2f}</p>
                         </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Payment method options
-                        payment_method = st.selectbox(
-                            "Choose Payment Method*",
-                            ["Cash on Delivery", "Credit/Debit Card", "UPI", "Net Banking"]
-                        )
-                        
-                        # Terms and conditions
-                        st.markdown("<br>", unsafe_allow_html=True)
-                        terms = st.checkbox("I agree to the Terms and Conditions")
-                        
-                        # Submit button
-                        submit_button = st.form_submit_button("Place Order")
-                        
-                        if submit_button:
-                            # Form validation
-                            if not (name and email and phone and address and city and pincode):
-                                st.error("Please fill in all required fields!")
-                            elif not terms:
-                                st.error("Please agree to the Terms and Conditions!")
-                            else:
-                                # Process order
-                                import random
-                                import datetime
-                                from datetime import timedelta
-                                
-                                # Generate random order ID
-                                order_id = random.randint(100000, 999999)
-                                
-                                # Get current date
-                                now = datetime.datetime.now()
-                                today = now.strftime("%Y-%m-%d %H:%M:%S")
-                                
-                                # Calculate estimated delivery (3-5 days from now)
-                                delivery_days = random.randint(3, 5)
-                                delivery_date = (now + timedelta(days=delivery_days)).strftime("%A, %d %B %Y")
-                                
-                                # Create order object
-                                order = {
-                                    "order_id": order_id,
-                                    "date": today,
-                                    "name": name,
-                                    "email": email,
-                                    "phone": phone,
-                                    "address": f"{address}, {city} - {pincode}",
-                                    "payment_method": payment_method,
-                                    "items": cart_products,
-                                    "total": total,
-                                    "delivery_date": delivery_date
-                                }
-                                
-                                # Save order to session state
-                                st.session_state.orders.append(order)
-                                
-                                # Clear cart
-                                purchased_items = st.session_state.cart.copy()
-                                st.session_state.cart = []
-                                
-                                # Update behavior - track purchased items
-                                if "purchased_products" not in st.session_state.behavior:
-                                    st.session_state.behavior["purchased_products"] = []
-                                
-                                for pid in purchased_items:
-                                    for product in products:
-                                        if int(product['product_id']) == pid:
-                                            st.session_state.behavior["purchased_products"].append(product['product_name'])
-                                
-                                # Set checkout complete flag
-                                st.session_state.checkout_complete = True
-                                
-                                # Refresh page to show confirmation
-                                st.rerun()
-                
-                # Right column - Order summary
-                with col2:
-                    st.markdown("""
-                    <div style="background-color: #222222; border-radius: 16px; padding: 20px; height: 100%;">
-                        <h3 style="margin-top: 0;">🧾 Order Summary</h3>
-                    """, unsafe_allow_html=True)
+                    </div>
                     
-                    # Show cart items in summary
-                    for item in cart_products:
-                        st.markdown(f"""
-                        <div style="display: flex; justify-content: space-between; margin: 10px 0; padding-bottom: 10px; border-bottom: 1px dashed #444444;">
-                            <div style="max-width: 70%;">
-                                <p style="margin: 0; font-size: 14px; font-weight: bold; color: white;">{item['product_name']}</p>
-                                <p style="margin: 0; font-size: 12px; color: #888;">{item['category']}</p>
-                            </div>
-                            <p style="margin: 0; font-weight: bold; color: #FF9EAA;">₹{item['price']}</p>
+                    <div style="background: linear-gradient(90deg, #FF9EAA, #9D65C9); color: white; border-radius: 12px; padding: 15px; margin: 20px 0;">
+                        <div style="display: flex; justify-content: space-between; align-items: center;">
+                            <p style="margin: 0;">Total</p>
+                            <p style="margin: 0; font-weight: bold; font-size: 18px;">₹{final_total:.2f}</p>
                         </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # Calculate additional values for better UX
-                    subtotal = total
-                    shipping = 0 if total > 500 else 50
-                    gst = round(subtotal * 0.18, 2)
-                    final_total = subtotal + shipping + gst
+                    </div>
                     
-                    # Display price breakdown
-                    st.markdown(f"""
-                        <div style="margin: 20px 0;">
-                            <div style="display: flex; justify-content: space-between; margin: 10px 0;">
-                                <p style="margin: 0; color: #888;">Subtotal</p>
-                                <p style="margin: 0; font-weight: bold; color: white;">₹{subtotal:.2f}</p>
-                            </div>
-                            <div style="display: flex; justify-content: space-between; margin: 10px 0;">
-                                <p style="margin: 0; color: #888;">Shipping</p>
-                                <p style="margin: 0; font-weight: bold; color: white;">{f"₹{shipping:.2f}" if shipping > 0 else "<span style='color: #4CAF50;'>FREE</span>"}</p>
-                            </div>
-                            <div style="display: flex; justify-content: space-between; margin: 10px 0;">
-                                <p style="margin: 0; color: #888;">GST (18%)</p>
-                                <p style="margin: 0; font-weight: bold; color: white;">₹{gst:.2f}</p>
-                            </div>
-                        </div>
-                        
-                        <div style="background: linear-gradient(90deg, #FF9EAA, #9D65C9); color: white; border-radius: 12px; padding: 15px; margin: 20px 0;">
-                            <div style="display: flex; justify-content: space-between; align-items: center;">
-                                <p style="margin: 0;">Total</p>
-                                <p style="margin: 0; font-weight: bold; font-size: 18px;">₹{final_total:.2f}</p>
-                            </div>
-                        </div>
-                        
-                        <div style="margin: 20px 0;">
-                            <p style="text-align: center; color: #888; font-size: 12px;">Estimated delivery in 3-5 business days</p>
-                            <p style="text-align: center; color: #FF9EAA; font-size: 12px; font-weight: bold;">Free shipping on orders above ₹500!</p>
-                        </div>
+                    <div style="margin: 20px 0;">
+                        <p style="text-align: center; color: #888; font-size: 12px;">Estimated delivery in 3-5 business days</p>
+                        <p style="text-align: center; color: #FF9EAA; font-size: 12px; font-weight: bold;">Free shipping on orders above ₹500!</p>
                     </div>
-                    """, unsafe_allow_html=True)
+                </div>
+                """, unsafe_allow_html=True)
+
+def developer_tools(catalog: CatalogIndex) -> None:
+    """Behavior log, queue and cache stats, session memory and order history."""
+    st.markdown("### 📊 User Behavior Log")
+    tracker = st.session_state.behavior
     
-    # Developer Tools (hidden in expander)
-    with st.expander("🛠️ Developer Tools", expanded=False):
-        st.markdown("### 📊 User Behavior Log")
-        st.write("**Viewed Categories:**", list(st.session_state.behavior["viewed_categories"]))
-        st.write("**Viewed Products:**", st.session_state.behavior["viewed_products"][-10:])  # Show last 10
-        st.write("**Added to Cart:**", st.session_state.behavior["added_products"])
-        st.write("**Removed from Cart:**", st.session_state.behavior["removed_products"])
-        st.write("**Compared Products:**", st.session_state.behavior["compared_products"])
-        
-        # Show orders log
-        st.markdown("### 📦 Order History")
-        if st.session_state.orders:
-            for idx, order in enumerate(st.session_state.orders):
-                st.write(f"**Order #{idx+1}:** ID: QZ-{order['order_id']}, Total: ₹{order['total']:.2f}, Date: {order['date']}")
-            
-            # Option to clear orders
-            if st.button("Clear Order History"):
-                st.session_state.orders = []
-                st.success("Order history cleared!")
-                st.rerun()
-        else:
-            st.write("No orders placed yet.")
+    def product_name(pid: int) -> str:
+        product = catalog.get(pid)
+        return product['product_name'] if product else str(pid)
+    
+    def product_counts(kind: str) -> Dict[str, int]:
+        return {product_name(pid): n for pid, n in tracker.counts[kind].most_common()}
+    
+    st.write("**Viewed Categories:**", sorted(tracker.viewed_categories))
+    st.write("**Viewed Products:**", [product_name(e[1]) for e in tracker.recent_events(behavior.VIEW, 10)])  # Show last 10
+    st.write("**Added to Cart:**", product_counts(behavior.ADD))
+    st.write("**Removed from Cart:**", product_counts(behavior.REMOVE))
+    st.write("**Compared Products:**", [f"{product_name(e[1])} vs {product_name(e[2])}"
+                                        for e in tracker.recent_events(behavior.COMPARE)])
+    
+    post_order_metrics = get_post_order_queue().metrics()
+    st.write(f"**Post-order Queue:** {post_order_metrics['submitted']} orders, {post_order_metrics['queued']} jobs queued, "
+             f"{post_order_metrics['dead_letters']} failed")
+    st.dataframe([dict(handler=name, **stats) for name, stats in post_order_metrics["handlers"].items()],
+                 hide_index=True)
+    
+    event_logger = get_event_logger()
+    st.write(f"**Event Log:** {event_logger.logged} events logged, {event_logger.written} written to `{event_logger.directory}`")
+    fragment_stats = get_fragment_cache().stats()
+    st.write(f"**Fragment Cache:** {fragment_stats['entries']} fragments, {fragment_stats['hits']} hits, "
+             f"{fragment_stats['misses']} misses ({fragment_stats['hit_rate']:.0%} hit rate)")
+    query_stats = get_query_cache().stats()
+    st.write(f"**Query Cache:** {query_stats['entries']} results, {query_stats['hits']} hits, "
+             f"{query_stats['misses']} misses ({query_stats['hit_rate']:.0%} hit rate), "
+             f"{query_stats['invalidations']} catalog reloads")
+    facet_stats = load_facets(catalog.version, catalog).stats()
+    st.write(f"**Facet Index:** {facet_stats['bitmaps']} bitmaps over {facet_stats['rows']} rows, "
+             f"{facet_stats['term_masks']} cached search-term bitmaps")
+    if "shop_results" in st.session_state:
+        search_stats = st.session_state.shop_results.stats()
+        st.write(f"**Shop Search:** {search_stats['hits']} repeated, {search_stats['refined']} refined, "
+                 f"{search_stats['scans']} full scans, {search_stats['rows_checked']} rows checked")
+    st.write(f"**Session Store:** `{type(get_session_backend()).__name__}`, session `{st.session_state.session_id}`, "
+             f"{st.session_state.session_sync.writes} key writes")
+    
+    # Session memory profiler
+    st.markdown("### 🧠 Session Memory")
+    monitor = get_memory_monitor()
+    if st.button("Measure Now"):
+        monitor.measure(st.session_state.session_id, st.session_state.items())
+    sample = monitor.get(st.session_state.session_id)
+    if sample and sample.keys:
+        st.write(f"**This session:** {sample.total / 1024:.1f} KB across {len(sample.keys)} keys, "
+                 f"{sample.growth():+.0f} bytes per rerun over the last {len(sample.history)} samples "
+                 f"({sample.reruns} reruns)")
+        st.dataframe([{"key": key, "bytes": size} for key, size in sample.keys.items()], hide_index=True)
+    st.write("**Heaviest sessions:**")
+    st.dataframe([{"session": s.session_id[:8], "bytes": s.total, "growth/rerun": round(s.growth()),
+                  "reruns": s.reruns} for s in monitor.top(10)], hide_index=True)
+    st.download_button("Export Metrics", monitor.prometheus_text(), file_name="session_memory.prom",
+                       mime="text/plain")
+    
+    # Show orders log
+    st.markdown("### 📦 Order History")
+    order_store = get_order_store()
+    hidden_through = st.session_state.orders_hidden_through
+    orders_count = order_store.count(session_id=st.session_state.session_id, after=hidden_through)
+    if orders_count:
+        # One indexed page at a time, newest first
+        page_size = 10
+        pages = (orders_count + page_size - 1) // page_size
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, key="orders_page")
+        offset = (page - 1) * page_size
+        page_orders = order_store.history(session_id=st.session_state.session_id, limit=page_size, offset=offset,
+                                          after=hidden_through)
+        for idx, order in enumerate(page_orders):
+            st.write(f"**Order #{orders_count - offset - idx}:** ID: QZ-{order['order_id']}, Total: ₹{order['total']:.2f}, Date: {order['date']}")
         
-        # Clear data buttons
-        if st.button("Clear Session Data"):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            st.success("Session data cleared!")
+        # Clearing only hides this session's orders; the stored orders are kept
+        if st.button("Clear Order History"):
+            latest_order = order_store.latest(session_id=st.session_state.session_id, after=hidden_through)
+            st.session_state.orders_hidden_through = latest_order['order_id']
+            st.success("Order history cleared!")
             st.rerun()
+    else:
+        st.write("No orders placed yet.")
+    
+    # Clear data buttons
+    if st.button("Clear Session Data"):
+        get_memory_monitor().forget(st.session_state.session_id)
+        get_inventory().release(st.session_state.session_id)
+        st.session_state.session_sync.clear()
+        for key in list(st.session_state.keys()):
+            del st.session_state[key]
+        st.success("Session data cleared!")
+        st.rerun()
 
-        # Show initial products button
-        if st.button("Show All Products on Load"):
-            if 'show_all_products' not in st.session_state:
-                st.session_state.show_all_products = True
-            else:
-                st.session_state.show_all_products = not st.session_state.show_all_products
-            st.success(f"{'Enabled' if st.session_state.get('show_all_products', True) else 'Disabled'} showing all products on load")
-            st.rerun()
+    # Show initial products button
+    if st.button("Show All Products on Load"):
+        if 'show_all_products' not in st.session_state:
+            st.session_state.show_all_products = True
+        else:
+            st.session_state.show_all_products = not st.session_state.show_all_products
+        st.success(f"{'Enabled' if st.session_state.get('show_all_products', True) else 'Disabled'} showing all products on load")
+        st.rerun()
+
+# Tab label -> section; the first one is open by default
+SECTIONS: Dict[str, Callable[[CatalogIndex], None]] = {
+    "🛒 Your Cart": cart_section,
+    SHOP_TAB: shop_section,
+    "🅾️ Compare Products": compare_section,
+    "💡 AI Recommendations": recommendations_section,
+    CHECKOUT_TAB: checkout_section,
+}
+
+def main() -> None:
+    """Main application function."""
+    st.set_page_config(
+        page_title="Qoozee AI Shopping Assistant",
+        page_icon="🛍️",
+        layout="wide"
+    )
+    
+    # Load CSS
+    load_css()
+    
+    # Display the styled header
+    st.markdown("""
+    <div style="text-align: center; padding: 10px 0 20px 0;">
+        <h1 style="color: #FF9EAA; font-size: 2.2rem;">✨ Qoozee AI Shopping Assistant ✨</h1>
+        <p style="color: #888; margin-top: -10px;">your AI shopping bestie</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Initialize session state; persisted keys are loaded from the session store on first use
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = init_session_id()
+        st.session_state.session_sync = SessionSync(get_session_backend(), st.session_state.session_id)
+    sync = st.session_state.session_sync
+    
+    if "behavior" not in st.session_state:
+        st.session_state.behavior = sync.load("behavior", BehaviorTracker)
+    st.session_state.behavior.begin_rerun()
+    
+    # Initialize checkout state
+    if "checkout_complete" not in st.session_state:
+        st.session_state.checkout_complete = False
+    if "orders_hidden_through" not in st.session_state:
+        st.session_state.orders_hidden_through = sync.load("orders_hidden_through", lambda: 0)
+    
+    # Load products
+    catalog = load_catalog("products.csv", catalog_version("products.csv"))
+    products = catalog.products
+    seed_inventory(catalog.version, catalog)
+    
+    if "cart" not in st.session_state:
+        st.session_state.cart = sync.load("cart", lambda: default_cart(catalog))
+    drop_missing_products(st.session_state.cart, catalog)
+    
+    # Sample this session's memory every few reruns
+    get_memory_monitor().rerun(st.session_state.session_id, st.session_state.items())
+    if not products:
+        st.error("Unable to load products. Using sample data.")
+    
+    # Setup sidebar
+    sidebar_menu()
+    
+    # Main content as tabs; only the open tab's section runs
+    tabs = st.tabs(list(SECTIONS), key="active_section", on_change="rerun")
+    for tab, section in zip(tabs, SECTIONS.values()):
+        if tab.open:
+            with tab:
+                section(catalog)
+    
+    # Developer Tools are only built while the expander is open
+    tools = st.expander("🛠️ Developer Tools", expanded=False, key="developer_tools", on_change="rerun")
+    if tools.open:
+        with tools:
+            developer_tools(catalog)
     
     # Display footer
     st.markdown("""
@@ -1468,4 +1497,8 @@ def main() -> None:
 
 # Run the app
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        # Also runs when st.rerun() or st.stop() cut the script short
+        persist_session_state()
\ No newline at end of file
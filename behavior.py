@@ -0,0 +1,106 @@
+"""
+Compact, bounded tracking of a session's shopping behavior.
+Memory grows with the number of distinct products touched, never with the
+number of reruns, and every count shown in the sidebar is O(1).
+"""
+
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+VIEW = "view"
+ADD = "add"
+REMOVE = "remove"
+COMPARE = "compare"
+PURCHASE = "purchase"
+
+EVENT_KINDS = (VIEW, ADD, REMOVE, COMPARE, PURCHASE)
+
+# (kind, product_id, other_product_id, unix time)
+Event = Tuple[str, int, Optional[int], float]
+
+
+class BehaviorTracker:
+    """Per-product counters plus a fixed-size ring buffer of recent events."""
+
+    def __init__(self, recent_size: int = 50) -> None:
+        self.counts: Dict[str, Counter] = {kind: Counter() for kind in EVENT_KINDS}
+        self.totals: Dict[str, int] = {kind: 0 for kind in EVENT_KINDS}
+        self.viewed_categories: Set[str] = set()
+        self.recent: Deque[Event] = deque(maxlen=recent_size)
+        # Cards rendered in the last two reruns; a card that stays on screen
+        # counts as one view even when a button click cut a rerun short
+        self._previous_runs: Deque[Set[int]] = deque(maxlen=2)
+        self._viewed_this_run: Set[int] = set()
+
+    def begin_rerun(self) -> None:
+        """Start a new script run."""
+        self._previous_runs.append(self._viewed_this_run)
+        self._viewed_this_run = set()
+
+    def record(self, kind: str, product_id: int, other_id: Optional[int] = None,
+               category: Optional[str] = None) -> bool:
+        """Record one event; returns False for a view that was deduplicated."""
+        if kind == VIEW:
+            if product_id in self._viewed_this_run:
+                return False
+            self._viewed_this_run.add(product_id)
+            # Repeats within and across reruns are ignored
+            if any(product_id in run for run in self._previous_runs):
+                return False
+            if category:
+                self.viewed_categories.add(category)
+
+        self.counts[kind][product_id] += 1
+        self.totals[kind] += 1
+        self.recent.append((kind, product_id, other_id, time.time()))
+        return True
+
+    def to_state(self) -> Dict[str, Any]:
+        """Counters and recent events for external storage; rerun dedup state is dropped."""
+        return {
+            "counts": {kind: list(counter.items()) for kind, counter in self.counts.items() if counter},
+            "totals": self.totals,
+            "categories": sorted(self.viewed_categories),
+            "recent": list(self.recent),
+            "recent_size": self.recent.maxlen,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "BehaviorTracker":
+        tracker = cls(state.get("recent_size", 50))
+        for kind, pairs in state.get("counts", {}).items():
+            tracker.counts.setdefault(kind, Counter()).update(dict(pairs))
+        tracker.totals.update(state.get("totals", {}))
+        tracker.viewed_categories.update(state.get("categories", ()))
+        tracker.recent.extend(tuple(event) for event in state.get("recent", ()))
+        return tracker
+
+    def view(self, product_id: int, category: Optional[str] = None) -> bool:
+        """Record that a product card was rendered."""
+        return self.record(VIEW, product_id, category=category)
+
+    def add(self, product_id: int) -> bool:
+        return self.record(ADD, product_id)
+
+    def remove(self, product_id: int) -> bool:
+        return self.record(REMOVE, product_id)
+
+    def purchase(self, product_id: int) -> bool:
+        return self.record(PURCHASE, product_id)
+
+    def compare(self, product_id: int, other_id: int) -> bool:
+        return self.record(COMPARE, product_id, other_id)
+
+    def distinct(self, kind: str) -> int:
+        """Number of distinct products with at least one ``kind`` event."""
+        return len(self.counts[kind])
+
+    def total(self, kind: str) -> int:
+        """Number of ``kind`` events recorded this session."""
+        return self.totals[kind]
+
+    def recent_events(self, kind: Optional[str] = None, limit: Optional[int] = None) -> List[Event]:
+        """Most recent events first, optionally of one kind."""
+        events = [e for e in reversed(self.recent) if kind is None or e[0] == kind]
+        return events[:limit] if limit else events
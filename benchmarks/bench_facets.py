@@ -0,0 +1,103 @@
+"""
+Faceted filtering at catalog scale: bitmap intersections vs. a row-by-row scan.
+
+Builds a synthetic catalog of ``--rows`` products by repeating products.csv,
+then for a set of facet selections times (a) ``FacetIndex.filter`` plus the
+live counts for every facet value and (b) the same filter and counts computed
+by checking every row in turn. Both must agree.
+
+    python benchmarks/bench_facets.py --rows 1000000
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import CatalogIndex  # noqa: E402
+from facets import CATEGORY, PRICE, PRICE_BANDS, RATING, RATING_BANDS, FacetIndex, Selection, _band  # noqa: E402
+
+SELECTIONS = [
+    ("no filter", Selection()),
+    ("one category", Selection(categories=("Kitchen",))),
+    ("category + price", Selection(categories=("Kitchen", "Home"), prices=("Under ₹500", "₹500–1000"))),
+    ("all three facets", Selection(categories=("Electronics",), prices=("₹1000–2000", "₹2000+"),
+                                   ratings=("4.5★ & up",))),
+]
+
+
+def synthetic_catalog(rows: int) -> CatalogIndex:
+    with open(os.path.join(ROOT, "products.csv"), newline="", encoding="utf-8") as f:
+        source = list(csv.DictReader(f))
+    products = [dict(source[i % len(source)], product_id=str(i + 1)) for i in range(rows)]
+    return CatalogIndex(products, f"synthetic-{rows}")
+
+
+def scan(catalog: CatalogIndex, selection: Selection) -> Tuple[List[int], Dict[str, Dict[str, int]]]:
+    """Filter and disjunctive counts in one pass over every row."""
+    picked = selection.picked()
+    matched: List[int] = []
+    counts: Dict[str, Counter] = {facet: Counter() for facet in picked}
+    for row in range(len(catalog)):
+        values = {CATEGORY: catalog.categories[row],
+                  PRICE: _band(catalog.prices[row], PRICE_BANDS),
+                  RATING: _band(catalog.ratings[row], RATING_BANDS)}
+        misses = [facet for facet, value in values.items() if picked[facet] and value not in picked[facet]]
+        if not misses:
+            matched.append(row)
+        # A value's count ignores its own facet's picks
+        for facet, value in values.items():
+            if not misses or misses == [facet]:
+                counts[facet][value] += 1
+    return matched, {facet: dict(counter) for facet, counter in counts.items()}
+
+
+def median_ms(fn, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return 1000 * statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = synthetic_catalog(args.rows)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    index = FacetIndex(catalog)
+    built = time.perf_counter() - start
+    print(f"{args.rows:,} rows: catalog {loaded:.1f}s, facet index {built:.1f}s "
+          f"({sum(len(v) for v in index.bitmaps.values())} bitmaps)")
+
+    print(f"{'selection':<18} {'matches':>9} {'bitmaps':>10} {'+ rows':>10} {'row scan':>10} {'speedup':>8}")
+    for label, selection in SELECTIONS:
+        mask = index.filter(selection)
+        rows, counts = scan(catalog, selection)
+        bitmap_counts = index.counts(selection)
+        assert index.rows_of(mask) == rows
+        assert all(bitmap_counts[facet][value] == counts[facet].get(value, 0)
+                   for facet in bitmap_counts for value in bitmap_counts[facet])
+
+        bitmap_ms = median_ms(lambda: (index.filter(selection).bit_count(), index.counts(selection)), args.runs)
+        rows_ms = median_ms(lambda: index.rows_of(index.filter(selection)), args.runs)
+        scan_ms = median_ms(lambda: scan(catalog, selection), max(1, args.runs // 2))
+        print(f"{label:<18} {len(rows):>9,} {bitmap_ms:>8.1f}ms {rows_ms:>8.1f}ms {scan_ms:>8.0f}ms "
+              f"{scan_ms / bitmap_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
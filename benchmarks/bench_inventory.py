@@ -0,0 +1,91 @@
+"""
+Many sessions buying the same hot item at once: checks that stock is never
+oversold and reports checkout throughput.
+
+    python benchmarks/bench_inventory.py --processes 4 --threads 8 --stock 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory import Inventory, OutOfStock  # noqa: E402
+
+HOT_ITEM = 101
+
+
+def buyer_process(path: str, threads: int, results: "multiprocessing.Queue") -> None:
+    inventory = Inventory(path)
+    counts = {"sold": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def buyer(n: int) -> None:
+        session = f"{os.getpid():08x}{n:024x}"
+        sold = rejected = errors = 0
+        while True:
+            try:
+                inventory.commit(session, [(HOT_ITEM, 1)])
+                sold += 1
+            except OutOfStock:
+                rejected += 1
+                break
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            counts["sold"] += sold
+            counts["rejected"] += rejected
+            counts["errors"] += errors
+
+    pool = [threading.Thread(target=buyer, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(dict(counts, conflicts=inventory.conflicts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="buyer threads per process")
+    parser.add_argument("--stock", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inventory.db")
+        Inventory(path).seed([(HOT_ITEM, args.stock)])
+
+        results: "multiprocessing.Queue" = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=buyer_process, args=(path, args.threads, results))
+                 for _ in range(args.processes)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        totals = {"sold": 0, "rejected": 0, "errors": 0, "conflicts": 0}
+        for _ in procs:
+            for key, value in results.get().items():
+                totals[key] += value
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        left = Inventory(path).on_hand(HOT_ITEM)
+
+    buyers = args.processes * args.threads
+    print(f"{buyers} buyers, stock {args.stock}: sold {totals['sold']}, left {left}, "
+          f"rejected {totals['rejected']}, version conflicts {totals['conflicts']}, errors {totals['errors']}")
+    print(f"{totals['sold'] / elapsed:,.0f} checkouts/s over {elapsed:.2f}s")
+    oversold = totals["sold"] + left != args.stock or left < 0
+    print("OVERSOLD" if oversold else "no overselling")
+    sys.exit(1 if oversold else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Concurrent checkout throughput: group-commit OrderStore vs. one commit per order.
+
+    python benchmarks/bench_order_store.py --threads 16 --orders 200
+"""
+
+import argparse
+import itertools
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_store import OrderStore, _COLUMNS, _SCHEMA, _to_row  # noqa: E402
+
+_ids = itertools.count(1)
+
+
+def make_order(session: int) -> dict:
+    return {
+        "order_id": next(_ids),
+        "session_id": f"session-{session}",
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "name": "Bench User", "email": f"user{session}@example.com", "phone": "9999999999",
+        "address": "1 Bench Street", "payment_method": "UPI",
+        "items": [{"product_id": 101, "name": "Product", "price": 499.0, "quantity": 1}],
+        "total": 499.0, "delivery_date": "2026-01-01",
+    }
+
+
+def run_threads(threads: int, orders: int, checkout) -> float:
+    def worker(session: int) -> None:
+        for _ in range(orders):
+            checkout(make_order(session))
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start
+
+
+def bench_per_order(path: str, threads: int, orders: int) -> float:
+    """Baseline: every checkout opens its own transaction and commits it."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    conn.close()
+    sql = f"INSERT INTO orders ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+    local = threading.local()
+
+    def checkout(order: dict) -> None:
+        if not hasattr(local, "conn"):
+            local.conn = sqlite3.connect(path, timeout=60)
+            local.conn.execute("PRAGMA synchronous=NORMAL")
+        with local.conn:
+            local.conn.execute(sql, _to_row(order))
+
+    return run_threads(threads, orders, checkout)
+
+
+def bench_group_commit(path: str, threads: int, orders: int) -> float:
+    store = OrderStore(path)
+    try:
+        return run_threads(threads, orders, store.place)
+    finally:
+        store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=200, help="orders per thread")
+    args = parser.parse_args()
+    total = args.threads * args.orders
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, bench in (("per-order commit", bench_per_order),
+                             ("group commit", bench_group_commit)):
+            elapsed = bench(os.path.join(tmp, f"{bench.__name__}.db"), args.threads, args.orders)
+            print(f"{label:>18}: {total} orders in {elapsed:.2f}s "
+                  f"({total / elapsed:,.0f} orders/s)")
+
+
+if __name__ == "__main__":
+    main()
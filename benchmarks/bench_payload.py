@@ -0,0 +1,74 @@
+"""
+Bytes the server sends per rerun, per tab.
+
+Runs the app with Streamlit's AppTest, opens each tab and adds up the
+serialized size of every element in the page, plus how much of it is CSS
+(``<style>`` blocks and inline ``style="..."`` attributes). Point ``--app`` at
+an older checkout to compare.
+
+    python benchmarks/bench_payload.py
+    python benchmarks/bench_payload.py --app /tmp/old/app.py
+"""
+
+import argparse
+import os
+import re
+import sys
+
+from streamlit import config
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TABS = ["🛒 Your Cart", "🔍 Browse Products", "🅾️ Compare Products", "💡 AI Recommendations", "💳 Checkout"]
+
+STYLE_RE = re.compile(r'<style>.*?</style>|style="[^"]*"', re.S)
+
+
+def walk(node):
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from walk(child)
+
+
+def measure(at: AppTest):
+    """(total element bytes, CSS bytes inside markdown) for the last run."""
+    total = css = 0
+    for node in walk(at._tree):
+        proto = getattr(node, "proto", None)
+        if proto is None:
+            continue
+        if not getattr(node, "children", None):
+            total += proto.ByteSize()
+        body = getattr(proto, "body", None)
+        if node.type == "markdown" and isinstance(body, str):
+            css += sum(len(m.group().encode("utf-8")) for m in STYLE_RE.finditer(body))
+    return total, css
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    args = parser.parse_args()
+    app = os.path.abspath(args.app)
+    os.chdir(os.path.dirname(app))
+    os.environ.setdefault("QOOZEE_NO_LLM", "1")
+    os.environ.setdefault("QOOZEE_SESSION_STORE", "memory://")
+    # What .streamlit/config.toml sets when the app is served
+    config.set_option("server.enableStaticServing", True)
+
+    at = AppTest.from_file(app, default_timeout=120)
+    at.run()
+    if at.exception:
+        sys.exit(f"app failed: {at.exception}")
+
+    print(f"{'tab':<24} {'bytes/rerun':>12} {'of which CSS':>13}")
+    for tab in TABS:
+        at.session_state["active_section"] = tab
+        at.run()
+        total, css = measure(at)
+        print(f"{tab:<24} {total:>12,} {css:>13,}")
+
+
+if __name__ == "__main__":
+    main()
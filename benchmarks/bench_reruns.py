@@ -0,0 +1,141 @@
+"""
+Per-action rerun latency: whole-script rerun vs. a rerun of the fragment that owns the action.
+
+Before fragments, every add/remove/compare click called st.rerun() and paid for
+a full run of app.py. Now a click inside a section reruns only that section's
+fragment. This drives the real app with Streamlit's AppTest and times each
+action twice: once as a full rerun, once as a fragment rerun (the request the
+browser sends for a widget inside a fragment), then reports the medians.
+Fragment reruns skip the end of app.py, so after each one the cart must
+already be in the session store.
+
+    python benchmarks/bench_reruns.py --runs 20
+"""
+
+import argparse
+import contextlib
+import csv
+import functools
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Iterator, List
+
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import session_store  # noqa: E402
+
+
+@contextlib.contextmanager
+def fragment_rerun(at: AppTest) -> Iterator[None]:
+    """Make ``at.run()`` rerun only the fragment the last run registered.
+
+    AppTest has no public switch for this; its script runner is given the
+    same fragment queue the browser sends.
+    """
+    # Only the open tab's section runs, so the last run registered one fragment
+    fragment_ids = list(at._fragment_storage._fragments)
+    assert len(fragment_ids) == 1, fragment_ids
+    local_script_runner.RerunData = functools.partial(RerunData, fragment_id_queue=fragment_ids)
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = RerunData
+
+
+def stored_cart(at: AppTest):
+    """The cart as the session store holds it, not as session state does."""
+    sync = at.session_state["session_sync"]
+    blob = sync.backend.load(sync.session_id).get("cart")
+    return session_store.decode(blob) if blob else None
+
+
+def grid_add(at: AppTest, product_ids: List[int]) -> None:
+    """Pick the first product on the grid's add-to-bag pills, emptying the bag once the whole page is in it."""
+    grids = [w for w in at.get("button_group") if w.key == "shop_grid_action"]
+    if not grids:
+        cart = at.session_state["cart"]
+        for product_id, _ in list(cart.items()):
+            cart.remove(product_id)
+        at.run()
+        grids = [w for w in at.get("button_group") if w.key == "shop_grid_action"]
+    grid = grids[0]
+    grid.set_value(next(pid for pid in product_ids if grid.format_func(pid) in grid.options))
+
+
+def bag_button(name: str, undo: str) -> Callable[[AppTest, List[int]], None]:
+    """Click a quantity button of the first bag line where it is enabled.
+
+    When none is (every line is down to one unit), ``undo`` is clicked once
+    first, in an untimed run.
+    """
+    def enabled(at: AppTest, prefix: str) -> list:
+        return [b for b in at.button if b.key and b.key.startswith(prefix + "_") and not b.disabled]
+
+    def click(at: AppTest, product_ids: List[int]) -> None:
+        if not enabled(at, name):
+            enabled(at, undo)[0].click()
+            at.run()
+        enabled(at, name)[0].click()
+    return click
+
+
+# (label, tab, action applied before the rerun)
+ACTIONS = [
+    ("add from grid", "🔍 Browse Products", grid_add),
+    ("next grid page", "🔍 Browse Products", lambda at, product_ids: at.button(key="shop_next").click()),
+    ("bag quantity +", "🛒 Your Cart", bag_button("increase", "decrease")),
+    ("bag quantity -", "🛒 Your Cart", bag_button("decrease", "increase")),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+    os.environ.setdefault("QOOZEE_NO_LLM", "1")
+    os.environ.setdefault("QOOZEE_SESSION_STORE", "memory://")
+    # AppTest compiles app.py on every run; a server compiles it once
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+    with open(os.path.join(ROOT, "products.csv"), newline="", encoding="utf-8") as f:
+        product_ids = [int(row["product_id"]) for row in csv.DictReader(f)]
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.run()
+    if at.exception:
+        sys.exit(f"app failed: {at.exception}")
+
+    print(f"{'action':<16} {'full rerun':>12} {'fragment':>12} {'speedup':>9}")
+    for label, tab, action in ACTIONS:
+        timings = {}
+        for scope in ("full", "fragment"):
+            # A full run opens the tab and registers its section's fragment
+            at.session_state["active_section"] = tab
+            at.run()
+            runs = []
+            with fragment_rerun(at) if scope == "fragment" else contextlib.nullcontext():
+                for _ in range(args.runs):
+                    action(at, product_ids)
+                    start = time.perf_counter()
+                    at.run()
+                    runs.append(time.perf_counter() - start)
+                    if at.exception:
+                        sys.exit(f"{label} ({scope}) failed: {at.exception}")
+                    stored = stored_cart(at)
+                    if stored is None or stored.to_state() != at.session_state["cart"].to_state():
+                        sys.exit(f"{label} ({scope}): cart in session state was not saved to the session store")
+            timings[scope] = 1000 * statistics.median(runs)
+        full_ms, fragment_ms = timings["full"], timings["fragment"]
+        print(f"{label:<16} {full_ms:>10.1f}ms {fragment_ms:>10.1f}ms {full_ms / fragment_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
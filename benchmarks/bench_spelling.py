@@ -0,0 +1,80 @@
+"""
+Typo lookup latency: symmetric-delete index vs. scanning the vocabulary.
+
+Takes the catalog's product-name tokens, misspells a sample of them with one
+or two random edits, and times ``SpellIndex.lookup`` against computing the
+edit distance to every vocabulary word. Also reports how often the intended
+word comes back first.
+
+    python benchmarks/bench_spelling.py --typos 2000
+"""
+
+import argparse
+import csv
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import CatalogIndex  # noqa: E402
+from spelling import allowed_distance, edit_distance  # noqa: E402
+
+
+def misspell(word: str, edits: int, rnd: random.Random) -> str:
+    letters = list(word)
+    for _ in range(edits):
+        i = rnd.randrange(len(letters))
+        op = rnd.choice(("replace", "delete", "insert", "swap"))
+        if op == "replace":
+            letters[i] = rnd.choice(string.ascii_lowercase)
+        elif op == "delete" and len(letters) > 1:
+            del letters[i]
+        elif op == "insert":
+            letters.insert(i, rnd.choice(string.ascii_lowercase))
+        elif i + 1 < len(letters):
+            letters[i], letters[i + 1] = letters[i + 1], letters[i]
+    return "".join(letters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--typos", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rnd = random.Random(args.seed)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, "products.csv"), newline="", encoding="utf-8") as f:
+        catalog = CatalogIndex(list(csv.DictReader(f)), "bench")
+    spelling = catalog.spelling
+    words = [w for w in spelling.counts if allowed_distance(w)]
+    cases = []
+    while len(cases) < args.typos:
+        word = rnd.choice(words)
+        typo = misspell(word, rnd.randint(1, allowed_distance(word)), rnd)
+        if typo not in spelling.counts and allowed_distance(typo):
+            cases.append((word, typo))
+    print(f"{len(spelling):,} words in the vocabulary, {len(cases):,} misspellings")
+
+    start = time.perf_counter()
+    results = [spelling.lookup(typo) for _, typo in cases]
+    indexed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _, typo in cases:
+        limit = allowed_distance(typo)
+        [w for w in spelling.counts if edit_distance(typo, w, limit) <= min(limit, allowed_distance(w))]
+    scanned = time.perf_counter() - start
+
+    first = sum(1 for (word, _), matches in zip(cases, results) if matches and matches[0][0] == word)
+    listed = sum(1 for (word, _), matches in zip(cases, results) if word in (m for m, _ in matches))
+    print(f"index lookup   {1e6 * indexed / len(cases):>8.1f}µs per word")
+    print(f"vocabulary scan {1e6 * scanned / len(cases):>7.1f}µs per word ({scanned / indexed:.0f}x slower)")
+    print(f"intended word first in {first / len(cases):.0%}, among the nearest in {listed / len(cases):.0%}")
+
+
+if __name__ == "__main__":
+    main()
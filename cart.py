@@ -0,0 +1,129 @@
+"""
+Shopping cart keyed by product id with quantities and a running subtotal.
+Membership, add, remove and total are all O(1).
+
+Checkout freezes a cart into ``OrderLine`` tuples: id, quantity, unit price and
+name at purchase time, with no reference back to the catalog.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Product ids every new session's cart starts with
+DEFAULT_CART = [101, 105]
+
+
+class OrderLine(NamedTuple):
+    """One purchased line; ``unit_price`` is in paise."""
+    product_id: int
+    quantity: int
+    unit_price: int
+    name: str
+
+    @property
+    def price(self) -> float:
+        return self.unit_price / 100
+
+    @property
+    def total(self) -> float:
+        return self.unit_price * self.quantity / 100
+
+
+class Cart:
+    """Ordered product id -> quantity mapping, in the order items were added."""
+
+    def __init__(self, items: Optional[Iterable[Tuple[int, float, int]]] = None) -> None:
+        self._quantities: "OrderedDict[int, int]" = OrderedDict()
+        # Unit price in paise at the time the product was added
+        self._unit_prices: Dict[int, int] = {}
+        self._subtotal = 0
+        self._units = 0
+        for product_id, price, quantity in items or ():
+            self.add(product_id, price, quantity)
+
+    def __contains__(self, product_id: object) -> bool:
+        return product_id in self._quantities
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._quantities)
+
+    def __len__(self) -> int:
+        return len(self._quantities)
+
+    def __bool__(self) -> bool:
+        return bool(self._quantities)
+
+    def __repr__(self) -> str:
+        return f"Cart({dict(self._quantities)!r}, subtotal={self.subtotal:.2f})"
+
+    @property
+    def subtotal(self) -> float:
+        """Sum of unit price times quantity over every line."""
+        return self._subtotal / 100
+
+    @property
+    def units(self) -> int:
+        """Total number of items, counting quantities."""
+        return self._units
+
+    def quantity(self, product_id: int) -> int:
+        return self._quantities.get(product_id, 0)
+
+    def unit_price(self, product_id: int) -> float:
+        return self._unit_prices.get(product_id, 0) / 100
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        """Yield (product_id, quantity) in the order items were added."""
+        return iter(self._quantities.items())
+
+    def add(self, product_id: int, price: float, quantity: int = 1) -> None:
+        """Add ``quantity`` units, creating the line if needed."""
+        if quantity <= 0:
+            return
+        if product_id not in self._quantities:
+            self._quantities[product_id] = 0
+            self._unit_prices[product_id] = round(float(price) * 100)
+        self._quantities[product_id] += quantity
+        self._subtotal += self._unit_prices[product_id] * quantity
+        self._units += quantity
+
+    def set_quantity(self, product_id: int, quantity: int) -> None:
+        """Change a line's quantity; zero or less removes it."""
+        if product_id not in self._quantities:
+            return
+        if quantity <= 0:
+            self.remove(product_id)
+            return
+        delta = quantity - self._quantities[product_id]
+        self._quantities[product_id] = quantity
+        self._subtotal += self._unit_prices[product_id] * delta
+        self._units += delta
+
+    def remove(self, product_id: int) -> int:
+        """Remove a whole line and return how many units it held."""
+        quantity = self._quantities.pop(product_id, 0)
+        if quantity:
+            self._subtotal -= self._unit_prices.pop(product_id) * quantity
+            self._units -= quantity
+        return quantity
+
+    def clear(self) -> None:
+        self._quantities.clear()
+        self._unit_prices.clear()
+        self._subtotal = 0
+        self._units = 0
+
+    def order_lines(self, name_of: Callable[[int], str]) -> List[OrderLine]:
+        """Snapshot every line with the product name ``name_of`` gives for its id."""
+        return [OrderLine(pid, qty, self._unit_prices[pid], name_of(pid)) for pid, qty in self.items()]
+
+    def to_state(self) -> List[List[int]]:
+        """Compact ``[[product_id, quantity, unit_price_paise], ...]`` for external storage."""
+        return [[pid, qty, self._unit_prices[pid]] for pid, qty in self.items()]
+
+    @classmethod
+    def from_state(cls, state: List[List[int]]) -> "Cart":
+        return cls((pid, paise / 100, qty) for pid, qty, paise in state)
+
+    def copy(self) -> "Cart":
+        return Cart((pid, self.unit_price(pid), qty) for pid, qty in self.items())
@@ -0,0 +1,312 @@
+"""
+Indexed, read-only view of the Qoozee product catalog.
+The index is built once per catalog version and shared by every session.
+"""
+
+import bisect
+import heapq
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from spelling import SpellIndex
+
+ProductType = Dict[str, str]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Sort orders offered by ranked retrieval, mapped to their display labels
+SORT_OPTIONS = {
+    "featured": "Featured",
+    "price_asc": "Price: Low to High",
+    "price_desc": "Price: High to Low",
+    "rating": "Top Rated",
+    "value": "Best Value",
+}
+
+
+def catalog_version(filename: str) -> str:
+    """Identify the current catalog contents by file modification time and size."""
+    try:
+        stat = os.stat(filename)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    except OSError:
+        return "sample"
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class CatalogIndex:
+    """Column arrays and lookup tables over a list of product rows.
+
+    Rows are addressed by their position in ``products`` so that result sets
+    can be passed around as plain lists of ints.
+    """
+
+    def __init__(self, products: List[ProductType], version: str = "") -> None:
+        self.products = products
+        self.version = version
+
+        self.ids: List[int] = []
+        self.names: List[str] = []
+        self.prices: List[float] = []
+        self.ratings: List[float] = []
+        self.categories: List[str] = []
+
+        self.row_by_id: Dict[int, int] = {}
+        self.rows_by_name: Dict[str, List[int]] = {}
+        self.rows_by_category: Dict[str, List[int]] = {}
+        self.rows_by_token: Dict[str, Set[int]] = {}
+
+        for row, product in enumerate(products):
+            pid = int(product['product_id'])
+            name = product.get('product_name', '').lower()
+            category = product.get('category', 'Unknown')
+
+            self.ids.append(pid)
+            self.names.append(name)
+            self.prices.append(_to_float(product.get('price')))
+            self.ratings.append(_to_float(product.get('rating')))
+            self.categories.append(category)
+
+            self.row_by_id[pid] = row
+            self.rows_by_name.setdefault(name, []).append(row)
+            self.rows_by_category.setdefault(category.lower(), []).append(row)
+            for token in set(tokenize(name)):
+                self.rows_by_token.setdefault(token, set()).add(row)
+
+        self.category_names = sorted({c for c in self.categories})
+        self.max_price = max(self.prices) if self.prices else 0.0
+        # Typo-tolerant lookups over name tokens, weighted by how many products use them
+        self.spelling = SpellIndex({token: len(rows) for token, rows in self.rows_by_token.items()})
+        self._orders: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    # --- Lookups ---
+    def get(self, product_id: int) -> Optional[ProductType]:
+        """Return the product with the given id, or None."""
+        row = self.row_by_id.get(product_id)
+        return None if row is None else self.products[row]
+
+    def rows_to_products(self, rows: List[int]) -> List[ProductType]:
+        """Map row positions back to product dicts."""
+        return [self.products[row] for row in rows]
+
+    def find_by_name(self, name: str) -> Optional[ProductType]:
+        """Find a product by name: exact match, then all tokens, then substring."""
+        name = name.strip().lower()
+        if not name:
+            return None
+
+        exact = self.rows_by_name.get(name)
+        if exact:
+            return self.products[exact[0]]
+
+        rows = self.match_tokens(name)
+        if rows:
+            return self.products[rows[0]]
+
+        for row, product_name in enumerate(self.names):
+            if name in product_name:
+                return self.products[row]
+
+        # Misspelt names: "blnder" -> "blender"
+        corrected = self.correct(name)
+        rows = self.match_tokens(corrected) if corrected and corrected != name else []
+        return self.products[rows[0]] if rows else None
+
+    def match_tokens(self, text: str) -> List[int]:
+        """Return rows whose names contain every token of ``text``, in catalog order."""
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+
+        postings = []
+        for token in tokens:
+            rows = self.rows_by_token.get(token)
+            if not rows:
+                return []
+            postings.append(rows)
+
+        postings.sort(key=len)
+        matched = set(postings[0])
+        for rows in postings[1:]:
+            matched &= rows
+        return sorted(matched)
+
+    def match_most_tokens(self, text: str) -> List[int]:
+        """Return rows whose names contain the largest number of ``text``'s tokens, in catalog order."""
+        hits: Dict[int, int] = {}
+        for token in set(tokenize(text)):
+            for row in self.rows_by_token.get(token, ()):
+                hits[row] = hits.get(row, 0) + 1
+        if not hits:
+            return []
+        most = max(hits.values())
+        return sorted(row for row, count in hits.items() if count == most)
+
+    def correct(self, text: str) -> str:
+        """Respell ``text`` with catalog words: unknown words become their nearest name token.
+
+        Words with nothing within two edits are dropped, so the result may be
+        empty.
+        """
+        words = []
+        for token in tokenize(text):
+            word = self.spelling.best(token)
+            if word:
+                words.append(word)
+        return " ".join(words)
+
+    # --- Filtering ---
+    def search(self, category: Optional[str] = None, max_price: Optional[float] = None,
+               search_term: Optional[str] = None, min_price: Optional[float] = None,
+               min_rating: Optional[float] = None) -> List[int]:
+        """Return rows matching all given filters, in catalog order."""
+        if category and category.lower() != "all":
+            rows = self.rows_by_category.get(category.lower(), [])
+            category = None
+        else:
+            rows = range(len(self.products))
+        return self.filter_rows(rows, category, max_price, search_term, min_price, min_rating)
+
+    def filter_rows(self, rows, category: Optional[str] = None, max_price: Optional[float] = None,
+                    search_term: Optional[str] = None, min_price: Optional[float] = None,
+                    min_rating: Optional[float] = None) -> List[int]:
+        """Narrow an existing row set with the same filters as ``search``."""
+        category = category.lower() if category and category.lower() != "all" else None
+        term = search_term.lower() if search_term else None
+        prices, ratings, names, categories = self.prices, self.ratings, self.names, self.categories
+
+        return [
+            row for row in rows
+            if not (category and categories[row].lower() != category)
+            and not (max_price and prices[row] > max_price)
+            and not (min_price and prices[row] < min_price)
+            and not (min_rating and ratings[row] < min_rating)
+            and not (term and term not in names[row])
+        ]
+
+
+    # --- Ranked retrieval ---
+    def sort_key(self, sort: str) -> Callable[[int], tuple]:
+        """Return a row key function for ``sort``; smaller keys rank first."""
+        prices, ratings = self.prices, self.ratings
+        if sort == "price_asc":
+            return lambda row: (prices[row], -ratings[row], row)
+        if sort == "price_desc":
+            return lambda row: (-prices[row], -ratings[row], row)
+        if sort == "rating":
+            return lambda row: (-ratings[row], prices[row], row)
+        if sort == "value":
+            return lambda row: (-(ratings[row] / prices[row]) if prices[row] else 0.0, row)
+        return lambda row: row
+
+    def sorted_rows(self, sort: str) -> List[int]:
+        """Return every row in ``sort`` order, computed once per sort key."""
+        order = self._orders.get(sort)
+        if order is None:
+            order = sorted(range(len(self.products)), key=self.sort_key(sort))
+            self._orders[sort] = order
+        return order
+
+    def rank(self, rows: Optional[Sequence[int]], sort: str = "featured",
+             offset: int = 0, limit: Optional[int] = None) -> List[int]:
+        """Return the rows ranked ``offset`` to ``offset + limit`` by ``sort``.
+
+        ``rows=None`` means the whole catalog, which is served by slicing a
+        pre-sorted permutation. Dense result sets walk that permutation and
+        stop after ``offset + limit`` hits; sparse ones use heap selection, so
+        a page costs O(k log n) rather than a full sort.
+        """
+        if sort not in SORT_OPTIONS or sort == "featured":
+            ranked = range(len(self.products)) if rows is None else sorted(rows)
+            return list(ranked[offset:None if limit is None else offset + limit])
+
+        if rows is None:
+            order = self.sorted_rows(sort)
+            return order[offset:None if limit is None else offset + limit]
+
+        if limit is None:
+            return sorted(rows, key=self.sort_key(sort))[offset:]
+
+        wanted = offset + limit
+        if len(rows) * 4 >= len(self.products):
+            return _take(self.sorted_rows(sort), set(rows), wanted)[offset:]
+        return heapq.nsmallest(wanted, rows, key=self.sort_key(sort))[offset:]
+
+
+    def positions(self, sort: str) -> List[int]:
+        """Return each row's rank under ``sort`` (the inverse of ``sorted_rows``)."""
+        key = "pos:" + sort
+        positions = self._orders.get(key)
+        if positions is None:
+            positions = [0] * len(self.products)
+            for position, row in enumerate(self.sorted_rows(sort)):
+                positions[row] = position
+            self._orders[key] = positions
+        return positions
+
+    def page(self, rows: Optional[Sequence[int]], sort: str = "featured", after: Optional[int] = None,
+             limit: int = 20) -> Tuple[List[int], Optional[int]]:
+        """Return the ``limit`` rows ranked after row ``after`` and the cursor for the next page.
+
+        The cursor is the last row of a page, so the cost of a page does not
+        grow with how deep into the results it is. The next cursor is None on
+        the last page.
+        """
+        if sort not in SORT_OPTIONS:
+            sort = "featured"
+        order = self.sorted_rows(sort) if sort != "featured" else range(len(self.products))
+        positions = self.positions(sort) if sort != "featured" else None
+        start = 0 if after is None else (positions[after] if positions else after) + 1
+
+        if rows is None:
+            taken = list(order[start:start + limit + 1])
+        elif len(rows) * 4 >= len(self.products):
+            taken = _take(order[start:] if start else order, set(rows), limit + 1)
+        else:
+            rank = positions.__getitem__ if positions else int
+            taken = heapq.nsmallest(limit + 1, (row for row in rows if rank(row) >= start), key=rank)
+
+        if len(taken) > limit:
+            return taken[:limit], taken[limit - 1]
+        return taken, None
+
+    def page_ranked(self, ranked: Sequence[int], sort: str = "featured", after: Optional[int] = None,
+                    limit: int = 20) -> Tuple[List[int], Optional[int]]:
+        """``page`` for rows that are already in ``sort`` order, such as a cached result."""
+        if sort not in SORT_OPTIONS:
+            sort = "featured"
+        start = 0
+        if after is not None:
+            rank = self.positions(sort).__getitem__ if sort != "featured" else int
+            start = bisect.bisect_right(ranked, rank(after), key=rank)
+        taken = list(ranked[start:start + limit + 1])
+        if len(taken) > limit:
+            return taken[:limit], taken[limit - 1]
+        return taken, None
+
+
+def _take(order: Iterable[int], members: Set[int], count: int) -> List[int]:
+    """Collect the first ``count`` rows of ``order`` that are in ``members``."""
+    taken = []
+    if count <= 0:
+        return taken
+    for row in order:
+        if row in members:
+            taken.append(row)
+            if len(taken) == count:
+                break
+    return taken
+
+def _to_float(value: Optional[str]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,134 @@
+"""
+Append-only behavior event log for offline analytics.
+
+Events are buffered in memory and written in batches by a background thread to
+rotating, gzip-compressed JSONL segments, so logging never blocks a rerun.
+``read_events`` streams the segments back for offline jobs.
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional
+
+EVENT_LOG_DIR = os.path.join("data", "events")
+
+
+class EventLogger:
+    """Batched writer of behavior events; one instance per process."""
+
+    def __init__(self, directory: str = EVENT_LOG_DIR, batch_size: int = 500,
+                 flush_interval: float = 2.0, max_segment_bytes: int = 8 * 1024 * 1024,
+                 max_segment_age: float = 3600.0) -> None:
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+
+        # deque.append/popleft are thread-safe, so producers never take a lock
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self._segment: Optional[str] = None
+        self._segment_opened = 0.0
+        self._sequence = 0
+
+        self.logged = 0
+        self.written = 0
+        self.dropped = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="qoozee-event-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, kind: str, session_id: str, product_id: Optional[int] = None,
+            other_id: Optional[int] = None, **fields: Any) -> None:
+        """Queue one event; returns immediately."""
+        if self._closed:
+            self.dropped += 1
+            return
+        event = {"ts": time.time(), "kind": kind, "session": session_id, "product_id": product_id}
+        if other_id is not None:
+            event["other_id"] = other_id
+        event.update(fields)
+        self._buffer.append(event)
+        self.logged += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write everything buffered so far (called from the writer thread or on close)."""
+        batch = []
+        while self._buffer:
+            batch.append(self._buffer.popleft())
+        if not batch:
+            return
+
+        payload = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in batch)
+        path = self._current_segment()
+        # Each batch becomes one gzip member; gzip readers stream concatenated members
+        with open(path, "ab") as f:
+            f.write(gzip.compress(payload.encode("utf-8")))
+        self.written += len(batch)
+
+    def close(self) -> None:
+        """Stop the writer thread after a final flush."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Error writing events: {str(e)}")
+
+    def _current_segment(self) -> str:
+        now = time.time()
+        if (self._segment is None
+                or now - self._segment_opened > self.max_segment_age
+                or _size(self._segment) > self.max_segment_bytes):
+            self._sequence += 1
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(now))
+            name = f"events-{stamp}-{os.getpid()}-{self._sequence:04d}.jsonl.gz"
+            self._segment = os.path.join(self.directory, name)
+            self._segment_opened = now
+        return self._segment
+
+
+def read_events(directory: str = EVENT_LOG_DIR, since: Optional[float] = None,
+                kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream events from every segment in write order."""
+    for path in sorted(glob.glob(os.path.join(directory, "events-*.jsonl.gz"))):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    event = json.loads(line)
+                    if since is not None and event["ts"] < since:
+                        continue
+                    if kind is not None and event["kind"] != kind:
+                        continue
+                    yield event
+        except (EOFError, OSError):
+            # A segment whose last batch is still being written
+            continue
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,162 @@
+"""
+Bitmap indexes over the catalog for faceted filtering.
+
+Every facet value (a category, a price band, a rating band) owns a bitset
+with bit ``row`` set for each matching product, held as a Python int. Values
+picked within one facet are OR-ed, facets are AND-ed, and the count shown
+next to a value is the popcount of its bitmap AND-ed with the other facets'
+selections, so a filter and all of its live counts are a few dozen bitwise
+operations on ``len(catalog) / 8`` bytes each.
+"""
+
+import re
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from catalog import CatalogIndex
+from lru import LockedLRU
+
+# (label, low inclusive, high exclusive); None is unbounded
+PRICE_BANDS: List[Tuple[str, float, Optional[float]]] = [
+    ("Under ₹500", 0, 500),
+    ("₹500–1000", 500, 1000),
+    ("₹1000–2000", 1000, 2000),
+    ("₹2000+", 2000, None),
+]
+
+RATING_BANDS: List[Tuple[str, float, Optional[float]]] = [
+    ("4.5★ & up", 4.5, None),
+    ("4–4.5★", 4.0, 4.5),
+    ("Under 4★", 0, 4.0),
+]
+
+CATEGORY, PRICE, RATING = "category", "price", "rating"
+FACETS = (CATEGORY, PRICE, RATING)
+
+_NONZERO_RE = re.compile(b"[^\x00]")
+
+# Bit positions set in each byte value, for turning a bitmap back into rows
+_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+class Selection(NamedTuple):
+    """Values picked per facet; an empty tuple leaves that facet unfiltered."""
+    categories: Tuple[str, ...] = ()
+    prices: Tuple[str, ...] = ()
+    ratings: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return any(self)
+
+    def picked(self) -> Dict[str, Tuple[str, ...]]:
+        return {CATEGORY: self.categories, PRICE: self.prices, RATING: self.ratings}
+
+
+def _band(value: float, bands: Sequence[Tuple[str, float, Optional[float]]]) -> Optional[str]:
+    for label, low, high in bands:
+        if value >= low and (high is None or value < high):
+            return label
+    return None
+
+
+class FacetIndex:
+    """Per-value bitmaps for the category, price and rating facets of one catalog version."""
+
+    def __init__(self, catalog: CatalogIndex, max_masks: int = 64) -> None:
+        self.version = catalog.version
+        self.size = len(catalog)
+        self.all = (1 << self.size) - 1
+
+        # Collect bits in bytearrays; one int conversion per value at the end
+        nbytes = (self.size + 7) // 8
+        raw: Dict[str, Dict[str, bytearray]] = {CATEGORY: {}, PRICE: {}, RATING: {}}
+        for row in range(self.size):
+            values = ((CATEGORY, catalog.categories[row]),
+                      (PRICE, _band(catalog.prices[row], PRICE_BANDS)),
+                      (RATING, _band(catalog.ratings[row], RATING_BANDS)))
+            for facet, value in values:
+                if value is None:
+                    continue
+                bits = raw[facet].get(value)
+                if bits is None:
+                    bits = raw[facet][value] = bytearray(nbytes)
+                bits[row >> 3] |= 1 << (row & 7)
+
+        self.bitmaps: Dict[str, Dict[str, int]] = {
+            facet: {value: int.from_bytes(bits, "little") for value, bits in values.items()}
+            for facet, values in raw.items()
+        }
+        # Display order: categories A-Z, bands as declared
+        self.values: Dict[str, List[str]] = {
+            CATEGORY: sorted(self.bitmaps[CATEGORY]),
+            PRICE: [label for label, _, _ in PRICE_BANDS if label in self.bitmaps[PRICE]],
+            RATING: [label for label, _, _ in RATING_BANDS if label in self.bitmaps[RATING]],
+        }
+
+        # Bitmaps of recent search-term results, shared by every session
+        self._masks: LockedLRU[int] = LockedLRU(max_masks)
+
+    # --- Conversions ---
+    def mask_of(self, rows: Iterable[int]) -> int:
+        """Bitmap of a row list."""
+        bits = bytearray((self.size + 7) // 8)
+        for row in rows:
+            bits[row >> 3] |= 1 << (row & 7)
+        return int.from_bytes(bits, "little")
+
+    def rows_of(self, mask: int) -> List[int]:
+        """Rows set in ``mask``, ascending; zero bytes are skipped in C."""
+        data = mask.to_bytes((self.size + 7) // 8, "little")
+        rows = []
+        for match in _NONZERO_RE.finditer(data):
+            base = match.start() << 3
+            rows.extend(base + bit for bit in _BITS[data[match.start()]])
+        return rows
+
+    def cached_mask(self, key: Hashable, rows: Callable[[], Iterable[int]]) -> int:
+        """Bitmap of ``rows()``, remembered under ``key`` (e.g. a search term)."""
+        return self._masks.get(key, lambda: self.mask_of(rows()))
+
+    # --- Filtering ---
+    def _facet_mask(self, facet: str, picked: Sequence[str]) -> int:
+        if not picked:
+            return self.all
+        bitmaps = self.bitmaps[facet]
+        mask = 0
+        for value in picked:
+            mask |= bitmaps.get(value, 0)
+        return mask
+
+    def filter(self, selection: Selection, base: Optional[int] = None) -> int:
+        """Bitmap of the rows in ``base`` (default: all) that match every facet."""
+        mask = self.all if base is None else base
+        for facet, picked in selection.picked().items():
+            if picked:
+                mask &= self._facet_mask(facet, picked)
+        return mask
+
+    def counts(self, selection: Selection, base: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """Matches per facet value if that value were picked, given the other facets' picks.
+
+        Within a facet values are alternatives, so a facet's own picks do not
+        shrink its counts.
+        """
+        base = self.all if base is None else base
+        picked = selection.picked()
+        masks = {facet: self._facet_mask(facet, values) for facet, values in picked.items()}
+        counts: Dict[str, Dict[str, int]] = {}
+        for facet, bitmaps in self.bitmaps.items():
+            others = base
+            for other, mask in masks.items():
+                if other != facet and picked[other]:
+                    others &= mask
+            counts[facet] = {value: (bitmaps[value] & others).bit_count() for value in self.values[facet]}
+        return counts
+
+    def stats(self) -> Dict[str, int]:
+        return {"rows": self.size, "bitmaps": sum(len(values) for values in self.bitmaps.values()),
+                "term_masks": len(self._masks)}
+
+
+def selection_from(state: Mapping[str, Optional[Sequence[str]]]) -> Selection:
+    """Build a ``Selection`` from per-facet widget values (``None`` means nothing picked)."""
+    return Selection(*(tuple(state.get(facet) or ()) for facet in FACETS))
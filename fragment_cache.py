@@ -0,0 +1,38 @@
+"""
+Bounded, process-wide cache of pre-rendered HTML fragments.
+
+Cards for the same product render to the same HTML for every session, so each
+fragment is built once per (kind, product id, catalog version, template
+version, extra) and then served from memory. A new catalog version or a bumped
+``html_components.TEMPLATE_VERSION`` simply misses, and the stale entries age
+out of the LRU.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from html_components import TEMPLATE_VERSION
+from lru import LockedLRU
+
+FragmentKey = Tuple[Hashable, ...]
+
+
+class FragmentCache:
+    """Thread-safe LRU of HTML strings."""
+
+    def __init__(self, max_entries: int = 5000) -> None:
+        self._fragments: LockedLRU[str] = LockedLRU(max_entries)
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def get(self, kind: str, product_id: Hashable, version: str, render: Callable[[], str],
+            *extra: Hashable) -> str:
+        """Return the cached fragment, calling ``render()`` on a miss."""
+        key: FragmentKey = (kind, product_id, version, TEMPLATE_VERSION) + extra
+        return self._fragments.get(key, render)
+
+    def clear(self) -> None:
+        self._fragments.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._fragments.stats()
@@ -3,6 +3,10 @@ This file contains HTML components for the Qoozee shopping assistant.
 These components can be rendered using Streamlit's st.markdown() with unsafe_allow_html=True.
 """
 
+# Bump whenever a product, cart, comparison or order template changes, so
+# fragments cached under the old markup are never served again
+TEMPLATE_VERSION = 4
+
 # Header components
 def app_header():
     """Return the app header HTML."""
@@ -30,12 +34,21 @@ def user_profile(username="Spoorthi", premium=True):
     </div>
     """
 
-def stat_counter(label, value, color="#FF9EAA"):
-    """Return a stat counter HTML for the sidebar."""
+def stat_counter(label, value, tone="pink"):
+    """Return a stat counter HTML for the sidebar; ``tone`` is pink, purple, teal or yellow."""
     return f"""
     <div class="stat-container">
         <span class="stat-label">{label}</span>
-        <span class="stat-value" style="background-color: {color};">{value}</span>
+        <span class="stat-value tone-{tone}">{value}</span>
+    </div>
+    """
+
+def activity_stat(label, value, tone="pink"):
+    """Return one tile of the sidebar activity grid."""
+    return f"""
+    <div class="activity-stat">
+        <p class="activity-label">{label}</p>
+        <p class="activity-value tone-{tone}">{value}</p>
     </div>
     """
 
@@ -44,8 +57,8 @@ def product_card(product):
     """Return a product card HTML."""
     return f"""
     <div class="product-card">
-        <h3>✨ {product['product_name']}</h3>
-        <div style="display: flex; justify-content: space-between; align-items: center; margin: 10px 0;">
+        <h4>✨ {product['product_name']}</h4>
+        <div class="card-row">
             <span class="price-tag">₹{product['price']}</span>
             <span class="star-rating">⭐ {product['rating']}</span>
         </div>
@@ -53,20 +66,48 @@ def product_card(product):
     </div>
     """
 
-def cart_item(item):
-    """Return a cart item HTML."""
+def cart_item(item, quantity=1, price=None):
+    """Return a cart item HTML; ``price`` is the unit price held in the bag (default: the catalog's)."""
+    price = float(item['price']) if price is None else price
     return f"""
     <div class="cart-item">
-        <div style="display: flex; justify-content: space-between; align-items: center;">
+        <div class="card-row">
             <div>
                 <h4>{item['product_name']}</h4>
-                <div style="display: flex; gap: 10px; margin-top: 5px;">
-                    <span class="price-tag">₹{item['price']}</span>
+                <div class="card-tags">
+                    <span class="price-tag">₹{price:.2f}</span>
                     <span class="star-rating">⭐ {item['rating']}</span>
                     <span class="category-badge">{item['category']}</span>
                 </div>
             </div>
+            <span class="price-tag">× {quantity}</span>
+        </div>
+    </div>
+    """
+
+def compare_card(product, side="left"):
+    """Return one side of a product comparison; ``side`` is "left" or "right"."""
+    return f"""
+    <div class="compare-card compare-card--{side}">
+        <h4>{product['product_name']}</h4>
+        <div class="card-row">
+            <span class="price-tag">₹{product['price']}</span>
+            <span class="star-rating">⭐ {product['rating']}</span>
         </div>
+        <p class="card-meta">Category: {product['category']}</p>
+    </div>
+    """
+
+def order_summary_item(item, quantity=1, price=None):
+    """Return a line of the checkout order summary; ``price`` is as in ``cart_item``."""
+    price = float(item['price']) if price is None else price
+    return f"""
+    <div class="summary-line">
+        <div class="line-info">
+            <p class="line-name">{item['product_name']}</p>
+            <p class="line-meta">{item['category']} · Qty {quantity}</p>
+        </div>
+        <p class="line-amount">₹{price * quantity:.2f}</p>
     </div>
     """
 
@@ -74,7 +115,7 @@ def total_price(amount):
     """Return the total price HTML."""
     return f"""
     <div class="total-price">
-        <div style="display: flex; justify-content: space-between; align-items: center;">
+        <div class="card-row">
             <span>Bag Total:</span>
             <span>₹{amount:.2f}</span>
         </div>
@@ -193,16 +234,17 @@ def order_details(order):
     </div>
     """
 
-def order_item(item):
-    """Return an ordered item HTML."""
+def order_item(line, category=""):
+    """Return an ordered item HTML for an order line snapshot."""
+    quantity = f" × {line.quantity}" if line.quantity > 1 else ""
     return f"""
-    <div style="background-color: #F9F9F9; border-radius: 12px; padding: 15px; margin: 10px 0; display: flex; justify-content: space-between; align-items: center;">
+    <div class="order-line">
         <div>
-            <p style="margin: 0; font-weight: bold;">{item['product_name']}</p>
-            <p style="margin: 5px 0; color: #888; font-size: 14px;">{item['category']}</p>
+            <p class="line-name">{line.name}</p>
+            <p class="line-meta">{category}</p>
         </div>
         <div>
-            <p style="margin: 0; font-weight: bold; color: #FF9EAA;">₹{item['price']}</p>
+            <p class="line-amount">₹{line.price:.2f}{quantity}</p>
         </div>
     </div>
     """
@@ -224,9 +266,6 @@ def footer():
     </div>
     """
 
-def load_css():
-    """Return the HTML to load the external CSS file."""
-    return """
-    <link rel="stylesheet" href="styles.css">
-    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    """
\ No newline at end of file
+def load_css(href):
+    """Return the HTML that links the app stylesheet served at ``href``."""
+    return f'<link rel="stylesheet" href="{href}">'
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Stock levels and cart reservations in a local SQLite database.
+
+Adding to the bag reserves units for a limited time; other sessions can only
+buy what is on hand minus live reservations. Checkout decrements stock with
+optimistic concurrency: stock rows are read without locks, and the decrement
+only applies if each row's version is unchanged, retrying on conflict. Taking
+a reservation bumps the version too, so a checkout cannot sell units another
+session reserved after the read. All lines of an order succeed or fail
+together, so stock never goes negative.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INVENTORY_DB = os.path.join("data", "inventory.db")
+
+# Stock for products whose CSV row has no ``stock`` column
+DEFAULT_STOCK = 50
+
+# Seconds a bag reservation holds stock
+RESERVATION_TTL = 15 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock (
+    product_id INTEGER PRIMARY KEY,
+    on_hand INTEGER NOT NULL CHECK (on_hand >= 0),
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    session_id TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (product_id, session_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_reservations_session ON reservations (session_id);
+CREATE INDEX IF NOT EXISTS idx_reservations_expires ON reservations (expires_at);
+"""
+
+# Units of one product reserved by sessions other than the caller
+_RESERVED_BY_OTHERS = """
+SELECT COALESCE(SUM(quantity), 0) FROM reservations
+WHERE product_id = ? AND session_id != ? AND expires_at > ?
+"""
+
+
+class OutOfStock(Exception):
+    """Raised when an order asks for more units than are available."""
+
+    def __init__(self, product_id: int, available: int) -> None:
+        super().__init__(f"Only {available} left of product {product_id}")
+        self.product_id = product_id
+        self.available = available
+
+
+class Inventory:
+    """Stock counts plus per-session reservations; safe across threads and processes."""
+
+    def __init__(self, path: str = INVENTORY_DB, reservation_ttl: float = RESERVATION_TTL,
+                 max_retries: int = 20) -> None:
+        self.path = path
+        self.reservation_ttl = reservation_ttl
+        self.max_retries = max_retries
+        self.conflicts = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite serialises writers across processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def seed(self, stock: Iterable[Tuple[int, int]]) -> None:
+        """Create stock rows for products that have none; existing counts are kept."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR IGNORE INTO stock (product_id, on_hand) VALUES (?, ?)", stock)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def restock(self, product_id: int, quantity: int) -> None:
+        self._conn().execute("UPDATE stock SET on_hand = on_hand + ?, version = version + 1 WHERE product_id = ?",
+                             (quantity, product_id))
+
+    # --- Queries ---
+    def on_hand(self, product_id: int) -> int:
+        row = self._conn().execute("SELECT on_hand FROM stock WHERE product_id = ?", (product_id,)).fetchone()
+        return row[0] if row else 0
+
+    def available(self, product_id: int, session_id: str = "") -> int:
+        """Units ``session_id`` could still buy: on hand minus other sessions' reservations."""
+        conn = self._conn()
+        on_hand = self.on_hand(product_id)
+        reserved = conn.execute(_RESERVED_BY_OTHERS, (product_id, session_id, time.time())).fetchone()[0]
+        return max(on_hand - reserved, 0)
+
+    def availability(self, product_ids: Iterable[int], session_id: str = "") -> Dict[int, int]:
+        """``available`` for several products in one query; products without stock rows get 0."""
+        ids = list(product_ids)
+        if not ids:
+            return {}
+        rows = self._conn().execute(
+            "SELECT product_id, on_hand - COALESCE((SELECT SUM(quantity) FROM reservations r "
+            "WHERE r.product_id = stock.product_id AND r.session_id != ? AND r.expires_at > ?), 0) "
+            f"FROM stock WHERE product_id IN ({','.join('?' * len(ids))})", [session_id, time.time(), *ids])
+        found = dict(rows.fetchall())
+        return {pid: max(found.get(pid, 0), 0) for pid in ids}
+
+    def levels(self, product_ids: Iterable[int]) -> Dict[int, int]:
+        """On-hand counts for several products in one query."""
+        ids = list(product_ids)
+        if not ids:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT product_id, on_hand FROM stock WHERE product_id IN ({','.join('?' * len(ids))})", ids)
+        return dict(rows.fetchall())
+
+    # --- Reservations ---
+    def reserve(self, session_id: str, product_id: int, quantity: int) -> int:
+        """Hold ``quantity`` units for a session's bag; returns how many could be held."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM reservations WHERE expires_at <= ?", (now,))
+            on_hand = conn.execute("SELECT on_hand FROM stock WHERE product_id = ?", (product_id,)).fetchone()
+            reserved = conn.execute(_RESERVED_BY_OTHERS, (product_id, session_id, now)).fetchone()[0]
+            held = max(min(quantity, (on_hand[0] if on_hand else 0) - reserved), 0)
+            if held:
+                conn.execute("INSERT OR REPLACE INTO reservations VALUES (?, ?, ?, ?)",
+                             (session_id, product_id, held, now + self.reservation_ttl))
+                # Checkouts that read this row before the reservation must re-check it
+                conn.execute("UPDATE stock SET version = version + 1 WHERE product_id = ?", (product_id,))
+            else:
+                conn.execute("DELETE FROM reservations WHERE product_id = ? AND session_id = ?",
+                             (product_id, session_id))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return held
+
+    def release(self, session_id: str, product_id: Optional[int] = None) -> None:
+        """Drop one reservation, or every reservation of the session."""
+        if product_id is None:
+            self._conn().execute("DELETE FROM reservations WHERE session_id = ?", (session_id,))
+        else:
+            self._conn().execute("DELETE FROM reservations WHERE product_id = ? AND session_id = ?",
+                                 (product_id, session_id))
+
+    # --- Checkout ---
+    def commit(self, session_id: str, lines: Iterable[Tuple[int, int]]) -> None:
+        """Atomically take ``(product_id, quantity)`` lines out of stock and drop the session's reservations.
+
+        Raises ``OutOfStock`` (and changes nothing) if any line cannot be filled.
+        """
+        lines = list(lines)
+        conn = self._conn()
+        for _ in range(self.max_retries):
+            # Optimistic read: no lock is held while we check availability
+            now = time.time()
+            snapshot: List[Tuple[int, int, int]] = []
+            for product_id, quantity in lines:
+                row = conn.execute("SELECT on_hand, version FROM stock WHERE product_id = ?",
+                                   (product_id,)).fetchone()
+                on_hand, version = row if row else (0, 0)
+                reserved = conn.execute(_RESERVED_BY_OTHERS, (product_id, session_id, now)).fetchone()[0]
+                if on_hand - reserved < quantity:
+                    raise OutOfStock(product_id, max(on_hand - reserved, 0))
+                snapshot.append((product_id, quantity, version))
+
+            # Validate and write: each row must still be at the version we read
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for product_id, quantity, version in snapshot:
+                    updated = conn.execute(
+                        "UPDATE stock SET on_hand = on_hand - ?, version = version + 1 "
+                        "WHERE product_id = ? AND version = ?", (quantity, product_id, version)).rowcount
+                    if not updated:
+                        break
+                else:
+                    conn.execute("DELETE FROM reservations WHERE session_id = ?", (session_id,))
+                    conn.execute("COMMIT")
+                    return
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            self.conflicts += 1
+        raise sqlite3.OperationalError(f"stock update kept conflicting after {self.max_retries} attempts")
+
+    def cancel(self, lines: Iterable[Tuple[int, int]]) -> None:
+        """Put the stock of a failed order back."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE stock SET on_hand = on_hand + ?, version = version + 1 WHERE product_id = ?",
+                             [(quantity, product_id) for product_id, quantity in lines])
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
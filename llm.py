@@ -0,0 +1,85 @@
+"""
+Client for the local Ollama model and the prompts Qoozee sends to it.
+Kept free of Streamlit so batch jobs can build the same prompts as the app.
+"""
+
+from typing import Iterable, Optional
+
+import requests
+
+import local_answers
+from catalog import CatalogIndex
+
+OLLAMA_URL = "http://localhost:11434/api/generate"
+MODEL = "llama3.2"
+
+
+def generate(prompt: str, timeout: float = 10) -> str:
+    """Send a prompt to the model; raises requests.RequestException on failure."""
+    response = requests.post(
+        OLLAMA_URL,
+        json={
+            "model": MODEL,
+            "prompt": prompt,
+            "stream": False
+        },
+        timeout=timeout  # Shorter timeout to fail faster
+    )
+    response.raise_for_status()
+    return response.json().get("response", "No response from AI.")
+
+
+# --- Prompt Generators ---
+def get_persona_product_prompt(catalog: CatalogIndex, persona: Optional[str] = None, 
+                              category: Optional[str] = None, max_price: Optional[float] = None) -> str:
+    """Generate a personalized prompt for product recommendations."""
+    rows = local_answers.persona_candidates(catalog, persona, category, max_price)  # Limit to 10 products
+    filtered_products = catalog.rows_to_products(rows)
+    
+    if not filtered_products:
+        return "There are no products matching your criteria."
+    
+    prompt = "You are a smart shopping assistant helping someone find a product.\n"
+    if persona:
+        prompt += f"The customer is: {persona}\n"
+    
+    prompt += "Here is a list of available products:\n\n"
+    for product in filtered_products:
+        prompt += f"- {product['product_name']} | ₹{product['price']} | ⭐ {product['rating']} | {product['category']}\n"
+    
+    prompt += "\nBased on the customer's needs and preferences, recommend the best product. "
+    prompt += "Explain why it's a good fit for them specifically."
+    
+    return prompt
+
+def get_cart_based_suggestion_prompt(cart: Iterable[int], catalog: CatalogIndex) -> str:
+    """Generate a prompt for recommendations based on cart contents."""
+    cart = list(cart)
+    
+    # Get cart products
+    cart_products = [catalog.get(pid) for pid in cart if catalog.get(pid)]
+    
+    if not cart_products:
+        return "The cart is empty. Please add some products first."
+    
+    # Get complementary products not in cart
+    other_products = catalog.rows_to_products(local_answers.cart_candidates(catalog, cart))  # Limit to 5 products
+    
+    # Format cart list
+    cart_desc = "\n".join(f"- {p['product_name']} | ₹{p['price']} | {p['category']}" 
+                        for p in cart_products)
+
+    # Format remaining product list
+    other_desc = "\n".join(f"- {p['product_name']} | ₹{p['price']} | {p['category']}" 
+                         for p in other_products)
+
+    prompt = f"""
+Based on these items in the customer's cart:
+{cart_desc}
+
+Suggest 1-2 of these products that would complement the cart items well:
+{other_desc}
+
+Explain why each suggestion pairs well with the existing cart items.
+"""
+    return prompt
@@ -0,0 +1,152 @@
+"""
+Template-based answers generated from the catalog index.
+Used when the LLM is unreachable, and as a standalone "no-LLM" mode for load tests.
+Every product named in an answer comes from the same candidate set the LLM prompt uses.
+"""
+
+import zlib
+from typing import Iterable, List, Optional
+
+from catalog import CatalogIndex, ProductType, tokenize
+from query_parser import INTENT_COMPARE, INTENT_FIND, QueryParser, run_query
+
+_PERSONA_TEMPLATES = [
+    "For {who}, I'd recommend the {name} (₹{price}, ⭐ {rating}). {reason}",
+    "My top pick for {who} is the {name} at ₹{price}. {reason}",
+    "{who_cap} would love the {name} - ₹{price} with a ⭐ {rating} rating. {reason}",
+]
+
+_PAIRING_TEMPLATES = [
+    "The {name} (₹{price}) pairs nicely with your {anchor}. {reason}",
+    "Add the {name} for ₹{price} - it goes well with your {anchor}. {reason}",
+]
+
+
+def persona_candidates(catalog: CatalogIndex, persona: Optional[str] = None,
+                       category: Optional[str] = None, max_price: Optional[float] = None,
+                       limit: int = 10) -> List[int]:
+    """Pick the rows to recommend from: persona keyword matches first, then top rated."""
+    rows = catalog.search(category, max_price)
+    if not rows:
+        return []
+
+    ranked = catalog.rank(rows, "rating", 0, limit)
+    keywords = [t for t in tokenize(persona or "") if len(t) > 2 and t in catalog.rows_by_token]
+    if not keywords:
+        return ranked
+
+    allowed = set(rows)
+    matched = set()
+    for token in keywords:
+        matched |= catalog.rows_by_token[token] & allowed
+    preferred = catalog.rank(list(matched), "rating", 0, limit)
+    return (preferred + [row for row in ranked if row not in matched])[:limit]
+
+
+def cart_candidates(catalog: CatalogIndex, cart_ids: Iterable[int], limit: int = 5) -> List[int]:
+    """Pick complement rows for a cart: top rated items from the cart's categories first."""
+    in_cart = set(cart_ids)
+    cart_rows = [catalog.row_by_id[pid] for pid in in_cart if pid in catalog.row_by_id]
+    categories = {catalog.categories[row].lower() for row in cart_rows}
+
+    same_category = [
+        row for category in categories
+        for row in catalog.rows_by_category.get(category, [])
+        if catalog.ids[row] not in in_cart
+    ]
+    picks = catalog.rank(same_category, "rating", 0, limit)
+    if len(picks) < limit:
+        taken = set(picks) | set(cart_rows)
+        for row in catalog.sorted_rows("rating"):
+            if row not in taken:
+                picks.append(row)
+                if len(picks) == limit:
+                    break
+    return picks
+
+
+def recommend_for_persona(catalog: CatalogIndex, persona: Optional[str] = None,
+                          category: Optional[str] = None, max_price: Optional[float] = None) -> str:
+    """Answer the persona recommendation prompt from the catalog."""
+    rows = persona_candidates(catalog, persona, category, max_price)
+    if not rows:
+        return "There are no products matching your criteria. Try a bigger budget or another category."
+
+    best, others = rows[0], rows[1:3]
+    who = persona.strip().rstrip(".") if persona and persona.strip() else "you"
+    reason = _reason(catalog, best, rows, max_price)
+
+    template = _PERSONA_TEMPLATES[zlib.crc32(who.encode()) % len(_PERSONA_TEMPLATES)]
+    answer = template.format(who=who, who_cap=who[:1].upper() + who[1:], reason=reason,
+                             **_fields(catalog.products[best]))
+    if others:
+        answer += "\n\nAlso worth a look: " + ", ".join(
+            f"{catalog.products[row]['product_name']} (₹{catalog.products[row]['price']})" for row in others
+        ) + "."
+    return answer
+
+
+def suggest_for_cart(catalog: CatalogIndex, cart_ids: Iterable[int]) -> str:
+    """Answer the cart complement prompt from the catalog."""
+    cart_ids = list(cart_ids)
+    cart = [catalog.get(pid) for pid in cart_ids if catalog.get(pid)]
+    if not cart:
+        return "The cart is empty. Please add some products first."
+
+    lines = []
+    for i, row in enumerate(cart_candidates(catalog, cart_ids, limit=2)):
+        product = catalog.products[row]
+        anchor = next((p for p in cart if p['category'] == product['category']), cart[0])
+        if anchor['category'] == product['category']:
+            reason = f"Both are {product['category']} essentials, and it's rated ⭐ {product['rating']}."
+        else:
+            reason = f"It's one of our top rated picks at ⭐ {product['rating']}."
+        template = _PAIRING_TEMPLATES[i % len(_PAIRING_TEMPLATES)]
+        lines.append(template.format(anchor=anchor['product_name'], reason=reason, **_fields(product)))
+    return "\n\n".join(lines) if lines else "Your bag already has our best matches!"
+
+
+def answer_question(catalog: CatalogIndex, parser: QueryParser, question: str) -> str:
+    """Answer a free-form shopping question from the catalog where possible."""
+    query = parser.parse(question)
+
+    if query.intent == INTENT_COMPARE:
+        first, second = (catalog.find_by_name(name) for name in query.names)
+        if first and second:
+            winner = max((first, second), key=_value)
+            return (f"{first['product_name']} is ₹{first['price']} (⭐ {first['rating']}) and "
+                    f"{second['product_name']} is ₹{second['price']} (⭐ {second['rating']}). "
+                    f"I'd go for the {winner['product_name']} - it gives more rating per rupee.")
+
+    if query.intent == INTENT_FIND:
+        matches = run_query(query, catalog, limit=3)
+        if matches:
+            return "Here's what I found:\n" + "\n".join(
+                f"- {p['product_name']} | ₹{p['price']} | ⭐ {p['rating']}" for p in matches
+            )
+
+    trending = catalog.rows_to_products(catalog.sorted_rows("rating")[:3])
+    return "I couldn't find an exact match, but these are trending right now:\n" + "\n".join(
+        f"- {p['product_name']} | ₹{p['price']} | ⭐ {p['rating']}" for p in trending
+    )
+
+
+def _fields(product: ProductType) -> dict:
+    return {"name": product['product_name'], "price": product['price'],
+            "rating": product['rating'], "category": product['category']}
+
+
+def _value(product: ProductType) -> float:
+    price = float(product['price'])
+    return float(product['rating']) / price if price else 0.0
+
+
+def _reason(catalog: CatalogIndex, best: int, rows: List[int], max_price: Optional[float]) -> str:
+    product = catalog.products[best]
+    if catalog.ratings[best] >= max(catalog.ratings[row] for row in rows):
+        reason = f"It's the highest rated {product['category']} pick"
+    else:
+        reason = f"It matches what they're into and is well rated in {product['category']}"
+    if max_price:
+        reason += f" within your ₹{max_price:.0f} budget"
+    return reason + "."
@@ -0,0 +1,56 @@
+"""
+Thread-safe LRU shared by the process-wide caches (HTML fragments, ranked
+search results, search-term bitmaps).
+
+A miss is built outside the lock: holding it while one session renders or
+ranks would make every other session wait, even for keys that are already
+cached. The cost is that two sessions missing the same key at the same time
+both build it and the later result is kept, which is harmless for values that
+only depend on the key.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+class LockedLRU(Generic[V]):
+    """Bounded key -> value map whose misses are built by the caller's function."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, build: Callable[[], V]) -> V:
+        """Return the value under ``key``, calling ``build()`` (unlocked) on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,162 @@
+"""
+Aho-Corasick matcher that finds catalog product names mentioned in AI responses.
+The automaton is built once per catalog version; scanning is linear in the
+length of the response no matter how many products the catalog holds.
+"""
+
+from html import escape
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Mention(NamedTuple):
+    """A product name found at ``text[start:end]``."""
+    start: int
+    end: int
+    product_id: int
+
+
+class MentionAutomaton:
+    """Case-insensitive Aho-Corasick automaton over product names."""
+
+    def __init__(self, names: Iterable[Tuple[str, int]]) -> None:
+        # Node 0 is the root; each node has transitions, a fail link and an output
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Name ending exactly at a node: (length, product_id)
+        self._output: List[Optional[Tuple[int, int]]] = [None]
+        # Nearest node on the fail chain that has an output
+        self._dict_link: List[int] = [0]
+
+        for name, product_id in names:
+            key = name.lower().strip()
+            if key:
+                self._insert(key, product_id)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def _insert(self, key: str, product_id: int) -> None:
+        node = 0
+        for char in key:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._dict_link.append(0)
+            node = nxt
+        # First product with a given name wins, matching find_by_name
+        if self._output[node] is None:
+            self._output[node] = (len(key), product_id)
+
+    def _link(self) -> None:
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                target = target if target != child else 0
+                self._fail[child] = target
+                self._dict_link[child] = target if self._output[target] else self._dict_link[target]
+
+    def step(self, node: int, char: str) -> int:
+        """Advance the automaton from ``node`` by one character."""
+        goto, fail = self._goto, self._fail
+        while node and char not in goto[node]:
+            node = fail[node]
+        return goto[node].get(char, 0)
+
+    def matches(self, node: int) -> Iterable[Tuple[int, int]]:
+        """Yield (length, product_id) for every name ending at ``node``, longest first."""
+        if self._output[node] is None:
+            node = self._dict_link[node]
+        while node:
+            yield self._output[node]
+            node = self._dict_link[node]
+
+    def scanner(self) -> "MentionScanner":
+        """Return a scanner for text that arrives in chunks."""
+        return MentionScanner(self)
+
+    def find(self, text: str) -> List[Mention]:
+        """Return non-overlapping, whole-word mentions in ``text``."""
+        scanner = self.scanner()
+        scanner.feed(text)
+        return scanner.close()
+
+
+class MentionScanner:
+    """Incremental scanner; feed streamed response chunks, then close()."""
+
+    def __init__(self, automaton: MentionAutomaton) -> None:
+        self._automaton = automaton
+        self._node = 0
+        self._pos = 0
+        # Offsets that follow a non-alphanumeric character, i.e. where a word may start
+        self._word_starts = {0}
+        # Candidate whose word boundary depends on the next character
+        self._pending: Optional[Mention] = None
+        self._mentions: List[Mention] = []
+
+    def feed(self, chunk: str) -> List[Mention]:
+        """Scan the next chunk and return the mentions it confirmed."""
+        found_before = len(self._mentions)
+        automaton, word_starts = self._automaton, self._word_starts
+
+        for char in chunk.lower():
+            if self._pending is not None:
+                self._settle(not char.isalnum())
+            self._node = automaton.step(self._node, char)
+            self._pos += 1
+            for length, product_id in automaton.matches(self._node):
+                if self._pos - length in word_starts:
+                    self._pending = Mention(self._pos - length, self._pos, product_id)
+                    break
+            if not char.isalnum():
+                word_starts.add(self._pos)
+        return self._mentions[found_before:]
+
+    def close(self) -> List[Mention]:
+        """Finish the stream and return every mention found."""
+        if self._pending is not None:
+            self._settle(True)
+        return self._mentions
+
+    def _settle(self, at_boundary: bool) -> None:
+        pending, self._pending = self._pending, None
+        if not at_boundary:
+            return
+        mentions = self._mentions
+        # Prefer the longer of two overlapping matches
+        while mentions and mentions[-1].end > pending.start:
+            if mentions[-1].end - mentions[-1].start >= pending.end - pending.start:
+                return
+            mentions.pop()
+        mentions.append(pending)
+
+
+def mentioned_products(mentions: Iterable[Mention], limit: Optional[int] = None) -> List[int]:
+    """Unique product ids in order of first mention."""
+    seen: Dict[int, None] = {}
+    for mention in mentions:
+        seen.setdefault(mention.product_id)
+        if limit and len(seen) >= limit:
+            break
+    return list(seen)
+
+
+def highlight(text: str, mentions: List[Mention]) -> str:
+    """HTML-escape ``text`` and wrap each mention in a highlight span."""
+    parts, last = [], 0
+    for mention in mentions:
+        parts.append(escape(text[last:mention.start]))
+        parts.append(f'<span class="product-mention">{escape(text[mention.start:mention.end])}</span>')
+        last = mention.end
+    parts.append(escape(text[last:]))
+    return "".join(parts)
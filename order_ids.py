@@ -0,0 +1,137 @@
+"""
+Snowflake-style order ids: 41 bits of milliseconds since ``EPOCH_MS``, 10 bits
+of worker id and 12 bits of per-millisecond sequence.
+
+Ids are unique across worker processes as long as each process holds its own
+worker id (a free one from its host's range), and they grow with time so
+inserts land at the end of the order store's primary key. Within a process each millisecond gets its own
+``itertools.count``, so concurrent checkouts never take a lock.
+"""
+
+import itertools
+import os
+import time
+from typing import Dict, Iterator, Optional
+
+# 2024-01-01T00:00:00Z; 41 bits of milliseconds lasts about 69 years from here
+EPOCH_MS = 1704067200000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# Per-millisecond counters older than this are dropped
+PRUNE_AFTER_MS = 5000
+
+WORKER_ID_ENV = "QOOZEE_WORKER_ID"
+WORKERS_PER_HOST_ENV = "QOOZEE_WORKERS_PER_HOST"
+DEFAULT_WORKERS_PER_HOST = 32
+WORKER_LOCK_DIR = os.path.join("data", "workers")
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class OrderIdGenerator:
+    """Roughly time-ordered 63-bit ids for one process."""
+
+    def __init__(self, worker_id: Optional[int] = None) -> None:
+        self.worker_id = claim_worker_id() if worker_id is None else worker_id
+        if not 0 <= self.worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker id must be between 0 and {MAX_WORKER_ID}")
+        # One counter per millisecond. dict.setdefault and next() on a count are
+        # each atomic under the GIL, so concurrent callers never share a sequence
+        self._sequences: Dict[int, Iterator[int]] = {}
+        self._floor_ms = 0
+        self._last_ms = 0
+
+    def next_id(self) -> int:
+        while True:
+            now = self._now()
+            fresh = itertools.count()
+            counter = self._sequences.setdefault(now, fresh)
+            sequence = next(counter)
+            if counter is fresh:
+                self._prune(now)
+            # A caller stalled past the prune window may have revived a dropped
+            # counter, and a full millisecond has no sequences left; both retry
+            if sequence <= SEQUENCE_MASK and now >= self._floor_ms:
+                return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | sequence
+            time.sleep(0.0001)
+
+    __call__ = next_id
+
+    def _now(self) -> int:
+        # Never let a clock step backwards reorder ids
+        now = max(int(time.time() * 1000) - EPOCH_MS, self._last_ms)
+        self._last_ms = now
+        return now
+
+    def _prune(self, now: int) -> None:
+        floor = now - PRUNE_AFTER_MS
+        if floor <= self._floor_ms:
+            return
+        # Raise the floor before dropping counters so stragglers notice
+        self._floor_ms = floor
+        for ms in [ms for ms in list(self._sequences) if ms < floor]:
+            self._sequences.pop(ms, None)
+
+
+def decode(order_id: int) -> Dict[str, int]:
+    """Split an id back into its timestamp (unix ms), worker id and sequence."""
+    return {
+        "timestamp_ms": (order_id >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS,
+        "worker_id": (order_id >> SEQUENCE_BITS) & MAX_WORKER_ID,
+        "sequence": order_id & SEQUENCE_MASK,
+    }
+
+
+# --- Worker Ids ---
+_worker_lock = None
+
+
+def worker_range() -> range:
+    """Worker ids this host may hand out.
+
+    ``QOOZEE_WORKER_ID`` is the first id of the host's range and
+    ``QOOZEE_WORKERS_PER_HOST`` its size (32 by default), so hosts sharing an
+    order store must be given non-overlapping ranges. A host without it owns
+    every id.
+    """
+    if not os.environ.get(WORKER_ID_ENV):
+        return range(MAX_WORKER_ID + 1)
+    base = int(os.environ[WORKER_ID_ENV])
+    size = int(os.environ.get(WORKERS_PER_HOST_ENV) or DEFAULT_WORKERS_PER_HOST)
+    if size < 1 or not 0 <= base <= base + size - 1 <= MAX_WORKER_ID:
+        raise ValueError(f"{WORKER_ID_ENV}={base} with {size} workers per host "
+                         f"does not fit in worker ids 0-{MAX_WORKER_ID}")
+    return range(base, base + size)
+
+
+def claim_worker_id(lock_dir: str = WORKER_LOCK_DIR) -> int:
+    """Pick a worker id in this host's range that no other live process on the host is using.
+
+    The first free slot in ``lock_dir`` is locked for the life of the process;
+    the OS releases it if the process dies. Without ``fcntl`` the pid picks the slot.
+    """
+    global _worker_lock
+    ids = worker_range()
+    if fcntl is None:
+        return ids[os.getpid() % len(ids)]
+
+    os.makedirs(lock_dir, exist_ok=True)
+    start = os.getpid() % len(ids)
+    for offset in range(len(ids)):
+        worker_id = ids[(start + offset) % len(ids)]
+        f = open(os.path.join(lock_dir, f"worker-{worker_id}.lock"), "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            continue
+        _worker_lock = f
+        return worker_id
+    raise RuntimeError(f"all {len(ids)} worker ids from {ids[0]} to {ids[-1]} are in use")
@@ -0,0 +1,216 @@
+"""
+Durable order storage in a local SQLite database.
+
+The database runs in WAL mode so readers never block the writer. Checkouts
+from every session are funnelled through one writer thread that commits
+whatever has queued up in a single transaction (group commit), and history
+is read back in indexed, paginated queries.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from cart import OrderLine
+
+ORDER_DB = os.path.join("data", "orders.db")
+
+OrderType = Dict[str, Any]
+
+_COLUMNS = ("order_id", "session_id", "date", "name", "email", "phone", "address",
+            "payment_method", "items", "total", "delivery_date")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    address TEXT NOT NULL,
+    payment_method TEXT NOT NULL,
+    items TEXT NOT NULL,
+    total REAL NOT NULL,
+    delivery_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_email_date ON orders (email, date);
+CREATE INDEX IF NOT EXISTS idx_orders_session_date ON orders (session_id, date);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders (date);
+"""
+
+
+class OrderStore:
+    """Pooled SQLite connections plus a group-commit writer thread."""
+
+    def __init__(self, path: str = ORDER_DB, pool_size: int = 4, max_batch: int = 256) -> None:
+        self.path = path
+        self.max_batch = max_batch
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+        self._writes: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="qoozee-order-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection."""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        self._writes.put(None)
+        self._writer.join(timeout=5)
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    # --- Writes ---
+    def place(self, order: OrderType) -> None:
+        """Persist one order; returns once it is committed.
+
+        Raises the writer's ``sqlite3.Error`` if the order was not stored. There
+        is no timeout: an order still queued or committing may yet be stored, so
+        only the writer's answer tells the caller whether to undo anything.
+        """
+        self.place_async(order).result()
+
+    def place_async(self, order: OrderType) -> Future:
+        """Queue one order for the next group commit; the writer resolves the future either way."""
+        future: Future = Future()
+        self._writes.put((_to_row(order), future))
+        return future
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            batch = [item]
+            # Everything that queued while the last commit ran goes in this one
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._writes.put(None)
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[tuple]) -> None:
+        sql = f"INSERT INTO orders ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+        try:
+            with conn:
+                conn.executemany(sql, [row for row, _ in batch])
+        except sqlite3.IntegrityError:
+            # Fall back to one transaction per order so one bad row fails alone
+            for row, future in batch:
+                try:
+                    with conn:
+                        conn.execute(sql, row)
+                    future.set_result(None)
+                except sqlite3.Error as e:
+                    future.set_exception(e)
+            return
+        except sqlite3.Error as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for _, future in batch:
+            future.set_result(None)
+
+    # --- Queries ---
+    def get(self, order_id: int) -> Optional[OrderType]:
+        with self.connection() as conn:
+            row = conn.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+        return _from_row(row) if row else None
+
+    def history(self, session_id: Optional[str] = None, email: Optional[str] = None,
+                limit: int = 10, offset: int = 0, after: Optional[int] = None) -> List[OrderType]:
+        """Newest-first page of orders for a session or customer email, optionally only ids above ``after``."""
+        where, params = _filter(session_id, email, after)
+        sql = f"SELECT * FROM orders{where} ORDER BY date DESC, order_id DESC LIMIT ? OFFSET ?"
+        with self.connection() as conn:
+            rows = conn.execute(sql, (*params, limit, offset)).fetchall()
+        return [_from_row(row) for row in rows]
+
+    def latest(self, session_id: Optional[str] = None, email: Optional[str] = None,
+               after: Optional[int] = None) -> Optional[OrderType]:
+        page = self.history(session_id, email, limit=1, after=after)
+        return page[0] if page else None
+
+    def count(self, session_id: Optional[str] = None, email: Optional[str] = None,
+              after: Optional[int] = None) -> int:
+        where, params = _filter(session_id, email, after)
+        with self.connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM orders{where}", params).fetchone()[0]
+
+    def iter_item_ids(self, batch_size: int = 1000) -> Iterator[List[int]]:
+        """Yield the product ids of every stored order, for offline jobs."""
+        with self.connection() as conn:
+            cursor = conn.execute("SELECT items FROM orders ORDER BY order_id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (items,) in rows:
+                    yield [_line(item).product_id for item in json.loads(items)]
+
+
+def _filter(session_id: Optional[str], email: Optional[str], after: Optional[int] = None) -> tuple:
+    clauses, params = [], []
+    if session_id is not None:
+        clauses.append("session_id = ?")
+        params.append(session_id)
+    if email is not None:
+        clauses.append("email = ?")
+        params.append(email)
+    if after is not None:
+        clauses.append("order_id > ?")
+        params.append(after)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, tuple(params)
+
+
+def _to_row(order: OrderType) -> tuple:
+    # Order lines are tuples, so each one is stored as a bare JSON array
+    values = dict(order, items=json.dumps(order["items"], separators=(",", ":"), ensure_ascii=False))
+    return tuple(values[column] for column in _COLUMNS)
+
+
+def _from_row(row: sqlite3.Row) -> OrderType:
+    order = dict(row)
+    order["items"] = [_line(item) for item in json.loads(order["items"])]
+    return order
+
+
+def _line(item: Union[list, Dict[str, Any]]) -> OrderLine:
+    if isinstance(item, list):
+        return OrderLine(*item)
+    # Orders stored before line items were compacted held whole product rows
+    return OrderLine(int(item["product_id"]), int(item.get("quantity", 1)),
+                     round(float(item["price"]) * 100), item["product_name"])
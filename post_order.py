@@ -0,0 +1,199 @@
+"""
+Background work that follows a committed order.
+
+Checkout only persists the order and clears the cart before confirming. Every
+other step (analytics events, the confirmation message, refreshing cart
+suggestions, stock updates) is queued here and run by worker threads, with
+retries and per-handler metrics.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import behavior
+import llm
+import precompute
+from catalog import CatalogIndex
+from event_log import EventLogger
+
+OUTBOX_FILE = os.path.join("data", "notifications", "outbox.jsonl")
+
+OrderType = Dict[str, Any]
+Handler = Callable[[OrderType, CatalogIndex], None]
+
+
+class Job(NamedTuple):
+    handler: str
+    order: OrderType
+    catalog: CatalogIndex
+    attempt: int
+    queued_at: float
+
+
+class HandlerStats:
+    __slots__ = ("succeeded", "retried", "failed", "total_seconds")
+
+    def __init__(self) -> None:
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+
+class PostOrderQueue:
+    """Fans each order out to every registered handler on a worker pool."""
+
+    def __init__(self, workers: int = 2, max_attempts: int = 4, base_delay: float = 0.5,
+                 max_queue: int = 10000) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self._handlers: Dict[str, Handler] = {}
+        self._stats: Dict[str, HandlerStats] = {}
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue)
+        # (handler, order_id, error) of jobs that ran out of attempts
+        self.dead_letters: Deque[Tuple[str, int, str]] = deque(maxlen=100)
+        self.submitted = 0
+        self.dropped = 0
+        self._workers = [threading.Thread(target=self._run, name=f"qoozee-post-order-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def register(self, name: str, handler: Handler) -> None:
+        self._handlers[name] = handler
+        self._stats[name] = HandlerStats()
+
+    def submit(self, order: OrderType, catalog: CatalogIndex) -> None:
+        """Queue every handler for one committed order; returns immediately."""
+        self.submitted += 1
+        now = time.time()
+        for name in self._handlers:
+            self._put(Job(name, order, catalog, 1, now))
+
+    def close(self, timeout: float = 5) -> None:
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "queued": self.depth,
+            "dropped": self.dropped,
+            "dead_letters": len(self.dead_letters),
+            "handlers": {
+                name: {"succeeded": s.succeeded, "retried": s.retried, "failed": s.failed,
+                       "avg_ms": round(1000 * s.total_seconds / s.succeeded, 2) if s.succeeded else 0.0}
+                for name, s in self._stats.items()
+            },
+        }
+
+    def _put(self, job: Job) -> None:
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.dropped += 1
+            self.dead_letters.append((job.handler, job.order["order_id"], "queue full"))
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            stats = self._stats[job.handler]
+            start = time.perf_counter()
+            try:
+                self._handlers[job.handler](job.order, job.catalog)
+            except Exception as e:
+                if job.attempt < self.max_attempts:
+                    stats.retried += 1
+                    # Exponential backoff without holding a worker
+                    delay = self.base_delay * 2 ** (job.attempt - 1)
+                    timer = threading.Timer(delay, self._put, args=(job._replace(attempt=job.attempt + 1),))
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    stats.failed += 1
+                    self.dead_letters.append((job.handler, job.order["order_id"], str(e)))
+                    print(f"Post-order {job.handler} failed for order {job.order['order_id']}: {str(e)}")
+                continue
+            stats.succeeded += 1
+            stats.total_seconds += time.perf_counter() - start
+
+
+# --- Handlers ---
+def analytics_handler(logger: EventLogger) -> Handler:
+    """Log one purchase event per order line."""
+    def handle(order: OrderType, catalog: CatalogIndex) -> None:
+        for line in order["items"]:
+            logger.log(behavior.PURCHASE, order["session_id"], line.product_id,
+                       quantity=line.quantity, order_id=order["order_id"])
+    return handle
+
+
+class NotificationOutbox:
+    """Local stand-in for an email/SMS provider: confirmations go to a JSONL file."""
+
+    def __init__(self, path: str = OUTBOX_FILE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def send(self, to: str, subject: str, body: str) -> None:
+        message = {"ts": time.time(), "to": to, "subject": subject, "body": body}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(message, ensure_ascii=False) + "\n")
+
+
+def notification_handler(outbox: NotificationOutbox) -> Handler:
+    """Send the order confirmation."""
+    def handle(order: OrderType, catalog: CatalogIndex) -> None:
+        items = ", ".join(f"{line.name} × {line.quantity}" for line in order["items"])
+        outbox.send(order["email"], f"Your Qoozee order QZ-{order['order_id']}",
+                    f"Hi {order['name']}, thanks for your order of {items} "
+                    f"(₹{order['total']:.2f}). Estimated delivery: {order['delivery_date']}.")
+    return handle
+
+
+def recommendation_handler(path: str = precompute.SUGGESTIONS_FILE) -> Handler:
+    """Ask the model for a suggestion for the purchased cart so the next shopper gets it precomputed.
+
+    Only model answers are stored; the template fallback is cheap to compute
+    live and would otherwise be served instead of the model. A failed model
+    call raises, so the queue retries it.
+    """
+    def handle(order: OrderType, catalog: CatalogIndex) -> None:
+        cart_ids = [line.product_id for line in order["items"]]
+        signature = precompute.cart_signature(cart_ids)
+        if precompute.has_llm_suggestion(path, catalog.version, signature):
+            return
+        text = llm.generate(llm.get_cart_based_suggestion_prompt(cart_ids, catalog), timeout=60)
+        precompute.add_suggestion(path, catalog.version, signature, {"text": text, "source": "llm"})
+    return handle
+
+
+def default_queue(logger: EventLogger, extra: Optional[List[Tuple[str, Handler]]] = None,
+                  use_llm: bool = True) -> PostOrderQueue:
+    """Queue with the standard handlers plus any ``extra`` ones.
+
+    Without the model (``use_llm=False``) there is nothing worth precomputing
+    after an order, so the recommendations handler is left out.
+    """
+    post_order = PostOrderQueue()
+    post_order.register("analytics", analytics_handler(logger))
+    post_order.register("notification", notification_handler(NotificationOutbox()))
+    if use_llm:
+        post_order.register("recommendations", recommendation_handler())
+    for name, handler in extra or ():
+        post_order.register(name, handler)
+    return post_order
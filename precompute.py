@@ -0,0 +1,212 @@
+"""
+Offline batch job that precomputes cart-complement suggestions.
+
+Mines the most frequent cart compositions from the order store, asks the model
+(or the local templates) for suggestions in a process pool, and stores them
+keyed by a canonical cart signature so the app can serve them without a
+live model round-trip.
+
+    python precompute.py --top 50 --workers 4
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+import llm
+import local_answers
+from cart import DEFAULT_CART
+from catalog import CatalogIndex, catalog_version
+from order_store import ORDER_DB, OrderStore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+PRODUCTS_FILE = "products.csv"
+SUGGESTIONS_FILE = os.path.join("data", "cart_suggestions.json")
+
+# Carts every new session starts with; always precomputed
+SEED_CARTS = [DEFAULT_CART]
+
+
+def cart_signature(cart_ids: Iterable[int]) -> str:
+    """Canonical key for a cart: sorted unique product ids, comma separated."""
+    return ",".join(str(pid) for pid in sorted(set(cart_ids)))
+
+
+def frequent_carts(orders: Iterable[List[int]], top: int) -> List[Tuple[str, int]]:
+    """Return the ``top`` most frequent cart signatures with their counts."""
+    counts = Counter(cart_signature(items) for items in orders if items)
+    for cart in SEED_CARTS:
+        counts.setdefault(cart_signature(cart), 0)
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+
+
+# --- Suggestion Workers ---
+_worker_catalog: Optional[CatalogIndex] = None
+_worker_use_llm = True
+
+
+def _init_worker(products_file: str, use_llm: bool) -> None:
+    global _worker_catalog, _worker_use_llm
+    with open(products_file, newline='', encoding='utf-8') as f:
+        _worker_catalog = CatalogIndex(list(csv.DictReader(f)), catalog_version(products_file))
+    _worker_use_llm = use_llm
+
+
+def _suggest(signature: str) -> Tuple[str, Dict[str, str]]:
+    cart_ids = [int(pid) for pid in signature.split(",")]
+    if _worker_use_llm:
+        try:
+            prompt = llm.get_cart_based_suggestion_prompt(cart_ids, _worker_catalog)
+            return signature, {"text": llm.generate(prompt, timeout=60), "source": "llm"}
+        except (requests.RequestException, ValueError):
+            pass
+    return signature, {"text": local_answers.suggest_for_cart(_worker_catalog, cart_ids), "source": "template"}
+
+
+def precompute(signatures: List[str], products_file: str = PRODUCTS_FILE,
+               workers: Optional[int] = None, use_llm: bool = True) -> Dict[str, Dict[str, str]]:
+    """Compute suggestions for each cart signature in a process pool."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(products_file, use_llm)) as pool:
+        return dict(pool.map(_suggest, signatures))
+
+
+# --- Suggestion Store ---
+_suggestions_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """Hold the store's write lock: a thread lock, plus ``flock`` on ``<path>.lock`` across processes.
+
+    App processes add suggestions after orders while the batch job may be
+    saving; each reads, merges and rewrites the whole file under it.
+    """
+    with _suggestions_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_suggestions(path: str) -> Dict[str, Dict[str, str]]:
+    """Every stored entry, each with its own ``catalog_version``."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    # Files written before entries carried a version had one for the whole file
+    file_version = data.get("catalog_version")
+    return {signature: dict(entry, catalog_version=entry.get("catalog_version", file_version))
+            for signature, entry in data.get("suggestions", {}).items()}
+
+
+def _write_suggestions(path: str, suggestions: Dict[str, Dict[str, str]]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Unique temp name, so a writer without the lock can never share a half-written file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generated_at": time.time(), "suggestions": suggestions}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _is_llm(entry: Optional[Dict[str, str]], version: str) -> bool:
+    return bool(entry) and entry.get("catalog_version") == version and entry.get("source") == "llm"
+
+
+def save_suggestions(path: str, version: str, suggestions: Dict[str, Dict[str, str]]) -> int:
+    """Merge a batch of suggestions for one catalog version into the store; returns how many were written.
+
+    The file is re-read under the lock, so entries other writers added (such as
+    the app's post-order model suggestions) are kept, and a template never
+    replaces a model-written suggestion for the same catalog version.
+    """
+    with _locked(path):
+        stored = _read_suggestions(path)
+        written = 0
+        for signature, suggestion in suggestions.items():
+            if suggestion.get("source") != "llm" and _is_llm(stored.get(signature), version):
+                continue
+            stored[signature] = dict(suggestion, catalog_version=version)
+            written += 1
+        _write_suggestions(path, stored)
+        return written
+
+
+def has_llm_suggestion(path: str, version: str, signature: str) -> bool:
+    """Whether the cart already has a model-written suggestion."""
+    return load_suggestions(path, version).get(signature, {}).get("source") == "llm"
+
+
+def add_suggestion(path: str, version: str, signature: str, suggestion: Dict[str, str]) -> bool:
+    """Store one suggestion unless the cart already has one from the model; returns True if added.
+
+    A template entry (from a ``--no-llm`` batch run or a failed model call) or
+    one for another catalog version is replaced.
+    """
+    with _locked(path):
+        stored = _read_suggestions(path)
+        if _is_llm(stored.get(signature), version):
+            return False
+        stored[signature] = dict(suggestion, catalog_version=version)
+        _write_suggestions(path, stored)
+        return True
+
+
+def load_suggestions(path: str, version: str) -> Dict[str, Dict[str, str]]:
+    """Load precomputed suggestions, ignoring any built for another catalog version."""
+    return {signature: entry for signature, entry in _read_suggestions(path).items()
+            if entry.get("catalog_version") == version}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute cart-complement suggestions.")
+    parser.add_argument("--orders", default=ORDER_DB, help="order store database")
+    parser.add_argument("--products", default=PRODUCTS_FILE, help="product catalog CSV")
+    parser.add_argument("--output", default=SUGGESTIONS_FILE, help="where to store suggestions")
+    parser.add_argument("--top", type=int, default=100, help="number of frequent carts to precompute")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    parser.add_argument("--no-llm", action="store_true", help="use local templates instead of the model")
+    args = parser.parse_args()
+
+    store = OrderStore(args.orders, pool_size=1)
+    carts = frequent_carts(store.iter_item_ids(), args.top)
+    store.close()
+    print(f"Precomputing suggestions for {len(carts)} carts")
+
+    start = time.time()
+    suggestions = precompute([signature for signature, _ in carts], args.products,
+                             args.workers, use_llm=not args.no_llm)
+    written = save_suggestions(args.output, catalog_version(args.products), suggestions)
+
+    by_source = Counter(s["source"] for s in suggestions.values())
+    print(f"Saved {written} of {len(suggestions)} suggestions to {args.output} in {time.time() - start:.1f}s "
+          f"({dict(by_source)}); model suggestions already stored are kept over templates")
+
+
+if __name__ == "__main__":
+    main()
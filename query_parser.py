@@ -0,0 +1,158 @@
+"""
+Rule-based parser that turns shopping questions into structured catalog queries.
+Common questions ("should I buy X or Y?", "kitchen stuff under ₹500 rated 4.5+")
+are answered straight from the catalog index without calling the LLM.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from catalog import CatalogIndex, ProductType, tokenize
+
+INTENT_COMPARE = "compare"
+INTENT_FIND = "find"
+INTENT_UNKNOWN = "unknown"
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)\s*(k)?"
+_CURRENCY = r"(?:₹|rs\.?|inr|rupees?)?\s*"
+
+# Leading phrasing that carries no product information
+_COMPARE_PREFIX_RE = re.compile(
+    r"^\s*(?:should\s+i\s+(?:buy|get|pick|choose)|(?:please\s+)?compare|"
+    r"which\s+is\s+better(?:\s*[,:-]\s*|\s+)?|what(?:'s|\s+is)\s+better(?:\s*[,:-]\s*|\s+)?)\s*"
+)
+_OR_SPLIT_RE = re.compile(r"\s+(?:or|vs\.?|versus)\s+")
+_AND_SPLIT_RE = re.compile(r"\s+and\s+")
+
+_MAX_PRICE_RE = re.compile(
+    r"\b(?:under|below|less\s+than|cheaper\s+than|within|up\s*to|max(?:imum)?|at\s+most)\s*"
+    + _CURRENCY + _NUMBER + r"|<\s*" + _CURRENCY + _NUMBER
+)
+_MIN_PRICE_RE = re.compile(
+    r"\b(?:over|above|more\s+than|costlier\s+than|min(?:imum)?|from)\s*" + _CURRENCY + _NUMBER
+    + r"(?!\s*(?:stars?|⭐|rating))"
+)
+_MIN_RATING_RE = re.compile(
+    r"\b(?:rat(?:ed|ing)s?|stars?)\s*(?:of\s+)?(?:over|above|at\s+least|>=?|of)?\s*(\d(?:\.\d)?)\s*\+?"
+    r"|\b(?:over|above|at\s+least)\s*(\d(?:\.\d)?)\s*(?:stars?|⭐)"
+    r"|\b(\d(?:\.\d)?)\s*(?:\+\s*)?(?:stars?|⭐)(?:\s+(?:and\s+up|or\s+more|plus))?"
+)
+_ARTICLE_RE = re.compile(r"^(?:the|a|an|my|this|that)\s+")
+_ARTICLES = {"the", "a", "an", "my", "this", "that"}
+_FILLER_RE = re.compile(
+    r"\b(?:should\s+i\s+(?:buy|get)|show\s+me|find\s+me|find|search\s+for|looking\s+for|i\s+(?:want|need)|"
+    r"can\s+you|please|give\s+me|suggest|recommend|any|some|something|"
+    r"best|good|cheap|top|items?|products?|stuff|things?|for|in|with|priced|costing|"
+    r"and|that\s+(?:is|are)|which\s+(?:is|are))\b"
+)
+_PUNCT_RE = re.compile(r"[?!;:]+|[.,](?!\d)")
+
+
+@dataclass
+class ParsedQuery:
+    """Structured form of a natural language shopping question."""
+    intent: str = INTENT_UNKNOWN
+    names: List[str] = field(default_factory=list)
+    terms: str = ""
+    category: Optional[str] = None
+    max_price: Optional[float] = None
+    min_price: Optional[float] = None
+    min_rating: Optional[float] = None
+
+    @property
+    def has_filters(self) -> bool:
+        return any(v is not None for v in (self.category, self.max_price, self.min_price, self.min_rating))
+
+
+class QueryParser:
+    """Grammar compiled against one catalog's category vocabulary."""
+
+    def __init__(self, categories: List[str]) -> None:
+        # Longest names first so "home decor" wins over "home"
+        by_length = sorted(categories, key=len, reverse=True)
+        alternation = "|".join(re.escape(c.lower()) + r"s?" for c in by_length)
+        self._categories = {c.lower(): c for c in categories}
+        self._category_re = re.compile(r"\b(" + alternation + r")\b") if categories else None
+
+    def parse(self, text: str) -> ParsedQuery:
+        """Parse free text into a ParsedQuery."""
+        text = _PUNCT_RE.sub(" ", text.lower()).strip()
+        query = ParsedQuery()
+
+        compare = self._parse_compare(text)
+        if compare:
+            query.intent = INTENT_COMPARE
+            query.names = compare
+            return query
+
+        text = self._extract_filters(text, query)
+        terms = _FILLER_RE.sub(" ", text)
+        query.terms = " ".join(w for w in terms.split() if w not in _ARTICLES)
+        if query.terms or query.has_filters:
+            query.intent = INTENT_FIND
+        return query
+
+    def _parse_compare(self, text: str) -> Optional[List[str]]:
+        prefix = _COMPARE_PREFIX_RE.match(text)
+        body = text[prefix.end():] if prefix else text
+        parts = _OR_SPLIT_RE.split(body)
+        # "and" only separates products after an explicit compare phrase
+        if len(parts) != 2 and prefix:
+            parts = _AND_SPLIT_RE.split(body)
+        if len(parts) != 2:
+            return None
+        names = [_ARTICLE_RE.sub("", p.strip()) for p in parts]
+        return names if all(names) else None
+
+    def _extract_filters(self, text: str, query: ParsedQuery) -> str:
+        match = _MIN_RATING_RE.search(text)
+        if match:
+            query.min_rating = float(next(g for g in match.groups() if g))
+            text = text[:match.start()] + " " + text[match.end():]
+
+        match = _MAX_PRICE_RE.search(text)
+        if match:
+            query.max_price = _amount(*(match.group(1, 2) if match.group(1) else match.group(3, 4)))
+            text = text[:match.start()] + " " + text[match.end():]
+
+        match = _MIN_PRICE_RE.search(text)
+        if match:
+            query.min_price = _amount(match.group(1), match.group(2))
+            text = text[:match.start()] + " " + text[match.end():]
+
+        if self._category_re:
+            match = self._category_re.search(text)
+            if match:
+                name = match.group(1)
+                query.category = self._categories.get(name) or self._categories.get(name[:-1])
+                text = text[:match.start()] + " " + text[match.end():]
+        return text
+
+
+def _amount(number: str, thousands: Optional[str]) -> float:
+    value = float(number.replace(",", ""))
+    return value * 1000 if thousands else value
+
+
+def run_query(query: ParsedQuery, catalog: CatalogIndex, limit: int = 10) -> List[ProductType]:
+    """Answer a find-intent query from the catalog index, best rated first."""
+    if query.terms:
+        # Ignore words that appear in no product name ("hoodie for men" -> "hoodie")
+        known = [t for t in tokenize(query.terms) if t in catalog.rows_by_token]
+        rows = catalog.match_tokens(" ".join(known)) if known else []
+        if not rows:
+            # Fall back to substring matching for partial words like "blend"
+            rows = catalog.search(search_term=query.terms)
+        if not rows:
+            # Then for misspellings ("show bluetoth speker" -> the names with most of "shoe bluetooth speaker")
+            rows = catalog.match_most_tokens(catalog.correct(query.terms))
+        rows = catalog.filter_rows(rows, query.category, query.max_price,
+                                   min_price=query.min_price, min_rating=query.min_rating)
+    else:
+        rows = catalog.search(query.category, query.max_price,
+                              min_price=query.min_price, min_rating=query.min_rating)
+
+    ratings, prices = catalog.ratings, catalog.prices
+    rows.sort(key=lambda row: (-ratings[row], prices[row]))
+    return catalog.rows_to_products(rows[:limit])
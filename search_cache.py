@@ -0,0 +1,111 @@
+"""
+Result caches for Shop tab searches.
+
+``IncrementalSearch`` lives in one session's state and remembers the rows
+matching its recent search terms. The Shop tab asks it only when the facet
+index has no bitmap for the typed term yet; a term that extends an earlier one
+is answered by filtering that earlier result instead of the catalog, so typing
+"blend" -> "blender" only re-checks the rows that matched "blend". Category,
+price and rating filters are bitmap intersections in ``facets.FacetIndex`` and
+never come through here.
+
+``QueryCache`` is shared by every session in the process: the fully ranked
+rows of a (query, sort) pair are computed once per catalog version, and any
+session asking for the same filters pages through that array. A query is any
+hashable description of the filters, such as a search term plus facet picks.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from catalog import SORT_OPTIONS, CatalogIndex
+from lru import LockedLRU
+
+
+class IncrementalSearch:
+    """Per-session LRU of search term -> matching rows that refines cached shorter terms."""
+
+    def __init__(self, max_entries: int = 16) -> None:
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self._results: "OrderedDict[str, List[int]]" = OrderedDict()
+        self.hits = 0
+        self.refined = 0
+        self.scans = 0
+        self.rows_checked = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def search(self, catalog: CatalogIndex, term: str) -> List[int]:
+        """Rows whose name contains ``term`` (case-insensitive), in catalog order, like ``catalog.search``."""
+        if catalog.version != self.version:
+            self._results.clear()
+            self.version = catalog.version
+
+        term = term.lower()
+        rows = self._results.get(term)
+        if rows is not None:
+            self._results.move_to_end(term)
+            self.hits += 1
+            return rows
+
+        # The smallest cached result whose term is part of this one contains every match
+        base: Optional[List[int]] = None
+        for cached, cached_rows in self._results.items():
+            if cached in term and (base is None or len(cached_rows) < len(base)):
+                base = cached_rows
+
+        if base is None:
+            rows = catalog.search(search_term=term)
+            self.scans += 1
+            self.rows_checked += len(catalog)
+        else:
+            rows = catalog.filter_rows(base, search_term=term)
+            self.refined += 1
+            self.rows_checked += len(base)
+
+        self._results[term] = rows
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return rows
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._results), "hits": self.hits, "refined": self.refined,
+                "scans": self.scans, "rows_checked": self.rows_checked}
+
+
+class QueryCache:
+    """Thread-safe, process-wide LRU of (query, sort) -> ranked rows for one catalog version."""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.version: Optional[str] = None
+        self._results: LockedLRU[array] = LockedLRU(max_entries)
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, catalog: CatalogIndex, query: Hashable, sort: str,
+            compute: Callable[[], Sequence[int]]) -> array:
+        """Return the ranked rows for ``query``, calling ``compute()`` on a miss."""
+        sort = sort if sort in SORT_OPTIONS else "featured"
+        with self._lock:
+            if catalog.version != self.version:
+                # A reloaded catalog renumbers rows; nothing cached is valid any more
+                if len(self._results):
+                    self.invalidations += 1
+                self._results.clear()
+                self.version = catalog.version
+        # The version is part of the key, so a result still being ranked for the
+        # old catalog when it was reloaded is never served
+        return self._results.get((catalog.version, query, sort), lambda: array("i", compute()))
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._results.stats(), invalidations=self.invalidations)
@@ -0,0 +1,182 @@
+"""
+Per-session memory accounting.
+
+Every few reruns the app hands its session state to ``SessionMemoryMonitor``,
+which measures the deep size of each key and keeps a short history per
+session. The Developer Tools panel shows the current session's keys, its growth
+over reruns and the heaviest sessions in the process. The same numbers are
+exported in Prometheus text format for scraping.
+"""
+
+import os
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+METRICS_FILE = os.path.join("data", "metrics", "session_memory.prom")
+
+# Shared, immutable or process-wide objects are not charged to a session
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+               types.MethodType, threading.Thread)
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Bytes held by ``obj`` and everything it references, counting shared objects once."""
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIP_TYPES):
+            continue
+        seen.add(id(item))
+        try:
+            size += sys.getsizeof(item)
+        except TypeError:
+            continue
+
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        if hasattr(item, "__dict__"):
+            stack.append(vars(item))
+        for slot in getattr(type(item), "__slots__", ()):
+            if hasattr(item, slot):
+                stack.append(getattr(item, slot))
+    return size
+
+
+class SessionSample:
+    """Latest per-key sizes of one session plus its recent totals."""
+
+    __slots__ = ("session_id", "keys", "total", "reruns", "updated", "history")
+
+    def __init__(self, session_id: str, history_size: int) -> None:
+        self.session_id = session_id
+        self.keys: Dict[str, int] = {}
+        self.total = 0
+        self.reruns = 0
+        self.updated = 0.0
+        # (rerun number, total bytes)
+        self.history: Deque[Tuple[int, int]] = deque(maxlen=history_size)
+
+    def growth(self) -> float:
+        """Average bytes gained per rerun across the recorded history."""
+        if len(self.history) < 2:
+            return 0.0
+        (first_run, first), (last_run, last) = self.history[0], self.history[-1]
+        return (last - first) / max(last_run - first_run, 1)
+
+
+class SessionMemoryMonitor:
+    """Process-wide registry of session memory samples."""
+
+    def __init__(self, sample_every: int = 5, history_size: int = 20,
+                 max_sessions: int = 1000, metrics_file: Optional[str] = METRICS_FILE,
+                 export_interval: float = 15.0) -> None:
+        self.sample_every = sample_every
+        self.history_size = history_size
+        self.max_sessions = max_sessions
+        self.metrics_file = metrics_file
+        self.export_interval = export_interval
+        self._sessions: "OrderedDict[str, SessionSample]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    def rerun(self, session_id: str, state: Iterable[Tuple[str, Any]]) -> Optional[SessionSample]:
+        """Count a rerun and measure the state every ``sample_every`` reruns."""
+        with self._lock:
+            sample = self._session(session_id)
+            sample.reruns += 1
+            if (sample.reruns - 1) % self.sample_every:
+                return None
+        return self.measure(session_id, state)
+
+    def measure(self, session_id: str, state: Iterable[Tuple[str, Any]]) -> SessionSample:
+        """Measure the deep size of every session-state key now."""
+        with self._lock:
+            sample = self._session(session_id)
+        # Measured outside the lock; keys share a ``seen`` set so nothing is counted twice
+        seen: Set[int] = set()
+        sizes = {str(key): deep_sizeof(value, seen) for key, value in state}
+        with self._lock:
+            sample.keys = dict(sorted(sizes.items(), key=lambda item: -item[1]))
+            sample.total = sum(sizes.values())
+            sample.updated = time.time()
+            sample.history.append((sample.reruns, sample.total))
+        self._maybe_export()
+        return sample
+
+    def _session(self, session_id: str) -> SessionSample:
+        sample = self._sessions.get(session_id)
+        if sample is None:
+            sample = self._sessions[session_id] = SessionSample(session_id, self.history_size)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return sample
+
+    def get(self, session_id: str) -> Optional[SessionSample]:
+        return self._sessions.get(session_id)
+
+    def top(self, n: int = 10) -> List[SessionSample]:
+        """Heaviest sessions by their latest sample."""
+        with self._lock:
+            samples = list(self._sessions.values())
+        return sorted(samples, key=lambda s: -s.total)[:n]
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    # --- Export ---
+    def prometheus_text(self, top: int = 50) -> str:
+        """Metrics in Prometheus text exposition format."""
+        with self._lock:
+            samples = list(self._sessions.values())
+        lines = [
+            "# HELP qoozee_sessions Sessions with a memory sample.",
+            "# TYPE qoozee_sessions gauge",
+            f"qoozee_sessions {len(samples)}",
+            "# HELP qoozee_session_memory_total_bytes Deep size of all session state.",
+            "# TYPE qoozee_session_memory_total_bytes gauge",
+            f"qoozee_session_memory_total_bytes {sum(s.total for s in samples)}",
+            "# HELP qoozee_session_memory_bytes Deep size of one session-state key.",
+            "# TYPE qoozee_session_memory_bytes gauge",
+        ]
+        heaviest = sorted(samples, key=lambda s: -s.total)[:top]
+        for sample in heaviest:
+            for key, size in sample.keys.items():
+                lines.append(f'qoozee_session_memory_bytes{{session="{sample.session_id}",key="{_label(key)}"}} {size}')
+        lines += [
+            "# HELP qoozee_session_memory_growth_bytes Average bytes gained per rerun.",
+            "# TYPE qoozee_session_memory_growth_bytes gauge",
+        ]
+        for sample in heaviest:
+            lines.append(f'qoozee_session_memory_growth_bytes{{session="{sample.session_id}"}} {sample.growth():.1f}')
+        return "\n".join(lines) + "\n"
+
+    def _maybe_export(self) -> None:
+        if not self.metrics_file or time.time() - self._last_export < self.export_interval:
+            return
+        self._last_export = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.metrics_file) or ".", exist_ok=True)
+            tmp_path = f"{self.metrics_file}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.metrics_file)
+        except OSError as e:
+            print(f"Error exporting session metrics: {str(e)}")
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,313 @@
+"""
+External storage for the parts of session state that must outlive a process.
+
+Cart, behavior and checkout state are written to a shared backend keyed by a
+session id carried in the URL (``?sid=``), so any app process behind a load
+balancer can pick a session up and a restart does not lose carts.
+
+Backends are chosen by URL:
+
+    sqlite:///data/sessions.db   local SQLite file (default; shared by processes on one host)
+    file:///data/sessions        one file per session key
+    redis://host:6379/0          Redis or any server speaking its protocol (needs ``redis``)
+    memory://                    in-process only, for development
+
+Values are stored as compact JSON, zlib-compressed when large. Types that are
+not plain JSON register a tag and provide ``to_state``/``from_state``.
+"""
+
+import abc
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+from urllib.parse import urlparse
+
+DEFAULT_URL = "sqlite:///" + os.path.join("data", "sessions.db")
+SESSION_TTL = 7 * 24 * 3600
+
+# Values longer than this are compressed
+COMPRESS_OVER = 256
+
+# Session ids come from the URL, so only uuid4 hex strings are accepted
+SESSION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+# --- Serialization ---
+_TYPES: Dict[str, type] = {}
+_TAGS: Dict[type, str] = {}
+
+
+def register_type(tag: str, cls: type) -> None:
+    """Store ``cls`` instances via ``cls.to_state()`` and ``cls.from_state(state)``."""
+    _TYPES[tag] = cls
+    _TAGS[cls] = tag
+
+
+def encode(value: Any) -> bytes:
+    tag = _TAGS.get(type(value))
+    payload = {"t": tag, "v": value.to_state()} if tag else {"v": value}
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) > COMPRESS_OVER:
+        return b"z" + zlib.compress(data)
+    return b"j" + data
+
+
+def decode(blob: bytes) -> Any:
+    data = zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:]
+    payload = json.loads(data)
+    tag = payload.get("t")
+    return _TYPES[tag].from_state(payload["v"]) if tag else payload["v"]
+
+
+# --- Backends ---
+class SessionBackend(abc.ABC):
+    """Raw key/value storage per session; values are already-encoded bytes."""
+
+    @abc.abstractmethod
+    def load(self, session_id: str) -> Dict[str, bytes]:
+        ...
+
+    @abc.abstractmethod
+    def save(self, session_id: str, values: Mapping[str, bytes]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, session_id: str, keys: Optional[Iterable[str]] = None) -> None:
+        """Delete some keys, or the whole session when ``keys`` is None."""
+
+
+class MemorySessionBackend(SessionBackend):
+    def __init__(self) -> None:
+        self._sessions: Dict[str, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Dict[str, bytes]:
+        with self._lock:
+            return dict(self._sessions.get(session_id, {}))
+
+    def save(self, session_id: str, values: Mapping[str, bytes]) -> None:
+        with self._lock:
+            self._sessions.setdefault(session_id, {}).update(values)
+
+    def delete(self, session_id: str, keys: Optional[Iterable[str]] = None) -> None:
+        with self._lock:
+            if keys is None:
+                self._sessions.pop(session_id, None)
+            else:
+                for key in keys:
+                    self._sessions.get(session_id, {}).pop(key, None)
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """One row per (session, key) in a WAL-mode database."""
+
+    def __init__(self, path: str, ttl: float = SESSION_TTL) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS session_state (
+                    session_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (session_id, key)
+                ) WITHOUT ROWID""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_session_state_updated ON session_state (updated)")
+            # Expire abandoned sessions whenever a process starts
+            self._conn.execute("DELETE FROM session_state WHERE updated < ?", (time.time() - ttl,))
+
+    def load(self, session_id: str) -> Dict[str, bytes]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM session_state WHERE session_id = ?",
+                                      (session_id,)).fetchall()
+        return {key: bytes(value) for key, value in rows}
+
+    def save(self, session_id: str, values: Mapping[str, bytes]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO session_state VALUES (?, ?, ?, ?)",
+                                   [(session_id, key, value, now) for key, value in values.items()])
+
+    def delete(self, session_id: str, keys: Optional[Iterable[str]] = None) -> None:
+        with self._lock, self._conn:
+            if keys is None:
+                self._conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+            else:
+                self._conn.executemany("DELETE FROM session_state WHERE session_id = ? AND key = ?",
+                                       [(session_id, key) for key in keys])
+
+
+class FileSessionBackend(SessionBackend):
+    """One directory per session and one file per key; works on a shared mount."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _dir(self, session_id: str) -> str:
+        return os.path.join(self.directory, session_id)
+
+    def load(self, session_id: str) -> Dict[str, bytes]:
+        values = {}
+        try:
+            names = os.listdir(self._dir(session_id))
+        except FileNotFoundError:
+            return values
+        for name in names:
+            if name.endswith(".tmp"):
+                continue
+            try:
+                with open(os.path.join(self._dir(session_id), name), "rb") as f:
+                    values[name] = f.read()
+            except FileNotFoundError:
+                continue
+        return values
+
+    def save(self, session_id: str, values: Mapping[str, bytes]) -> None:
+        directory = self._dir(session_id)
+        os.makedirs(directory, exist_ok=True)
+        for key, value in values.items():
+            tmp_path = os.path.join(directory, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, os.path.join(directory, key))
+
+    def delete(self, session_id: str, keys: Optional[Iterable[str]] = None) -> None:
+        directory = self._dir(session_id)
+        names = os.listdir(directory) if keys is None and os.path.isdir(directory) else keys or ()
+        for name in names:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+        if keys is None:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+
+class RedisSessionBackend(SessionBackend):
+    """One hash per session; ``client`` is a redis-py compatible client."""
+
+    def __init__(self, client: Any, prefix: str = "qoozee:session:", ttl: float = SESSION_TTL) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.ttl = int(ttl)
+
+    def load(self, session_id: str) -> Dict[str, bytes]:
+        values = self.client.hgetall(self.prefix + session_id)
+        return {(key.decode() if isinstance(key, bytes) else key): value for key, value in values.items()}
+
+    def save(self, session_id: str, values: Mapping[str, bytes]) -> None:
+        name = self.prefix + session_id
+        pipe = self.client.pipeline()
+        pipe.hset(name, mapping=dict(values))
+        pipe.expire(name, self.ttl)
+        pipe.execute()
+
+    def delete(self, session_id: str, keys: Optional[Iterable[str]] = None) -> None:
+        if keys is None:
+            self.client.delete(self.prefix + session_id)
+        elif keys:
+            self.client.hdel(self.prefix + session_id, *keys)
+
+
+def backend_from_url(url: str) -> SessionBackend:
+    """Build a backend from a ``sqlite:``, ``file:``, ``redis:`` or ``memory:`` URL."""
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        return SQLiteSessionBackend(_path(parsed.path))
+    if parsed.scheme == "file":
+        return FileSessionBackend(_path(parsed.path))
+    if parsed.scheme in ("redis", "rediss"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis session store needs the redis package: pip install redis")
+        return RedisSessionBackend(redis.Redis.from_url(url))
+    if parsed.scheme == "memory":
+        return MemorySessionBackend()
+    raise ValueError(f"Unknown session store URL: {url}")
+
+
+def _path(path: str) -> str:
+    # sqlite:///data/x.db is relative to the working directory, sqlite:////abs/x.db is absolute
+    return path[1:] if path.startswith("/") else path
+
+
+# --- Per-session Sync ---
+class SessionSync:
+    """Lazy loader and dirty-key writer for one session's persisted keys."""
+
+    def __init__(self, backend: SessionBackend, session_id: str) -> None:
+        if not SESSION_ID_RE.match(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        self.backend = backend
+        self.session_id = session_id
+        self._stored: Optional[Dict[str, bytes]] = None
+        # Digest of what the backend currently holds for each key
+        self._digests: Dict[str, bytes] = {}
+        self.writes = 0
+
+    def load(self, key: str, default: Optional[Callable[[], Any]] = None) -> Any:
+        """Decode one stored key on first use; ``default()`` when there is none."""
+        if self._stored is None:
+            # One round trip fetches every key; each is decoded only when asked for
+            self._stored = self.backend.load(self.session_id)
+        blob = self._stored.pop(key, None)
+        if blob is not None:
+            try:
+                value = decode(blob)
+            except (ValueError, KeyError, TypeError, zlib.error):
+                value = None
+            else:
+                self._digests[key] = _digest(blob)
+                return value
+        return default() if default else None
+
+    def flush(self, state: Mapping[str, Any], keys: Iterable[str]) -> int:
+        """Write back the keys whose encoded value changed; returns how many were written."""
+        dirty: Dict[str, bytes] = {}
+        digests: Dict[str, bytes] = {}
+        removed = []
+        for key in keys:
+            if key not in state:
+                if key in self._digests:
+                    removed.append(key)
+                continue
+            blob = encode(state[key])
+            digest = _digest(blob)
+            if self._digests.get(key) != digest:
+                dirty[key] = blob
+                digests[key] = digest
+        if dirty:
+            self.backend.save(self.session_id, dirty)
+            self._digests.update(digests)
+            self.writes += len(dirty)
+        if removed:
+            self.backend.delete(self.session_id, removed)
+            for key in removed:
+                del self._digests[key]
+        return len(dirty)
+
+    def clear(self) -> None:
+        """Forget this session in the backend too."""
+        self.backend.delete(self.session_id)
+        self._stored = {}
+        self._digests.clear()
+
+
+def _digest(blob: bytes) -> bytes:
+    return hashlib.blake2b(blob, digest_size=16).digest()
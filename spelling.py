@@ -0,0 +1,93 @@
+"""
+Typo-tolerant lookup of catalog words (symmetric delete spelling correction).
+
+Every dictionary word is stored under each string obtained by deleting up to
+``max_distance`` of its characters. A misspelt word shares one of those delete
+strings with every dictionary word within that edit distance, so a lookup only
+generates the input's own deletes, reads the candidates stored under them and
+confirms each with an edit distance check; nothing scans the vocabulary.
+"""
+
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """``word`` and every string left after deleting up to ``distance`` characters."""
+    found = {word}
+    edge = {word}
+    for _ in range(distance):
+        edge = {w[:i] + w[i + 1:] for w in edge if len(w) > 1 for i in range(len(w))} - found
+        found |= edge
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent swaps count once), or ``limit + 1`` if larger."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def allowed_distance(word: str, max_distance: int = 2) -> int:
+    """Edits tolerated for a word of this length: none below 4 letters, one below 6."""
+    if len(word) < 4 or not word.isalpha():
+        return 0
+    return min(max_distance, 1 if len(word) < 6 else 2)
+
+
+class SpellIndex:
+    """Delete dictionary over a word -> frequency vocabulary, such as a catalog's name tokens."""
+
+    def __init__(self, words: Mapping[str, int], max_distance: int = 2) -> None:
+        self.max_distance = max_distance
+        self.counts: Dict[str, int] = dict(words)
+        self._deletes: Dict[str, List[str]] = {}
+        for word in self.counts:
+            for key in _deletes(word, allowed_distance(word, max_distance)):
+                self._deletes.setdefault(key, []).append(word)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def lookup(self, word: str) -> List[Tuple[str, int]]:
+        """Nearest dictionary words to ``word`` as (word, distance), most frequent first.
+
+        Distance 1 is tried before distance 2, so a typo that is one edit away
+        never pays for the larger delete set.
+        """
+        if word in self.counts:
+            return [(word, 0)]
+        for limit in range(1, allowed_distance(word, self.max_distance) + 1):
+            seen: Set[str] = set()
+            matches = []
+            for key in _deletes(word, limit):
+                for candidate in self._deletes.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    # Short dictionary words are stored with fewer deletes and tolerate fewer edits
+                    cap = min(limit, allowed_distance(candidate, self.max_distance))
+                    distance = edit_distance(word, candidate, cap)
+                    if distance <= cap:
+                        matches.append((candidate, distance))
+            if matches:
+                matches.sort(key=lambda match: (match[1], -self.counts[match[0]], match[0]))
+                return matches
+        return []
+
+    def best(self, word: str) -> Optional[str]:
+        """Closest dictionary word, or None if nothing is within reach."""
+        matches = self.lookup(word)
+        return matches[0][0] if matches else None
@@ -0,0 +1,161 @@
+"""
+End-to-end checks of app.py with Streamlit's AppTest.
+
+Each test runs the app in a fresh directory with an in-memory session store,
+so the order, inventory and session databases start empty.
+
+    python -m pytest tests
+"""
+
+import csv
+import os
+import shutil
+import sys
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import inventory  # noqa: E402
+import order_store  # noqa: E402
+from cart import DEFAULT_CART  # noqa: E402
+SHOP_TAB = "🔍 Browse Products"
+CART_TAB = "🛒 Your Cart"
+CHECKOUT_TAB = "💳 Checkout"
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    for name in ("products.csv", "static", ".streamlit"):
+        source = os.path.join(ROOT, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, tmp_path / name)
+        else:
+            shutil.copy(source, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("QOOZEE_SESSION_STORE", "memory://")
+    monkeypatch.delenv("QOOZEE_NO_LLM", raising=False)
+    # Stores are process-wide singletons opened on paths relative to the old directory
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    return tmp_path
+
+
+def open_app(tab: str = CART_TAB) -> AppTest:
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.session_state["active_section"] = tab
+    at.run()
+    assert not at.exception
+    return at
+
+
+def switch_tab(at: AppTest, tab: str) -> None:
+    at.session_state["active_section"] = tab
+    at.run()
+    assert not at.exception
+
+
+def place_order(at: AppTest) -> None:
+    """Fill in the checkout form and submit it."""
+    fields = {"Full Name*": "Test Buyer", "Email Address*": "buyer@example.com", "Phone Number*": "9999999999",
+              "City*": "Pune", "Pincode*": "411001"}
+    for widget in at.text_input:
+        if widget.label in fields:
+            widget.input(fields[widget.label])
+    next(w for w in at.text_area if w.label == "Delivery Address*").input("1 Main Street")
+    next(w for w in at.checkbox if w.label.startswith("I agree")).check()
+    next(w for w in at.button if w.label == "Place Order").click().run()
+    assert not at.exception
+
+
+def test_shop_filters_survive_a_tab_switch():
+    at = open_app(SHOP_TAB)
+    at.text_input(key="shop_search").input("blender").run()
+    at.button_group(key="facet_category").set_value(["Kitchen"]).run()
+    at.selectbox(key="shop_sort").select("price_asc").run()
+
+    switch_tab(at, CART_TAB)
+    switch_tab(at, SHOP_TAB)
+
+    assert at.text_input(key="shop_search").value == "blender"
+    assert at.button_group(key="facet_category").value == ["Kitchen"]
+    assert at.selectbox(key="shop_sort").value == "price_asc"
+
+
+def test_no_llm_mode_survives_closing_developer_tools():
+    at = open_app()
+    at.checkbox(key="no_llm").check().run()
+    at.session_state["developer_tools"] = True
+    at.run()
+    at.session_state["developer_tools"] = False
+    at.run()
+
+    assert at.session_state["no_llm"] is True
+
+
+def test_new_sessions_do_not_hold_stock():
+    for _ in range(3):
+        open_app()
+    stock = inventory.Inventory()
+    # Another session sees every unit of the default bag's items, however many pages were opened
+    assert stock.availability(DEFAULT_CART) == {pid: stock.on_hand(pid) for pid in DEFAULT_CART}
+
+
+
+def test_clearing_session_data_releases_reservations():
+    at = open_app(SHOP_TAB)
+    grid = at.button_group(key="shop_grid_action")
+    with open("products.csv", newline="", encoding="utf-8") as f:
+        product_ids = [int(row["product_id"]) for row in csv.DictReader(f)]
+    product_id = next(pid for pid in product_ids if grid.format_func(pid) in grid.options)
+    grid.set_value(product_id).run()
+    stock = inventory.Inventory()
+    assert stock.available(product_id) == stock.on_hand(product_id) - 1
+
+    at.session_state["developer_tools"] = True
+    at.run()
+    next(b for b in at.button if b.label == "Clear Session Data").click().run()
+    assert stock.available(product_id) == stock.on_hand(product_id)
+
+
+def test_products_dropped_from_the_catalog_leave_the_bag():
+    at = open_app(CHECKOUT_TAB)
+    stale = 999_999
+    at.session_state["cart"].add(stale, 10.0)
+    at.run()
+
+    assert not at.exception
+    cart = at.session_state["cart"]
+    assert stale not in cart
+    assert cart.subtotal == sum(cart.unit_price(pid) * quantity for pid, quantity in cart.items())
+
+    place_order(at)
+    assert at.session_state["checkout_complete"]
+
+
+def test_bag_lines_show_the_price_the_total_uses():
+    at = open_app()
+    # Added at an older price than the catalog's
+    at.session_state["cart"].add(110, 1.25, 2)
+    at.run()
+    assert any("₹1.25" in m.value for m in at.markdown)
+
+    switch_tab(at, CHECKOUT_TAB)
+    assert any('class="line-amount">₹2.50' in m.value for m in at.markdown)
+
+
+def test_clearing_order_history_keeps_the_stored_orders():
+    at = open_app(CHECKOUT_TAB)
+    place_order(at)
+    order_id = at.session_state["placed_order_id"]
+
+    at.session_state["developer_tools"] = True
+    at.run()
+    next(b for b in at.button if b.label == "Clear Order History").click().run()
+
+    assert not at.exception
+    assert "No orders placed yet." in [m.value for m in at.markdown]
+    assert order_store.OrderStore().get(order_id) is not None
@@ -0,0 +1,39 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cart import OrderLine  # noqa: E402
+from order_store import OrderStore  # noqa: E402
+
+
+def order(order_id: int, session_id: str = "s1") -> dict:
+    return {"order_id": order_id, "session_id": session_id, "date": f"2026-01-01 00:00:{order_id:02d}",
+            "name": "Test Buyer", "email": "buyer@example.com", "phone": "9999999999", "address": "1 Main Street",
+            "payment_method": "UPI", "items": [OrderLine(101, 1, 49900, "Mug")], "total": 499.0,
+            "delivery_date": "Monday"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = OrderStore(str(tmp_path / "orders.db"))
+    yield store
+    store.close()
+
+
+def test_place_raises_when_the_order_was_not_stored(store):
+    store.place(order(1))
+    with pytest.raises(sqlite3.IntegrityError):
+        store.place(dict(order(1), name="Someone Else"))
+    assert store.get(1)["name"] == "Test Buyer"
+
+
+def test_after_hides_older_orders(store):
+    for order_id in (1, 2, 3):
+        store.place(order(order_id))
+    assert store.count(session_id="s1", after=2) == 1
+    assert [o["order_id"] for o in store.history(session_id="s1", after=1)] == [3, 2]
+    assert store.latest(session_id="s1", after=3) is None
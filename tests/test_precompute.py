@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import precompute  # noqa: E402
+
+
+def test_batch_save_keeps_suggestions_added_at_runtime(tmp_path):
+    path = str(tmp_path / "cart_suggestions.json")
+    precompute.add_suggestion(path, "v1", "1,2", {"text": "model", "source": "llm"})
+    precompute.add_suggestion(path, "v1", "3", {"text": "model 3", "source": "llm"})
+
+    written = precompute.save_suggestions(path, "v1", {"1,2": {"text": "template", "source": "template"},
+                                                       "4": {"text": "template 4", "source": "template"}})
+
+    assert written == 1
+    stored = precompute.load_suggestions(path, "v1")
+    assert {signature: entry["text"] for signature, entry in stored.items()} == {
+        "1,2": "model", "3": "model 3", "4": "template 4"}
+
+
+def test_entries_keep_their_own_catalog_version(tmp_path):
+    path = str(tmp_path / "cart_suggestions.json")
+    precompute.add_suggestion(path, "v1", "1", {"text": "old", "source": "llm"})
+    precompute.save_suggestions(path, "v2", {"2": {"text": "new", "source": "template"}})
+
+    assert list(precompute.load_suggestions(path, "v1")) == ["1"]
+    assert list(precompute.load_suggestions(path, "v2")) == ["2"]
+    # A model suggestion for an older catalog does not block a template for the current one
+    precompute.save_suggestions(path, "v2", {"1": {"text": "current", "source": "template"}})
+    assert precompute.load_suggestions(path, "v2")["1"]["text"] == "current"
+
+
+def test_reads_files_with_one_version_for_every_entry(tmp_path):
+    path = tmp_path / "cart_suggestions.json"
+    path.write_text(json.dumps({"catalog_version": "v1", "suggestions": {"1": {"text": "t", "source": "llm"}}}))
+
+    assert precompute.has_llm_suggestion(str(path), "v1", "1")
+    assert precompute.load_suggestions(str(path), "v2") == {}
@@ -0,0 +1,23 @@
+import csv
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import CatalogIndex  # noqa: E402
+from search_cache import IncrementalSearch  # noqa: E402
+
+
+def load_catalog() -> CatalogIndex:
+    with open(os.path.join(ROOT, "products.csv"), newline="", encoding="utf-8") as f:
+        return CatalogIndex(list(csv.DictReader(f)), "test")
+
+
+def test_longer_terms_refine_earlier_results():
+    catalog = load_catalog()
+    search = IncrementalSearch()
+    for term in ("b", "bl", "blend", "Blender", "blender"):
+        assert search.search(catalog, term) == catalog.search(search_term=term)
+    stats = search.stats()
+    assert (stats["scans"], stats["refined"], stats["hits"]) == (1, 3, 1)